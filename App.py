@@ -1,6 +1,8 @@
 import pandas as pd
 import streamlit as st
 
+from utils import config
+
 # -- Page config --
 st.set_page_config(page_title='DVIZ Project: World in data',
                    page_icon=':earth_africa:',
@@ -13,6 +15,9 @@ def navbar():
         st.page_link('App.py', label='Home', icon='🏠')
         st.page_link('pages/Suicide.py', label='Suicide Data', icon='🌍')
         st.page_link('pages/About.py', label='About / Code', icon='❓')
+        st.page_link('pages/Indicators.py', label='Indicators', icon='📊')
+        if config.DATA_QUALITY_PAGE:
+            st.page_link('pages/Data_Quality.py', label='Data Quality', icon='🩺')
 
 
 navbar()
@@ -0,0 +1 @@
+# -- Indicator datasets declared as plugins (see utils/plugins.py), enabled with DVIZ_PLUGINS --
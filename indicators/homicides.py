@@ -0,0 +1,57 @@
+import numpy as np
+
+from utils.plugins import register_plugin
+from utils.quality import REGION_RENAMES, examples, issue, null_issues, year_gap_issues
+from utils.rates import DENOMINATOR_PER
+from utils.suicides import SEX_COLORS
+
+# -- Intentional homicides of the countries per year and sex (e.g. an export of the UNODC homicide statistics), with
+# -- the population of the country repeated on every row of a country-year like the suicide data. Put the file at
+# -- csv_files/homicides.csv and set DVIZ_PLUGINS=indicators.homicides --
+
+
+# -- Negative counts are set to missing, region names are shortened like the suicide data's --
+def clean_homicides(df_homicides):
+    issues = null_issues('homicides', df_homicides)
+    df_homicides = df_homicides.copy()
+
+    negative = df_homicides['HomicideCount'] < 0
+    if negative.any():
+        df_homicides.loc[negative, 'HomicideCount'] = np.nan
+        issues.append(issue('homicides', 'Negative homicide count', 'HomicideCount', negative.sum(), 'fixed',
+                            'Set to missing'))
+
+    renamed = df_homicides['RegionName'].isin(list(REGION_RENAMES))
+    if renamed.any():
+        df_homicides['RegionName'] = df_homicides['RegionName'].replace(REGION_RENAMES)
+        issues.append(issue('homicides', 'Region renamed', 'RegionName', renamed.sum(), 'fixed',
+                            examples(f'{old} → {new}' for old, new in REGION_RENAMES.items())))
+
+    issues += year_gap_issues('homicides', df_homicides, 'CountryName')
+    return df_homicides, issues
+
+
+HOMICIDES = register_plugin(
+    'homicides',
+    title='Homicides',
+    file='./csv_files/homicides.csv',
+    schema={'RegionName': 'str', 'CountryName': 'str', 'CountryCode': 'str', 'Year': 'int', 'Sex': 'str',
+            'HomicideCount': 'float', 'Population': 'float'},
+    normalize=clean_homicides,
+    country=('CountryName', 'CountryCode'),
+    labels={'country': 'CountryName', 'continent': 'RegionName', 'sex': 'Sex'},
+    measure=dict(numerator='HomicideCount', denominator='Population', rate='HomicideRatePer100K', scale=1e5,
+                 title='Homicides per 100K', per=DENOMINATOR_PER),
+    rollups={
+        'world': dict(by=['Year']),
+        'world_sex': dict(by=['Year', 'Sex'], where=[('Sex', '!=', 'Unknown')]),
+        'region_sex': dict(by=['RegionName', 'Year', 'Sex'], where=[('Sex', '!=', 'Unknown')]),
+    },
+    charts={
+        'world': dict(rollup='world', kind='line', title='🔪 Homicides worldwide over the years'),
+        'world_sex': dict(rollup='world_sex', kind='line', color='Sex', color_map=SEX_COLORS,
+                          title='👦👧 Homicides worldwide by gender over the years'),
+        'region_sex': dict(rollup='region_sex', kind='bar', color='Sex', color_map=SEX_COLORS,
+                           title='👦👧 Homicides by continent and gender over the years'),
+    },
+)
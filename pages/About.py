@@ -1,5 +1,7 @@
 import streamlit as st
 
+from utils import config
+
 
 # -- Page config --
 st.set_page_config(page_title='About This Project',
@@ -28,6 +30,9 @@ def navbar():
         st.page_link('App.py', label='Home', icon='🏠')
         st.page_link('pages/Suicide.py', label='Suicide Data', icon='🌍')
         st.page_link('pages/About.py', label='About / Code', icon='❓')
+        st.page_link('pages/Indicators.py', label='Indicators', icon='📊')
+        if config.DATA_QUALITY_PAGE:
+            st.page_link('pages/Data_Quality.py', label='Data Quality', icon='🩺')
 
 
 navbar()
@@ -0,0 +1,63 @@
+import streamlit as st
+
+from utils import config
+from utils.data_version import data_refresher
+
+# -- Page config --
+st.set_page_config(page_title='Data Quality',
+                   page_icon=':stethoscope:',
+                   layout='wide')
+
+# -- Here I remove the Streamlit header and footer --
+st.markdown(
+    """
+    <style>
+        footer {display: none}
+        [data-testid="stHeader"] {display: None}
+    </style>
+    """, unsafe_allow_html=True
+)
+
+# -- Loading CSS --
+with open('./style/styles.css') as f:
+    css = f.read()
+    st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
+
+
+# -- Navbar --
+def navbar():
+    with st.sidebar:
+        st.page_link('App.py', label='Home', icon='🏠')
+        st.page_link('pages/Suicide.py', label='Suicide Data', icon='🌍')
+        st.page_link('pages/About.py', label='About / Code', icon='❓')
+        st.page_link('pages/Indicators.py', label='Indicators', icon='📊')
+        if config.DATA_QUALITY_PAGE:
+            st.page_link('pages/Data_Quality.py', label='Data Quality', icon='🩺')
+
+
+navbar()
+
+# -- The report lists file contents and country names, it is only shown where DVIZ_DATA_QUALITY_PAGE is set --
+if not config.DATA_QUALITY_PAGE:
+    st.info('The Data Quality page is not enabled on this server.')
+    st.stop()
+
+# -- Report of the ingestion of the live data version, kept by the data refresher (see utils/data_version.py) --
+fingerprint, report = data_refresher().result()
+df_quality, df_unmatched = report['quality'], report['unmatched']
+
+# -- Title --
+st.markdown('# :stethoscope: Data Quality')
+st.write(f'Checks of the data files of version `{fingerprint}`, run once when the data is loaded. Fixed rows are '
+         'corrected before the charts use them, flagged rows are used as they are.')
+
+col1, col2, col3 = st.columns(3)
+col1.metric('Checks with findings', len(df_quality))
+col2.metric('Rows fixed or dropped', int(df_quality.loc[df_quality['Action'] != 'flagged', 'Rows'].sum()))
+col3.metric('Flagged checks', int((df_quality['Action'] == 'flagged').sum()))
+
+st.dataframe(df_quality, use_container_width=True, hide_index=True)
+
+with st.expander(f'Unmatched country names ({len(df_unmatched)})'):
+    st.write('These names have no match in the population dataset and are kept under their own name.')
+    st.dataframe(df_unmatched, use_container_width=True, hide_index=True)
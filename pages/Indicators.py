@@ -0,0 +1,101 @@
+import streamlit as st
+
+from utils import config
+from utils.disk_cache import dataset_fingerprint, disk_cache
+from utils.ingest import ingest_plugin, plugin_files
+from utils.plugins import PLUGINS, build_plugin_arrays, build_plugin_cubes, load_plugins, plugin_figure
+from utils.rates import window_series
+
+# -- Page config --
+st.set_page_config(page_title='Indicators',
+                   page_icon=':bar_chart:',
+                   layout='wide')
+
+# -- Here I remove the Streamlit header and footer --
+st.markdown(
+    """
+    <style>
+        footer {display: none}
+        [data-testid="stHeader"] {display: None}
+    </style>
+    """, unsafe_allow_html=True
+)
+
+# -- Loading CSS --
+with open('./style/styles.css') as f:
+    css = f.read()
+    st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
+
+
+# -- Navbar --
+def navbar():
+    with st.sidebar:
+        st.page_link('App.py', label='Home', icon='🏠')
+        st.page_link('pages/Suicide.py', label='Suicide Data', icon='🌍')
+        st.page_link('pages/About.py', label='About / Code', icon='❓')
+        st.page_link('pages/Indicators.py', label='Indicators', icon='📊')
+        if config.DATA_QUALITY_PAGE:
+            st.page_link('pages/Data_Quality.py', label='Data Quality', icon='🩺')
+
+
+navbar()
+
+# -- Title --
+st.markdown('# :bar_chart: Indicators')
+st.write('Further indicators of the countries and continents, every dataset is declared once and gets the same checks, '
+         'aggregations and caches as the suicide data.')
+
+# -- Datasets of DVIZ_PLUGINS without a page of their own (see utils/plugins.py), imported on the first visit --
+load_plugins()
+indicators = [name for name, plugin in PLUGINS.items() if 'page' not in plugin]
+if not indicators:
+    st.info('No further indicator datasets are configured, see "Adding an indicator" in the README.')
+    st.stop()
+
+
+# -- One shared copy of a dataset per data version, checked, cleaned and encoded once (see utils/ingest.py) --
+@st.cache_resource(show_spinner=False, max_entries=8)
+def plugin_datasets(name, fingerprint):
+    return ingest_plugin(name, fingerprint)
+
+
+# -- Per group prefix sums over the years of every rollup of a dataset --
+@st.cache_resource(show_spinner=False, max_entries=8)
+def plugin_cubes(name, fingerprint):
+    _, df, _, _, _ = plugin_datasets(name, fingerprint)
+    return build_plugin_cubes(PLUGINS[name], build_plugin_arrays(PLUGINS[name], df))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+@disk_cache('figure')
+def plugin_chart_figure(name, fingerprint, chart, years):
+    cube = plugin_cubes(name, fingerprint)[PLUGINS[name]['charts'][chart]['rollup']]
+    return plugin_figure(PLUGINS[name], chart, window_series(cube, *years), years)
+
+
+name = st.selectbox('Indicator', indicators, format_func=lambda name: PLUGINS[name]['title'], key='indicator')
+fingerprint = dataset_fingerprint(plugin_files(name))
+cubes = plugin_cubes(name, fingerprint)
+
+# -- Years of the dataset, the selection is kept within them when another dataset is picked --
+years = [int(year) for cube in cubes.values() for year in cube['years'][[0, -1]]] if cubes else [0, 0]
+first_year, last_year = min(years), max(years)
+selected_years = tuple(sorted(min(max(year, first_year), last_year)
+                              for year in st.session_state.get('indicator_years', (first_year, last_year))))
+st.session_state['indicator_years'] = selected_years
+if first_year < last_year:
+    selected_years = st.slider('Select the years', first_year, last_year, key='indicator_years')
+
+charts = list(PLUGINS[name]['charts'])
+columns = st.columns(2)
+for index, chart in enumerate(charts):
+    with columns[index % 2]:
+        st.plotly_chart(plugin_chart_figure(name, fingerprint, chart, selected_years), use_container_width=True)
+
+# -- The ingestion report is only shown where the Data Quality page is enabled --
+if config.DATA_QUALITY_PAGE:
+    *_, df_unmatched, df_quality = plugin_datasets(name, fingerprint)
+    with st.expander(f'Data quality ({len(df_quality)} checks with findings, {len(df_unmatched)} unmatched '
+                     'countries)'):
+        st.dataframe(df_quality, use_container_width=True, hide_index=True)
+        st.dataframe(df_unmatched, use_container_width=True, hide_index=True)
@@ -1,9 +1,37 @@
+import threading
+import uuid
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
 from streamlit_option_menu import option_menu
 
+from utils import config
+from utils.charts import (CHART_PARAMS, chart_key, gdp_line_figure, gni_line_figure, population_line_figure,
+                          population_percentage_figure, suicides_by_gender_figure, suicides_line_figure,
+                          trivia_countries, trivia_lines)
+from utils.correlation import INDICATORS, METHODS
+from utils.data_version import (data_refresher, version_correlations, version_country_facts, version_forecasts,
+                                version_rollups)
+from utils.disk_cache import disk_cache
+from utils.encoding import decode
+from utils.export import (IMAGE_FORMATS, TABLE_FORMATS, cached_export, image_export_available, render_image,
+                          table_bytes)
+from utils.facts import ALL_GENERATIONS, ALL_SEXES, lookup_country_facts
+from utils.forecast import MODELS
+from utils.ingest import ingest_datasets
+from utils.permalink import LIST_PARAMS, VIEW_PARAMS, canonical_params, parse_view, parse_years, view_key, years_param
+from utils.plugins import build_plugin_arrays, build_plugin_cubes, plugin_figure
+from utils.rates import TOTAL, build_year_cube, weighted_rates, window_breakdown, window_series, window_totals
+from utils.render import heatmap_figure, line_figure
+from utils.scheduler import submit_builds
+from utils.session_memory import SessionArtifacts, memory_metrics
+from utils.similarity import build_country_features, build_similarity_index, nearest_countries
+from utils.suicides import SUICIDES
+from utils.treemap import TREEMAP_METRICS, build_treemap_hierarchy, treemap_figure
+
 # -- Page config --
 st.set_page_config(page_title='World development',
                    page_icon=':earth_africa:',
@@ -31,6 +59,9 @@ def navbar():
         st.page_link('App.py', label='Home', icon='🏠')
         st.page_link('pages/Suicide.py', label='Suicide Data', icon='🌍')
         st.page_link('pages/About.py', label='About / Code', icon='❓')
+        st.page_link('pages/Indicators.py', label='Indicators', icon='📊')
+        if config.DATA_QUALITY_PAGE:
+            st.page_link('pages/Data_Quality.py', label='Data Quality', icon='🩺')
 
 
 navbar()
@@ -45,29 +76,125 @@ st.write('Please, seek professional help if you are in need: ',
          'https://en.wikipedia.org/wiki/List_of_suicide_crisis_lines')
 
 
-# -- Cache data --
-@st.cache_data(show_spinner=False)
-def load_data(data):
-    data = pd.read_csv(data)
-    return data
-
+# -- Sessions keep the last complete data version while newer data files are built in the background (see
+# -- utils/data_version.py) --
+data_fingerprint = data_refresher().current(st.session_state.setdefault('session_id', uuid.uuid4().hex))
 
-# -- Load data --
-df_pop = load_data('./csv_files/world_population_revisited.csv')
-df_pop = df_pop.dropna(subset=['Continent'])
 
-df_suicides = load_data('./csv_files/suicides.csv')
+# -- Load data, checked, cleaned and encoded once per data version (see utils/ingest.py) --
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_datasets(fingerprint):
+    return ingest_datasets(fingerprint)
 
-# -- I replace the counter for the suicides from 0 to 1 as it should have been --
-df_suicides['SuicideCount'] = df_suicides['SuicideCount'].replace(0, 1)
 
-# -- I replace 'Central and South America' with 'South America' for the choropleth map and for better division
-df_suicides['RegionName'] = df_suicides['RegionName'].replace('Central and South America', 'South America')
+# -- One shared copy of the datasets per data version, st.cache_data would give every rerun its own copy --
+@st.cache_resource(show_spinner=False, max_entries=2)
+def datasets(fingerprint):
+    return load_datasets(fingerprint)
 
-# -- I replace 'North America and the Caribbean' with 'North America' for the choropleth map and for better division
-df_suicides['RegionName'] = df_suicides['RegionName'].replace('North America and the Caribbean', 'North America')
 
-df_continent = load_data('./csv_files/continents.csv')
+# -- Load data --
+df_pop, df_suicides, df_continent, df_countries, df_unmatched, df_quality = datasets(data_fingerprint)
+
+
+# -- World and continent rollups of the static charts, with the pandas or DuckDB engine (see utils/query.py) --
+@st.cache_data(show_spinner=False, max_entries=2)
+def suicide_rollups(fingerprint):
+    return version_rollups(fingerprint)
+
+
+# -- Numerator/denominator arrays of the suicide rate (see utils/rates.py), shared by all sessions --
+@st.cache_resource(show_spinner=False, max_entries=2)
+def rate_arrays(fingerprint):
+    return build_plugin_arrays(SUICIDES, datasets(fingerprint)[1])
+
+
+# -- Per group prefix sums over the years of every rollup, a window of years is two lookups per group --
+@st.cache_resource(show_spinner=False, max_entries=2)
+def year_cubes(fingerprint):
+    return build_plugin_cubes(SUICIDES, rate_arrays(fingerprint))
+
+
+# -- Suicides per (country, generation, sex) and year as prefix sums, the gender pie of any selection and years is a
+# -- sum over the selected countries --
+@st.cache_resource(show_spinner=False, max_entries=2)
+def sex_cube(fingerprint):
+    return build_year_cube(rate_arrays(fingerprint), ['CountryId', 'Generation', 'Sex'])
+
+
+# -- First and last year of the suicide data --
+def year_range(fingerprint):
+    years = year_cubes(fingerprint)['world']['years']
+    return int(years[0]), int(years[-1])
+
+
+# -- Suicides per 100K of a rollup over the years start..end: population weighted (default), or the sum of the
+# -- per-row rates of the datasets --
+def rate_rollup(fingerprint, name, rate_method, years):
+    if rate_method == 'summed':
+        rollup = suicide_rollups(fingerprint)[name]
+        return rollup[rollup['Year'].between(*years)]
+    return window_series(year_cubes(fingerprint)[name], *years)
+
+
+# -- Per country-year facts of the Countries tab, built once instead of a groupby on every rerun --
+@st.cache_data(show_spinner=False, max_entries=2)
+def country_facts(fingerprint):
+    return version_country_facts(fingerprint)
+
+
+# -- Forecasts of every series of the Countries tab and every model, fitted once per data version (see
+# -- utils/forecast.py) --
+@st.cache_data(show_spinner=False, max_entries=2)
+def forecasts(fingerprint):
+    return version_forecasts(fingerprint)
+
+
+# -- Nearest neighbour index of the countries (see utils/similarity.py), rebuilt only for a new data version --
+@st.cache_resource(show_spinner=False, max_entries=2)
+def similarity_index(fingerprint):
+    features = build_country_features(datasets(fingerprint)[0],
+                                      weighted_rates(rate_arrays(fingerprint), ['CountryId', 'Year']),
+                                      country_facts(fingerprint)['economics'])
+    return build_similarity_index(features)
+
+
+# -- Data of a Countries-tab view, cached on its canonical permalink key: a shared view is computed only once --
+@st.cache_data(show_spinner=False, max_entries=256)
+def countries_view(fingerprint, key, years, _df_pop, _df_countries):
+    view = dict(key)
+    country_ids = _df_countries.loc[_df_countries['Country'].isin(view.get('countries', ())), 'CountryId'].tolist()
+    selection = decode(_df_pop[_df_pop['CountryId'].isin(country_ids) &
+                               _df_pop['Continent'].isin(view.get('continents', ()))])
+    facts = lookup_country_facts(country_facts(fingerprint), view.get('sex', ALL_SEXES),
+                                 view.get('generation', ALL_GENERATIONS), country_ids, _df_countries['Country'])
+    return country_ids, selection, facts[facts['Year'].between(*years)]
+
+
+# -- View state of the URL (see utils/permalink.py), given to the widgets on the first run of a session --
+TABS = ['Worldwide', 'Continents', 'Countries']
+YEARS = year_range(data_fingerprint)
+SEXES = [ALL_SEXES, 'Male', 'Female', 'Unknown']
+GENERATIONS = [ALL_GENERATIONS] + list(df_suicides['Generation'].unique())
+FORECASTS = ['off', *MODELS]
+VIEW_DEFAULTS = {'tab': TABS[0], 'years': years_param(YEARS), 'sex': ALL_SEXES, 'generation': ALL_GENERATIONS,
+                 'forecast': FORECASTS[0], 'metric': next(iter(TREEMAP_METRICS))}
+VIEW_OPTIONS = {'tab': TABS, 'years': {years_param((start, end)) for start in range(YEARS[0], YEARS[1] + 1)
+                                       for end in range(start, YEARS[1] + 1)},
+                'continents': set(df_pop['Continent']), 'countries': set(df_pop['Country']),
+                'sex': SEXES, 'generation': GENERATIONS, 'forecast': FORECASTS, 'metric': TREEMAP_METRICS}
+
+if 'initial_view' not in st.session_state:
+    initial_view = parse_view({name: st.query_params.get_all(name) for name in VIEW_PARAMS}, VIEW_OPTIONS,
+                              VIEW_DEFAULTS)
+    # -- Countries are only offered for the selected continents --
+    continent_countries = set(df_pop.loc[df_pop['Continent'].isin(initial_view['continents']), 'Country'])
+    initial_view['countries'] = [name for name in initial_view['countries'] if name in continent_countries]
+    st.session_state['initial_view'] = initial_view
+    for widget_key, name in [('continents', 'continents'), ('countries', 'countries'), ('sex', 'sex'),
+                             ('generation', 'generation'), ('forecast', 'forecast'), ('treemap_metric', 'metric')]:
+        st.session_state[widget_key] = initial_view[name]
+    st.session_state['years'] = parse_years(initial_view['years'])
 
 # -- Setup tabs --
 
@@ -76,8 +203,9 @@ tab_selection = option_menu(
     options=['Worldwide', 'Continents', 'Countries'],
     icons=['globe-americas', 'archive', 'airplane'],
     menu_icon='cast',
-    default_index=0,
+    default_index=TABS.index(st.session_state['initial_view']['tab']),
     orientation='horizontal',
+    key='tab_selection',
     styles={
         'container': {'padding': '0!important', 'background-color': 'transparent'},
         'icon': {'color': 'white', 'font-size': '25px'},
@@ -92,426 +220,331 @@ tab_selection = option_menu(
 )
 
 
+# -- Years of every chart. A new data version can have fewer years, the selection is kept within them --
+selected_years = tuple(sorted(min(max(year, YEARS[0]), YEARS[1]) for year in st.session_state.get('years', YEARS)))
+st.session_state['years'] = selected_years
+selected_years = st.slider('Select the years', YEARS[0], YEARS[1], key='years') if YEARS[0] < YEARS[1] else YEARS
+
 # st.dataframe(df_pop)
 # st.dataframe(df_suicides)
 
-# -- Population line chart --
-
-def population_line_chart():
-    df_melted = pd.melt(df_selection, id_vars=['Country', 'Continent'],
-                        value_vars=['2022_Population', '2020_Population',
-                                    '2015_Population', '2010_Population',
-                                    '2000_Population', '1990_Population',
-                                    '1980_Population', '1970_Population'],
-                        var_name='Year', value_name='Population')
-
-    df_melted['Year'] = df_melted['Year'].str.split('_').str[0]
-
-    year_order = ['1970', '1980', '1990', '2000', '2010', '2015', '2020', '2022']
-
-    fig = px.line(df_melted, x='Year', y='Population', color='Country',
-                  labels={'Population': 'Population Count', 'Year': 'Year'},
-                  category_orders={'Year': year_order},
-                  title='👨‍👩‍👧‍👦 Population over the years')
-
-    # -- Customizing chart appearance --
-    fig.update_traces(line=dict(width=2))
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        legend=dict(title='Country', title_font=dict(size=24)),
-        xaxis=dict(showgrid=True, title_font=dict(size=24)),
-        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
-
-    st.plotly_chart(fig, use_container_width=True)
-
-
-# -- Suicides per gender pie chart --
-def suicides_by_gender(selected_countries, selected_generation):
-    if selected_generation != 'All generations':
-        suicide_by_gender = df_suicides[(df_suicides['CountryName'].isin(selected_countries)) &
-                                        (df_suicides['Generation'] == selected_generation)].dropna().groupby(['Sex'])[
-            'SuicideCount'].sum()
-        chart_title = f" Total suicides by gender ({selected_generation})"
-    else:
-        suicide_by_gender = df_suicides[df_suicides['CountryName'].isin(selected_countries)].dropna().groupby(['Sex'])[
-            'SuicideCount'].sum()
-        chart_title = "Total suicides by gender (All generations)"
-
-    labels = ['Female', 'Male']
-    # -- Defining colors for the genders --
-    colors = ['lightcoral', 'dodgerblue']
-
-    fig = go.Figure(data=[go.Pie(labels=labels, values=suicide_by_gender,
-                                 textinfo='label+percent', marker=dict(colors=colors))])
-
-    # -- Customizing chart appearance --
-    fig.update_layout(title='👦👧' + chart_title, showlegend=True)
-
-    st.plotly_chart(fig, use_container_width=True)
-
-
-# -- Suicide Line Chart
-def suicides_chart():
-    fig = px.line(suicides_filtered, x='Year', y='SuicideCount', color='CountryName',
-                  labels={'SuicideCount': 'Number of Suicides', 'Year': 'Year', 'CountryName': 'Country'},
-                  title=f'💀 {suicide_chart_title}, for {selected_generation}')
-
-    # -- Customizing chart appearance --
-    fig.update_traces(line=dict(width=2))
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        legend=dict(title='Country', title_font=dict(size=24)),
-        xaxis=dict(showgrid=True, title_font=dict(size=24), tickmode='linear', tick0=1970, dtick=1),
-        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
-    st.plotly_chart(fig, use_container_width=True)
-
-
-# -- Suicides per 100K people Bar Chart #1--
-def suicides100K_gender():
-    suicides100k_gender_data = df_suicides.groupby(['RegionName', 'Year', 'Sex'])[
-        'DeathRatePer100K'].sum().reset_index()
-    suicides100k_gender_data = suicides100k_gender_data[suicides100k_gender_data['Sex'] != 'Unknown']
-
-    # -- Defining colors for the genders --
-    colors = {'Male': 'dodgerblue', 'Female': 'lightcoral'}
-
-    fig = px.bar(suicides100k_gender_data, x='RegionName', y='DeathRatePer100K', color='Sex',
-                 barmode='group', color_discrete_map=colors,
-                 labels={'DeathRatePer100K': 'Number of Suicides per 100K', 'RegionName': 'Continent'},
-                 title='👦👧 Suicides by Continent and Gender over the years (1990 - 2022)',
-                 animation_frame='Year', animation_group='RegionName')
+# -- Export buttons of the Countries tab. Files are built when a button is clicked, on a separate thread and
+# -- without a rerun, and cached per view (data version and filters) so repeated exports are served from the cache --
+def chart_downloads(name, fig, view):
+    columns = st.columns(len(IMAGE_FORMATS))
+    for column, (file_format, mime) in zip(columns, IMAGE_FORMATS.items()):
+        column.download_button(
+            file_format.upper(), lambda file_format=file_format, fingerprint=data_fingerprint: cached_export(
+                ('chart', name, file_format, fingerprint, view), lambda: render_image(fig, file_format)),
+            file_name=f'{name}.{file_format}', mime=mime, key=f'export-{name}-{file_format}', on_click='ignore',
+            icon=':material/download:', disabled=not image_export_available(),
+            help=None if image_export_available() else 'Image export needs kaleido: pip install kaleido')
+
+
+def table_downloads(name, df, view):
+    columns = st.columns(len(TABLE_FORMATS))
+    for column, (file_format, mime) in zip(columns, TABLE_FORMATS.items()):
+        column.download_button(
+            f'{name} ({file_format.upper()})', lambda file_format=file_format, fingerprint=data_fingerprint:
+            cached_export(('table', name, file_format, fingerprint, view), lambda: table_bytes(df, file_format)),
+            file_name=f'{name}.{file_format}', mime=mime, key=f'export-{name}-{file_format}', on_click='ignore',
+            icon=':material/download:')
+
+
+# -- Adds the countries most similar to the chosen one (and their continents) to the country filter --
+def add_similar_countries():
+    countries = df_pop.set_index('CountryId')
+    reference = st.session_state['similar_reference']
+    reference_id = df_pop.loc[df_pop['Country'] == reference, 'CountryId'].iloc[0]
+    peers = nearest_countries(similarity_index(data_fingerprint), reference_id, st.session_state['similar_count'])
+    selected = countries.loc[[reference_id, *peers.index]]
+
+    st.session_state['continents'] = list(dict.fromkeys([*st.session_state['continents'],
+                                                         *selected['Continent'].astype(str)]))
+    st.session_state['countries'] = list(dict.fromkeys([*st.session_state['countries'],
+                                                        *selected['Country'].astype(str)]))
+    st.session_state['similar_peers'] = (reference, list(selected['Country'].astype(str)[1:]))
+
+
+# -- Derived frames and figures of this session, within its memory budget (see utils/session_memory.py) --
+def session_artifacts():
+    if 'artifacts' not in st.session_state:
+        st.session_state['artifacts'] = SessionArtifacts(st.session_state['session_id'])
+    return st.session_state['artifacts']
+
+
+# -- Forecast rows of countries for a key of the forecast index, e.g. (model, sex, generation) --
+def forecast_rows(fingerprint, name, key, country_ids):
+    data = forecasts(fingerprint)[name]
+    try:
+        data = data.loc[key]
+    except KeyError:
+        return data.iloc[:0].reset_index()
+    data = data[data.index.isin(country_ids)].reset_index()
+    data['Country'] = datasets(fingerprint)[3]['Country'].to_numpy()[data['CountryId'].to_numpy()]
+    return data
 
-    # -- Customizing chart appearance --
-    fig.update_layout(
-        width=1200,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(title_font=dict(size=24)),
-        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
 
+# -- Forecasts are shown when a model is selected and the years reach the latest data --
+def show_forecast(fingerprint, model, years):
+    return model != 'off' and years[1] == year_range(fingerprint)[1]
+
+
+# -- Forecast arguments of a Countries-tab line chart (see utils/charts.py) --
+def chart_forecast(fingerprint, name, key, model, years, country_ids):
+    if not show_forecast(fingerprint, model, years):
+        return {}
+    return {'forecast': forecast_rows(fingerprint, name, key, country_ids), 'forecast_title': MODELS[model]}
+
+
+# -- Canonical key of the data of a Countries-tab view (see utils/permalink.py). The forecast only changes the
+# -- charts, views that differ in it share their data --
+def countries_data_key(years, continents, countries, sex, generation):
+    return view_key(canonical_params({'tab': 'Countries', 'years': years_param(years), 'continents': continents,
+                                      'countries': countries, 'sex': sex, 'generation': generation}, VIEW_DEFAULTS))
+
+
+# -- Parameters of a Countries-tab chart, the defaults for those it does not depend on (see utils/charts.py) --
+def chart_params(key):
+    fingerprint = key[1]
+    return {'years': year_range(fingerprint), 'continents': (), 'countries': (), 'sex': ALL_SEXES,
+            'generation': ALL_GENERATIONS, 'forecast': FORECASTS[0], 'full_resolution': False, **dict(key[2:])}
+
+
+# -- Countries-tab chart of a chart_key, built from the key alone and cached for all sessions: every session that
+# -- shows the same chart of the same data version gets the figure built once --
+@st.cache_data(show_spinner=False, max_entries=256)
+@disk_cache('figure')
+def country_chart_figure(key):
+    name, fingerprint = key[:2]
+    params = chart_params(key)
+    years, sex, generation, model = params['years'], params['sex'], params['generation'], params['forecast']
+    df_pop, _, _, df_countries, _, _ = datasets(fingerprint)
+    country_ids, selection, facts = countries_view(
+        fingerprint, countries_data_key(years, params['continents'], params['countries'], sex, generation), years,
+        df_pop, df_countries)
+
+    if name == 'population':
+        return population_line_figure(selection, years,
+                                      **chart_forecast(fingerprint, 'population', model, model, years, country_ids))
+    if name == 'suicides':
+        return suicides_line_figure(facts, sex, generation, params['full_resolution'],
+                                    **chart_forecast(fingerprint, 'suicides', (model, sex, generation), model, years,
+                                                     country_ids))
+    if name == 'gdp_per_capita':
+        return gdp_line_figure(facts, params['full_resolution'])
+    if name == 'gross_national_income':
+        return gni_line_figure(facts, params['full_resolution'])
+    if name == 'population_percentage':
+        return population_percentage_figure(selection, df_pop['2022_Population'].sum())
+    selected = {'CountryId': country_ids}
+    if generation != ALL_GENERATIONS:
+        selected['Generation'] = [generation]
+    return suicides_by_gender_figure(window_breakdown(sex_cube(fingerprint), *years, 'Sex', selected), generation)
+
+
+# -- Builds independent figures together on the figure threads (see utils/scheduler.py), futures in the order of the
+# -- builds. A build runs with the script context of this run, so the cached functions it calls work as here. The
+# -- threads are shared by all sessions: the context is only theirs while the build runs --
+def build_figures(builds):
+    ctx, script_thread = get_script_run_ctx(), threading.current_thread()
+
+    def in_context(build):
+        def run():
+            thread = threading.current_thread()
+            if thread is script_thread:
+                return build()
+            previous = get_script_run_ctx(suppress_warning=True)
+            add_script_run_ctx(thread, ctx)
+            try:
+                return build()
+            finally:
+                setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+        return run
+
+    return submit_builds([in_context(build) for build in builds])
+
+
+def show_figure(future):
+    st.plotly_chart(future.result(), use_container_width=True)
+
+
+# -- Countries-tab charts of a view, only the charts whose parameters or data changed are built again (or taken from
+# -- the server-wide cache). Returns the key, the figure kept by the session (or None) and the future of the build of
+# -- every chart --
+def country_charts(view, charts):
+    artifacts = session_artifacts()
+    keys = {name: chart_key(name, data_fingerprint, view) for name in charts}
+    kept = {name: artifacts.get(key) for name, key in keys.items()}
+    missing = [name for name in charts if kept[name] is None]
+    futures = dict(zip(missing, build_figures([lambda key=keys[name]: country_chart_figure(key)
+                                               for name in missing])))
+    return {name: (keys[name], kept[name], futures.get(name)) for name in charts}
+
+
+def country_chart(name, key, kept, future):
+    fig = kept if kept is not None else session_artifacts().get_or_build(key, future.result)
     st.plotly_chart(fig, use_container_width=True)
+    chart_downloads(name, fig, key)
 
 
-# -- Suicides per 100K people Bar Chart #2--
-def suicides100K_age():
-    suicides100k_age_data = (df_suicides.groupby(['RegionName', 'Year', 'AgeGroup'])['DeathRatePer100K']
-                             .sum().reset_index())
-    suicides100k_age_data = suicides100k_age_data[suicides100k_age_data['AgeGroup'] != 'Unknown']
+def trivia(df_selection, country):
+    for line in trivia_lines(df_selection, country):
+        st.write(line)
 
-    # -- Defining colors for the genders --
-    # https://matplotlib.org/stable/gallery/color/named_colors.html
-    colors = {'0-14 years': 'dodgerblue',
-              '15-24 years': 'orchid',
-              '25-34 years': 'orange',
-              '55-74 years': 'chocolate',
-              '75+ years': 'maroon'}
 
-    fig = px.bar(suicides100k_age_data, x='RegionName', y='DeathRatePer100K', color='AgeGroup',
-                 barmode='group', color_discrete_map=colors,
-                 labels={'DeathRatePer100K': 'Number of Suicides per 100K', 'RegionName': 'Continent'},
-                 title='👶👱‍♀️👴 Suicides by Continent and the age group over the years (1990 - 2022)',
-                 animation_frame='Year', animation_group='RegionName')
+# -- Suicides per 100K charts of the world and continents, declared with the dataset (see utils/suicides.py) --
+@st.cache_data(show_spinner=False, max_entries=64)
+@disk_cache('figure')
+def rate_chart_figure(fingerprint, chart, rate_method, years):
+    data = rate_rollup(fingerprint, SUICIDES['charts'][chart]['rollup'], rate_method, years)
+    return plugin_figure(SUICIDES, chart, data, years)
 
-    # -- Customizing chart appearance --
-    fig.update_layout(
-        width=1200,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(title_font=dict(size=24)),
-        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
 
-    st.plotly_chart(fig, use_container_width=True)
+def rate_chart(chart):
+    return lambda: rate_chart_figure(data_fingerprint, chart, config.RATE_METHOD, selected_years)
 
 
 # -- Choropleth MAP for total counts --
-def choropleth_100k():
-    # -- Create dummy df for choropleth map --
-    dummy_data = (df_suicides.groupby(['RegionName', 'Year'])['SuicideCount']
-                  .sum().reset_index())
-    dummy_data = dummy_data.sort_values(by=['RegionName', 'Year'])
-    dummy_data['Total Suicides'] = dummy_data.groupby('RegionName')['SuicideCount'].cumsum()
-
-    # -- Now I delete all the years except the latest year
-    df_latest_year = dummy_data.groupby('RegionName').tail(1)
+@st.cache_data(show_spinner=False, max_entries=64)
+@disk_cache('figure')
+def choropleth_100k_figure(fingerprint, years):
+    # -- Total suicides of every continent over the selected years, from the prefix sums of the years --
+    df_totals = window_totals(year_cubes(fingerprint)['region_count'], *years)
+    df_totals = df_totals[['RegionName', TOTAL]].rename(columns={TOTAL: 'Total Suicides'})
 
     # -- Now I merge both dfs, fill all NaN with 0, and remove obsolete columns
-    choropleth_data = pd.merge(df_continent, df_latest_year, how='left', left_on='Continent', right_on='RegionName')
+    df_continent = datasets(fingerprint)[2]
+    choropleth_data = pd.merge(df_continent, df_totals, how='left', left_on='Continent', right_on='RegionName')
     choropleth_data['Total Suicides'] = choropleth_data['Total Suicides'].fillna(0)
-    choropleth_data.drop(columns=['Year_x', 'RegionName', 'SuicideCount'], inplace=True)
+    choropleth_data.drop(columns=['Year', 'RegionName'], inplace=True)
+    choropleth_data = decode(choropleth_data)
 
     # st.dataframe(choropleth_data)
     fig = px.choropleth(choropleth_data, locations='Code', color='Total Suicides', hover_name='Continent',
                         projection='cylindrical stereographic',
-                        title='Total number of suicides per continent (1990 - 2022)',
+                        title=f'Total number of suicides per continent ({years[0]} - {years[1]})',
                         color_continuous_scale='jet')
 
     # -- Customizing chart appearance --
     fig.update_layout(autosize=False)
 
-    st.plotly_chart(fig, use_container_width=True)
-
-
-# -- GDP Line chart --
-def gdp_line_chart():
-    fig = px.line(suicides_filtered, x='Year', y='GDPPerCapita', color='CountryName',
-                  labels={'GDPPerCapita': 'GDP per Capita', 'Year': 'Year', 'CountryName': 'Country'},
-                  title=f'💵 GDP per Capita')
-
-    # -- Customizing chart appearance --
-    fig.update_traces(line=dict(width=2))
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        legend=dict(title='Country', title_font=dict(size=24)),
-        xaxis=dict(showgrid=True, title_font=dict(size=24), tickmode='linear', tick0=1970, dtick=1),
-        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
-    st.plotly_chart(fig, use_container_width=True)
-
-
-# -- GNI Line chart --
-def gni_line_chart():
-    fig = px.line(suicides_filtered, x='Year', y='GrossNationalIncome', color='CountryName',
-                  labels={'GrossNationalIncome': 'Gross National income', 'Year': 'Year', 'CountryName': 'Country'},
-                  title=f'💰 Gross National Income')
-
-    # -- Customizing chart appearance --
-    fig.update_traces(line=dict(width=2))
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        legend=dict(title='Country', title_font=dict(size=24)),
-        xaxis=dict(showgrid=True, title_font=dict(size=24), tickmode='linear', tick0=1970, dtick=1),
-        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
-    st.plotly_chart(fig, use_container_width=True)
-
-
-# -- Country Trivia --
-def trivia(selected_country):
-    country_data = df_selection[df_selection['Country'] == selected_country]
-    if not country_data.empty:
-        population_density = country_data['2022_Population'] / country_data['Area']
-        st.write(f'{selected_country}\'s population Density is: {population_density.values[0]:,.2f} people per km$^2$')
-
-        st.write(f'The countries total area is: {country_data["Area"].values[0]:,.0f} km$^2$')
-
-        growth_rate = ((country_data['2022_Population'] - country_data['1970_Population']) / country_data[
-            '1970_Population']) * 100
-        st.write(f'Growth rate over the years: {growth_rate.values[0]:,.2f}%')
+    return fig
 
-        capital = country_data['Capital'].values[0]
-        st.write(f'Capital of {selected_country} is: {capital}')
 
+def choropleth_100k():
+    return lambda: choropleth_100k_figure(data_fingerprint, selected_years)
 
-# -- Today's population percentage chart--
-def population_percentage():
-    total_population_selected_countries = df_selection['2022_Population'].sum()
-    total_population_world = df_pop['2022_Population'].sum()
-
-    population_percentage = (total_population_selected_countries / total_population_world) * 100
-
-    rest_of_world_percentage = 100 - population_percentage
-
-    colors = ['#E41E3F', '#0040C9']
-
-    fig = go.Figure(data=[go.Pie(labels=['Selected Countries', 'Rest of the World'],
-                                 values=[population_percentage, rest_of_world_percentage],
-                                 pull=[0.01, 0.1],
-                                 marker=dict(colors=colors))])
-    fig.update_layout(title='📈 Population Percentage Compared to the Rest of the World')
-
-    st.plotly_chart(fig, use_container_width=True)
-
-
-# -- Worldwide suicide by gender line chart (with years) --
-def world_line_gender_chart():
-    suicides100k_world_gender_data = df_suicides.groupby(['Year', 'Sex'])[
-        'DeathRatePer100K'].sum().reset_index()
-    suicides100k_world_gender_data = suicides100k_world_gender_data[suicides100k_world_gender_data['Sex'] != 'Unknown']
-
-    # -- Defining colors for the genders --
-    colors = {'Male': 'dodgerblue', 'Female': 'lightcoral'}
-
-    fig = px.line(suicides100k_world_gender_data, x='Year', y='DeathRatePer100K', color='Sex',
-                  color_discrete_map=colors,
-                  labels={'DeathRatePer100K': 'Number of Suicides per 100K', 'Year': 'Year'},
-                  title='👦👧 Suicides worldwide by Gender over the years (1990 - 2022)')
 
-    # -- Customizing chart appearance --
-    fig.update_layout(
-        width=1200,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(title_font=dict(size=24)),
-        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
+# -- Population of the world treemap --
+@st.cache_data(show_spinner=False, max_entries=2)
+def treemap_hierarchy(fingerprint):
+    return build_treemap_hierarchy(datasets(fingerprint)[0])
 
-    st.plotly_chart(fig, use_container_width=True)
 
+# -- The metric is read from the session state, so the figure can be built before its selectbox is drawn. The state
+# -- of the selectbox is gone after a run of another tab, it then starts on its first metric --
+def treemap():
+    metric = st.session_state.get('treemap_metric', VIEW_DEFAULTS['metric'])
+    return lambda: treemap_figure(treemap_hierarchy(data_fingerprint), metric)
 
-# -- Worldwide suicide line chart (with years) --
-def world_line_chart():
-    suicides100k_world_data = df_suicides.groupby(['Year'])[
-        'DeathRatePer100K'].sum().reset_index()
 
-    fig = px.line(suicides100k_world_data, x='Year', y='DeathRatePer100K',
-                  labels={'DeathRatePer100K': 'Number of Suicides per 100K', 'Year': 'Year'},
-                  title='💀 Suicides worldwide over the years (1990 - 2022)')
+def show_treemap(future):
+    st.selectbox('Select data', list(TREEMAP_METRICS), key='treemap_metric')
+    show_figure(future)
 
-    # -- Customizing chart appearance --
-    fig.update_layout(
-        width=1200,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(title_font=dict(size=24)),
-        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
 
-    st.plotly_chart(fig, use_container_width=True)
+# -- Correlations of the suicide rate with the economic indicators, per data version (see utils/correlation.py) --
+@st.cache_data(show_spinner=False, max_entries=2)
+def correlations(fingerprint):
+    return version_correlations(fingerprint)
 
 
-# -- Worldwide suicide by age line chart (with years) --
-def world_line_age_chart():
-    suicides100k_world_age_data = (df_suicides.groupby(['Year', 'AgeGroup'])['DeathRatePer100K']
-                                   .sum().reset_index())
-    suicides100k_world_age_data = suicides100k_world_age_data[suicides100k_world_age_data['AgeGroup'] != 'Unknown']
+# -- World and continents first, then the countries by name --
+def correlation_rows(data, scope):
+    if scope == 'Countries':
+        return data[data['Scope'] == 'Country'].sort_values('Name')
+    return pd.concat([data[data['Scope'] == 'World'], data[data['Scope'] == 'Region'].sort_values('Name')])
 
-    # -- Defining colors for the genders --
-    # https://matplotlib.org/stable/gallery/color/named_colors.html
-    colors = {'0-14 years': 'dodgerblue',
-              '15-24 years': 'orchid',
-              '25-34 years': 'orange',
-              '55-74 years': 'chocolate',
-              '75+ years': 'maroon'}
 
-    fig = px.line(suicides100k_world_age_data, x='Year', y='DeathRatePer100K', color='AgeGroup',
-                  color_discrete_map=colors,
-                  labels={'DeathRatePer100K': 'Number of Suicides per 100K', 'RegionName': 'Continent'},
-                  title='👶👱‍♀️👴 Suicides worldwide by age group over the years (1990 - 2022)')
+@st.cache_data(show_spinner=False)
+@disk_cache('figure')
+def correlation_heatmap_figure(fingerprint, method, scope):
+    data = correlations(fingerprint)['correlations']
+    data = correlation_rows(data[(data['Method'] == method) & (data['Lag'] == 0)], scope)
+    matrix = data.pivot(index='Name', columns='Indicator', values='r').reindex(
+        index=data['Name'].unique(), columns=list(INDICATORS))
+    return heatmap_figure(matrix.to_numpy(), [INDICATORS[column] for column in matrix.columns], matrix.index,
+                          title=f'🔗 {METHODS[method]} correlation with the suicide rate per 100K',
+                          x_title='Indicator', y_title='Country' if scope == 'Countries' else 'Continent',
+                          value_title='r', height=max(400, 22 * len(matrix) + 200))
 
-    # -- Customizing chart appearance --
-    fig.update_layout(
-        width=1200,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(title_font=dict(size=24)),
-        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
 
-    st.plotly_chart(fig, use_container_width=True)
+@st.cache_data(show_spinner=False)
+@disk_cache('figure')
+def correlation_rolling_figure(fingerprint, indicator):
+    data = correlation_rows(correlations(fingerprint)['rolling'], 'Continents')
+    data = data[data['Indicator'] == indicator]
+    return line_figure(data, x='Year', y='r', color='Name', labels={'Name': 'Continent', 'r': 'r'},
+                       title=f'📉 {config.CORRELATION_WINDOW}-year rolling correlation with {INDICATORS[indicator]}',
+                       yaxis=dict(range=[-1, 1]), xaxis=dict(showgrid=True))
 
 
-# -- Population of the world treemap --
-def treemap():
-    selected_filter = st.selectbox('Select data',
-                                   ['Area', 'Population Density', 'Growth Rate', 'Population'])
-
-    filter_to_column = {
-        'Area': 'Area',
-        'Population Density': 'Density',
-        'Growth Rate': 'Growth Rate',
-        'Population': '2022_Population'
-    }
+@st.cache_data(show_spinner=False)
+@disk_cache('figure')
+def correlation_lag_figure(fingerprint, method, indicator):
+    data = correlations(fingerprint)['correlations']
+    data = correlation_rows(data[(data['Method'] == method) & (data['Indicator'] == indicator)], 'Continents')
+    return line_figure(data, x='Lag', y='r', color='Name', labels={'Name': 'Continent', 'Lag': 'Lag (years)'},
+                       title=f'⏳ Correlation with {INDICATORS[indicator]} of earlier years',
+                       yaxis=dict(range=[-1, 1]), xaxis=dict(showgrid=True, dtick=1))
 
-    selected_column = filter_to_column.get(selected_filter, '2022_Population')
-
-    treemap_continent = df_pop['Continent']
-    treemap_country = df_pop['Country']
-    treemap_population = df_pop['2022_Population']
-    treemap_area = df_pop['Area']
-    treemap_density = df_pop['Density']
-    treemap_growth_rate = df_pop['Growth_Rate']
-    treemap_percentage = df_pop['World_Population Percentage']
-
-    if selected_column == '2022_Population':
-        treemap_values = treemap_population
-        hover_data = {
-            'Country': treemap_country,
-            'Population': treemap_values,
-            'Percentage': treemap_percentage
-        }
-        hover_template = ('<b>Continent:</b> %{label}<br>' +
-                          '<b>Country:</b> %{customdata[0]}<br>' +
-                          '<b>Population:</b> %{customdata[1]}<br>' +
-                          '<b>World Population Percentage:</b> %{customdata[2]:.2f}%<extra></extra>')
-    elif selected_column == 'Area':
-        treemap_values = treemap_area
-        hover_data = {
-            'Country': treemap_country,
-            'Area': treemap_values
-        }
-        hover_template = ('<b>Continent:</b> %{label}<br>' +
-                          '<b>Country:</b> %{customdata[0]}<br>' +
-                          '<b>Area:</b> %{customdata[1]:,.2f} km²<extra></extra>')
-    elif selected_column == 'Density':
-        treemap_values = treemap_density
-        hover_data = {
-            'Country': treemap_country,
-            'Density': treemap_values
-        }
-        hover_template = ('<b>Continent:</b> %{label}<br>' +
-                          '<b>Country:</b> %{customdata[0]}<br>' +
-                          '<b>Population Density:</b> %{customdata[1]:,.2f} per km²<extra></extra>')
-    else:
-        treemap_values = treemap_growth_rate
-        hover_data = {
-            'Country': treemap_country,
-            'Growth Rate': treemap_values
-        }
-        hover_template = ('<b>Continent:</b> %{label}<br>' +
-                          '<b>Country:</b> %{customdata[0]}<br>' +
-                          '<b>Growth Rate:</b> %{customdata[1]:.2f}%<extra></extra>')
-
-    # -- Title --
-    if selected_filter == 'Population':
-        title_text = '🌳 2022 Population of the entire world'
-    else:
-        title_text = f'🌳 {selected_filter} of the entire world'
-
-    fig = px.treemap(df_pop,
-                     path=[px.Constant('Continent'), 'Continent', 'Country'],
-                     values=treemap_values,
-                     color=treemap_values,
-                     title=title_text,
-                     hover_data=[],
-                     color_continuous_scale='jet'
-                     )
-
-    fig.update_layout(
-        title_font_size=34,
-        height=1000,
-        width=1600,
-        coloraxis_colorbar=dict(title=selected_filter),
-    )
 
-    fig.update_traces(
-        hovertemplate=hover_template,
-        customdata=list(zip(*hover_data.values()))
-    )
+def correlation_panel():
+    st.subheader(':link: Suicide rate and the economy')
+    col1, col2, col3 = st.columns(3)
+    method = col1.selectbox('Correlation method', list(METHODS), format_func=METHODS.get, key='correlation_method')
+    scope = col2.selectbox('Compare', ['Continents', 'Countries'], key='correlation_scope')
+    indicator = col3.selectbox('Indicator', list(INDICATORS), format_func=INDICATORS.get,
+                               key='correlation_indicator')
 
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(correlation_heatmap_figure(data_fingerprint, method, scope), use_container_width=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(correlation_rolling_figure(data_fingerprint, indicator), use_container_width=True)
+    with col2:
+        st.plotly_chart(correlation_lag_figure(data_fingerprint, method, indicator), use_container_width=True)
 
 
 if tab_selection == 'Worldwide':
     st.title('Worldwide')
     st.markdown('#### This is the world tab, here you can analyze the global suicide statistics.')
+    # -- The figures are built together and shown in their places as they are done --
+    world_figures = build_figures([rate_chart('world'), rate_chart('world_age'), rate_chart('world_sex'), treemap()])
     # -- Setup columns
     col1, col2 = st.columns(2)
     with col1:
-        world_line_chart()
-        world_line_age_chart()
+        show_figure(world_figures[0])
+        show_figure(world_figures[1])
     with col2:
-        world_line_gender_chart()
-    treemap()
+        show_figure(world_figures[2])
+    show_treemap(world_figures[3])
+    correlation_panel()
+    view = canonical_params({'tab': tab_selection, 'years': years_param(selected_years),
+                             'metric': st.session_state['treemap_metric']}, VIEW_DEFAULTS)
 
 if tab_selection == 'Continents':
     st.title('Continents')
     st.markdown('#### This is the continent tab, here you can analyze an the continents.')
+    continent_figures = build_figures([rate_chart('region_sex'), rate_chart('region_age'), choropleth_100k()])
     # -- Setup columns
     col1, col2 = st.columns(2)
     with col1:
-        suicides100K_gender()
-        suicides100K_age()
+        show_figure(continent_figures[0])
+        show_figure(continent_figures[1])
     with col2:
-        choropleth_100k()
+        show_figure(continent_figures[2])
+    view = canonical_params({'tab': tab_selection, 'years': years_param(selected_years)}, VIEW_DEFAULTS)
 
 if tab_selection == 'Countries':
     st.title('Countries')
@@ -521,77 +554,119 @@ if tab_selection == 'Countries':
     st.write('Please select a continent first, you can choose multiple for each filter, expect gender and generations.')
     continent = st.multiselect(
         'Select continent',
-        df_pop['Continent'].unique()
+        df_pop['Continent'].unique(),
+        key='continents'
     )
 
     filtered_countries = df_pop[df_pop['Continent'].isin(continent)]['Country'].unique().tolist()
     country = st.multiselect(
         'Select country',
-        filtered_countries
+        filtered_countries,
+        key='countries'
     )
 
-    df_selection = df_pop.query(
-        'Country == @country & Continent == @continent')
+    # -- Compare with peers: the nearest countries by population, economy and suicide rate --
+    with st.expander('Find similar countries'):
+        col1, col2 = st.columns([3, 1])
+        reference = col1.selectbox('Country', sorted(df_pop['Country'].astype(str)), index=None,
+                                   placeholder='Choose a country', key='similar_reference')
+        col2.number_input('Number of countries', min_value=1, max_value=10, value=5, key='similar_count')
+        st.button('Add similar countries', on_click=add_similar_countries, disabled=reference is None,
+                  key='similar_add')
+        if 'similar_peers' in st.session_state:
+            peers_of, peers = st.session_state['similar_peers']
+            st.caption(f'Most similar to {peers_of}: {", ".join(peers)}')
 
     # -- Filters (Gender, Generation) --
-    selected_sex = st.selectbox('Select the gender', ['Both', 'Male', 'Female', 'Unknown'])
-    generation_options = ['All generations'] + list(df_suicides['Generation'].unique())
-    selected_generation = st.selectbox('Select generation', generation_options)
-
-    # -- Gender Logic --
-    if selected_sex == 'Both':
-        suicides_filtered = df_suicides[df_suicides['CountryName'].isin(country)]
-        suicide_chart_title = 'Suicides for both genders'
-    elif selected_sex == 'Male':
-        suicides_filtered = df_suicides[(df_suicides['CountryName'].isin(country)) & (df_suicides['Sex'] == 'Male')]
-        suicide_chart_title = 'Suicides for males'
-    elif selected_sex == 'Female':
-        suicides_filtered = df_suicides[(df_suicides['CountryName'].isin(country)) & (df_suicides['Sex'] == 'Female')]
-        suicide_chart_title = 'Suicides for females'
-    else:
-        suicides_filtered = df_suicides[(df_suicides['CountryName'].isin(country)) & (df_suicides['Sex'] == 'Unknown')]
-        suicide_chart_title = 'Suicides for unknown gender'
-
-    # -- Generation Logic --
-    if selected_generation != 'All generations':
-        suicides_filtered = suicides_filtered[suicides_filtered['Generation'] == selected_generation]
-
-    # -- Aggregating by Year --
-    suicides_filtered = suicides_filtered.groupby(['CountryName', 'Year']).agg({
-        'SuicideCount': 'sum',
-        'CauseSpecificDeathPercentage': 'max',
-        'DeathRatePer100K': 'max',
-        'Population': 'max',
-        'GDP': 'max',
-        'GDPPerCapita': 'max',
-        'GrossNationalIncome': 'max',
-        'GNIPerCapita': 'max',
-        'InflationRate': 'max',
-        'EmploymentPopulationRatio': 'max'
-    }).reset_index()
+    selected_sex = st.selectbox('Select the gender', SEXES, key='sex')
+    selected_generation = st.selectbox('Select generation', GENERATIONS, key='generation')
+    selected_forecast = st.selectbox('Forecast', FORECASTS, key='forecast',
+                                     format_func=lambda model: MODELS.get(model, 'No forecast'))
+    if selected_forecast != 'off' and not show_forecast(data_fingerprint, selected_forecast, selected_years):
+        st.caption('Forecasts are shown when the selected years reach the latest data.')
+
+    view = canonical_params({'tab': tab_selection, 'years': years_param(selected_years), 'continents': continent,
+                             'countries': country, 'sex': selected_sex, 'generation': selected_generation,
+                             'forecast': selected_forecast}, VIEW_DEFAULTS)
+
+    # -- Countries are joined on their CountryId (see utils/countries.py), the fact table answers the gender and
+    # -- generation filters (see utils/facts.py) --
+    data_key = countries_data_key(selected_years, continent, country, selected_sex, selected_generation)
+    country_ids, df_selection, suicides_filtered = session_artifacts().get_or_build(
+        ('countries_view', data_fingerprint, data_key),
+        lambda: countries_view(data_fingerprint, data_key, selected_years, df_pop, df_countries))
+
+    # -- Long line charts are downsampled, the full resolution is only needed to zoom into the details --
+    full_resolution = st.toggle('Show full resolution (for zooming into the line charts)', value=False)
+
+    # -- Everything the Countries-tab charts (and their exports) depend on, see utils/charts.py CHART_PARAMS. The lists
+    # -- are the sorted unique ones of the canonical view, the same view clicked in another order shares its charts --
+    canonical = dict(view_key(view))
+    chart_view = {'years': selected_years, 'continents': canonical.get('continents', ()),
+                  'countries': canonical.get('countries', ()),
+                  'sex': selected_sex, 'generation': selected_generation, 'forecast': selected_forecast,
+                  'full_resolution': full_resolution}
+
+    # -- The charts are built together and shown in their places as they are done --
+    charts = country_charts(chart_view, CHART_PARAMS)
 
     # -- Setup columns
     col1, col2, col3 = st.columns(3)
     with col1:
-        population_line_chart()
-        suicides_chart()
+        country_chart('population', *charts['population'])
+        country_chart('suicides', *charts['suicides'])
     with col2:
-        gdp_line_chart()
-        gni_line_chart()
-        population_percentage()
+        country_chart('gdp_per_capita', *charts['gdp_per_capita'])
+        country_chart('gross_national_income', *charts['gross_national_income'])
+        country_chart('population_percentage', *charts['population_percentage'])
     with col3:
-        suicides_by_gender(country, selected_generation)
-        if len(country) == 1:
-            for selected_country in country:
-                st.subheader(f':bulb: Trivia about {selected_country}:')
-                trivia(selected_country)
-        elif len(country) == 2:
-            for selected_country in country:
-                st.subheader(f':bulb: Trivia about {selected_country}:')
-                trivia(selected_country)
-        else:
+        country_chart('suicides_by_gender', *charts['suicides_by_gender'])
+        if len(country) not in (1, 2):
             st.subheader('Top 3 countries selected for trivia (based on 2022 population):')
-            top_countries = df_selection.nlargest(3, '2022_Population')
-            for index, row in top_countries.iterrows():
-                st.subheader(f':bulb: Trivia about {row["Country"]}:')
-                trivia(row['Country'])
+        for selected_country in trivia_countries(df_selection, country):
+            st.subheader(f':bulb: Trivia about {selected_country}:')
+            trivia(df_selection, selected_country)
+
+    # -- Data behind the charts --
+    st.subheader(':floppy_disk: Export data')
+    table_downloads('population_by_country', df_selection, data_key)
+    table_downloads('suicides_by_country_and_year', suicides_filtered, data_key)
+
+
+# -- Data status of this session and of the server --
+def data_status():
+    status = data_refresher().status()
+    built_at = pd.Timestamp(status['built_at'], unit='s').strftime('%Y-%m-%d %H:%M')
+    lines = [f'Data version `{data_fingerprint}`' + (' (newer version live, rerun to update)'
+                                                     if data_fingerprint != status['version'] else ''),
+             f'Latest version `{status["version"]}`, built {built_at} UTC']
+    if status['pending']:
+        lines.append(f'Building version `{status["pending"]}` in the background')
+    if status['error']:
+        lines.append(f'Last refresh failed: {status["error"]}')
+    lines.append('Active sessions: ' + ', '.join(f'`{version}` {count}' for version, count
+                                                 in status['sessions'].most_common()))
+    with st.sidebar.expander('Data status'):
+        st.caption('  \n'.join(lines))
+
+
+# -- The URL always holds the canonical parameters of the view, so it can be shared as a permalink --
+if view != {name: st.query_params.get_all(name) if name in LIST_PARAMS else st.query_params[name]
+            for name in st.query_params}:
+    st.query_params.from_dict(view)
+
+# -- Memory of the derived artifacts of this session and of all sessions of the server --
+def memory_status():
+    artifacts, metrics = session_artifacts(), memory_metrics()
+    megabytes = 2 ** 20
+    lines = [f'This session: {artifacts.size / megabytes:.1f} MB in {len(artifacts.items)} artifacts, budget '
+             f'{artifacts.budget_bytes / megabytes:.0f} MB, {artifacts.evictions} evicted',
+             f'Server: {metrics["sessions"]} sessions, {metrics["total_bytes"] / megabytes:.1f} MB, '
+             f'{metrics["mean_bytes"] / megabytes:.1f} MB per session (max {metrics["max_bytes"] / megabytes:.1f} MB)']
+    with st.sidebar.expander('Memory'):
+        st.caption('  \n'.join(lines))
+
+
+data_status()
+memory_status()
+data_refresher().revalidate()
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+AGE_GROUPS = {'15-24 years': 'Generation Z', '25-34 years': 'Millennials', '55-74 years': 'Boomers'}
+REGIONS = {0: 'Europe', 1: 'Europe', 2: 'Asia', 3: 'Africa'}
+YEARS = range(2000, 2012)
+
+
+# -- A small suicide table shaped like the ingested one (see utils/ingest.py): a row per country, year, sex and age
+# -- group, the population of the country repeated on every row of a country-year. Country 3 misses two years and a
+# -- few counts are missing --
+@pytest.fixture
+def df_suicides():
+    rng = np.random.default_rng(7)
+    rows = []
+    for country_id, region in REGIONS.items():
+        for year in YEARS:
+            if country_id == 3 and year in (2004, 2005):
+                continue
+            population = float(rng.integers(100_000, 10_000_000))
+            gdp = float(rng.uniform(1e9, 1e12))
+            for sex in ('Female', 'Male'):
+                for age_group, generation in AGE_GROUPS.items():
+                    count = float(rng.integers(1, 500))
+                    rows.append({'RegionName': region, 'CountryId': country_id, 'Year': year, 'Sex': sex,
+                                 'AgeGroup': age_group, 'Generation': generation, 'SuicideCount': count,
+                                 'CauseSpecificDeathPercentage': rng.uniform(0, 5),
+                                 'DeathRatePer100K': count / population * 1e5, 'Population': population,
+                                 'GDP': gdp, 'GDPPerCapita': gdp / population, 'GrossNationalIncome': gdp * 0.9,
+                                 'GNIPerCapita': gdp * 0.9 / population, 'InflationRate': rng.uniform(0, 10),
+                                 'EmploymentPopulationRatio': rng.uniform(40, 70)})
+    df = pd.DataFrame(rows)
+    df.loc[[5, 77, 130], 'SuicideCount'] = np.nan
+    # -- Economic indicators are constant per country and year --
+    economic = ['InflationRate', 'EmploymentPopulationRatio']
+    df[economic] = df.groupby(['CountryId', 'Year'])[economic].transform('first')
+    df['CountryId'] = df['CountryId'].astype('int16')
+    return df
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from utils.correlation import INDICATORS, MIN_PAIRS, build_correlations, build_panel
+
+COUNTRY_NAMES = np.array(['A', 'B', 'C', 'D'])
+
+
+# -- Rate and indicators per country-year as a long frame, the rate counts the population once per country-year --
+@pytest.fixture
+def pairs(df_suicides):
+    usable = df_suicides[df_suicides['SuicideCount'].notna()]
+    grouped = usable.groupby(['CountryId', 'Year'])
+    rate = grouped['SuicideCount'].sum() / grouped['Population'].max() * 1e5
+    indicators = df_suicides.groupby(['CountryId', 'Year'])[list(INDICATORS)].max()
+    regions = df_suicides.groupby('CountryId')['RegionName'].first()
+    result = indicators.assign(Rate=rate).reset_index()
+    result['Region'] = regions.reindex(result['CountryId']).to_numpy()
+    result['Country'] = COUNTRY_NAMES[result['CountryId']]
+    return result
+
+
+# -- Spearman of pandas needs scipy, it is Pearson on the ranks of the pairs without a NaN --
+def pandas_corr(x, y, method):
+    if method == 'spearman':
+        valid = x.notna() & y.notna()
+        x, y = x[valid].rank(), y[valid].rank()
+    return x.corr(y)
+
+
+@pytest.fixture
+def correlations(df_suicides):
+    return build_correlations(df_suicides, COUNTRY_NAMES)
+
+
+def test_panel_holds_the_rate_of_every_country_year(df_suicides, pairs):
+    panel = build_panel(df_suicides)
+    rows = np.searchsorted(panel['country_ids'], pairs['CountryId'])
+    np.testing.assert_allclose(panel['y'][rows, pairs['Year'] - panel['years'][0]], pairs['Rate'])
+    # -- Country 3 has no data in 2004 and 2005 --
+    assert np.isnan(panel['y'][3, [4, 5]]).all()
+
+
+@pytest.mark.parametrize('method', ['pearson', 'spearman'])
+@pytest.mark.parametrize('scope, column', [('World', None), ('Region', 'Region'), ('Country', 'Country')])
+def test_correlations_match_pandas(correlations, pairs, method, scope, column):
+    result = correlations['correlations']
+    result = result[(result['Scope'] == scope) & (result['Method'] == method) & (result['Lag'] == 0)]
+    groups = pairs.groupby(column) if column else [('World', pairs)]
+    for name, group in groups:
+        for indicator in INDICATORS:
+            row = result[(result['Name'] == name) & (result['Indicator'] == indicator)].iloc[0]
+            assert row['n'] == len(group)
+            np.testing.assert_allclose(row['r'], pandas_corr(group[indicator], group['Rate'], method), atol=1e-9)
+
+
+def test_lagged_correlations_pair_the_indicator_of_earlier_years(correlations, pairs):
+    result = correlations['correlations']
+    row = result[(result['Scope'] == 'World') & (result['Method'] == 'pearson') & (result['Lag'] == 2)
+                 & (result['Indicator'] == 'GDPPerCapita')].iloc[0]
+    earlier = pairs.assign(Year=pairs['Year'] + 2)[['CountryId', 'Year', 'GDPPerCapita']]
+    lagged = pairs[['CountryId', 'Year', 'Rate']].merge(earlier, on=['CountryId', 'Year'])
+    assert row['n'] == len(lagged)
+    np.testing.assert_allclose(row['r'], lagged['GDPPerCapita'].corr(lagged['Rate']), atol=1e-9)
+
+
+def test_rolling_correlations_match_pandas(correlations, pairs):
+    rolling = correlations['rolling']
+    rolling = rolling[(rolling['Scope'] == 'Country') & (rolling['Indicator'] == 'InflationRate')]
+    years = np.arange(pairs['Year'].min(), pairs['Year'].max() + 1)
+    window = len(years) - rolling['Year'].nunique() + 1
+    for name, group in pairs.groupby('Country'):
+        group = group.set_index('Year').reindex(years)
+        expected = group['InflationRate'].rolling(window, min_periods=MIN_PAIRS).corr(group['Rate'])
+        result = rolling[rolling['Name'] == name].set_index('Year')['r']
+        np.testing.assert_allclose(result.to_numpy(), expected.loc[result.index].to_numpy(), atol=1e-9)
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from utils import config, disk_cache as cache
+from utils.disk_cache import disk_cache
+
+calls = []
+
+
+@disk_cache('frame')
+def cached_frame(fingerprint, scale, _backend=None):
+    calls.append((fingerprint, scale))
+    return pd.DataFrame({'Year': np.arange(2000, 2005), 'Value': np.arange(5) * scale})
+
+
+@disk_cache('frames')
+def cached_frames(fingerprint):
+    calls.append(fingerprint)
+    return {'counts': pd.DataFrame({'Value': [1.0, np.nan]}), 'names': pd.DataFrame({'Name': ['a', 'b']})}
+
+
+@disk_cache('figure')
+def cached_figure(fingerprint):
+    calls.append(fingerprint)
+    return go.Figure(go.Scatter(x=[1, 2, 3], y=[4, 5, 6]), layout={'title': {'text': fingerprint}})
+
+
+# -- A fresh cache file per test --
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'DISK_CACHE_DIR', str(tmp_path))
+    cache._reset()
+    calls.clear()
+    yield tmp_path
+    cache._reset()
+
+
+def test_frame_round_trips():
+    expected = cached_frame('a', 2)
+    pd.testing.assert_frame_equal(cached_frame('a', 2), expected)
+    assert calls == [('a', 2)]
+
+
+def test_frames_round_trip():
+    expected = cached_frames('a')
+    result = cached_frames('a')
+    assert list(result) == list(expected)
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(result[name], df)
+    assert calls == ['a']
+
+
+def test_figure_round_trips():
+    expected = cached_figure('a')
+    assert cached_figure('a').to_dict() == expected.to_dict()
+    assert calls == ['a']
+
+
+def test_arguments_are_part_of_the_key():
+    cached_frame('a', 1)
+    cached_frame('a', 2)
+    cached_frame('b', 1)
+    cached_frame('a', scale=1)
+    assert calls == [('a', 1), ('a', 2), ('b', 1)]
+
+
+def test_underscore_arguments_are_not_part_of_the_key():
+    cached_frame('a', 1, _backend=object())
+    cached_frame('a', 1, _backend=object())
+    assert calls == [('a', 1)]
+
+
+def test_cache_version_changes_the_key(monkeypatch):
+    key = cache.cache_key(cached_frame.__wrapped__, ('a', 1), {})
+    cached_frame('a', 1)
+    monkeypatch.setattr(cache, 'CACHE_VERSION', cache.CACHE_VERSION + 1)
+    assert cache.cache_key(cached_frame.__wrapped__, ('a', 1), {}) != key
+    cached_frame('a', 1)
+    assert calls == [('a', 1), ('a', 1)]
+
+
+def test_payload_with_a_wrong_checksum_is_rebuilt():
+    expected = cached_frame('a', 1)
+    cache.connection().execute('UPDATE entries SET payload = ?', (b'garbage',))
+    pd.testing.assert_frame_equal(cached_frame('a', 1), expected)
+    assert calls == [('a', 1), ('a', 1)]
+
+
+def test_payload_that_can_not_be_decoded_is_rebuilt():
+    expected = cached_frame('a', 1)
+    cache.connection().execute('UPDATE entries SET payload = ?, checksum = ?', (b'garbage', zlib.crc32(b'garbage')))
+    pd.testing.assert_frame_equal(cached_frame('a', 1), expected)
+    assert calls == [('a', 1), ('a', 1)]
+
+
+def test_corrupt_cache_file_is_thrown_away(cache_dir):
+    (cache_dir / 'cache.sqlite3').write_bytes(b'not a database' * 100)
+    cached_frame('a', 1)
+    cache._local.connection.close()
+    cache._local.connection = None
+    cached_frame('a', 1)
+    assert calls == [('a', 1)]
+    assert sqlite3.connect(cache.cache_path()).execute('SELECT COUNT(*) FROM entries').fetchone() == (1,)
+
+
+def test_least_recently_used_entries_are_evicted_first(monkeypatch):
+    monkeypatch.setattr(cache, 'ACCESS_INTERVAL', 0)
+    for scale in (1, 2, 3):
+        cached_frame('a', scale)
+    cached_frame('a', 1)
+    db = cache.connection()
+    (size,) = db.execute('SELECT MAX(size) FROM entries').fetchone()
+    cache.evict(db, 2 * size)
+    cached_frame('a', 1)
+    cached_frame('a', 3)
+    cached_frame('a', 2)
+    assert calls == [('a', 1), ('a', 2), ('a', 3), ('a', 2)]
+
+
+# -- A write transaction held by another connection, like a second server process writing to the cache. Reads still
+# -- hit, the write is skipped after a short wait and nothing is thrown away --
+def test_busy_cache_skips_the_write_and_keeps_the_file(monkeypatch):
+    expected = cached_frame('a', 1)
+    monkeypatch.setattr(cache, 'ACCESS_INTERVAL', 0)
+    db = sqlite3.connect(cache.cache_path(), isolation_level=None)
+    db.execute('BEGIN IMMEDIATE')
+    started = time.monotonic()
+    pd.testing.assert_frame_equal(cached_frame('a', 1), expected)
+    cached_frame('a', 2)
+    assert time.monotonic() - started < 2 * cache.BUSY_TIMEOUT + 1
+    db.execute('ROLLBACK')
+    db.close()
+    assert os.path.exists(cache.cache_path())
+    cached_frame('a', 1)
+    cached_frame('a', 2)
+    assert calls == [('a', 1), ('a', 2), ('a', 2)]
+
+
+def test_recent_hits_do_not_write():
+    cached_frame('a', 1)
+    statements = []
+    cache.connection().set_trace_callback(statements.append)
+    cached_frame('a', 1)
+    cache.connection().set_trace_callback(None)
+    assert not [statement for statement in statements if not statement.startswith('SELECT')]
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.downsample import downsample_frame, lttb, minmax_decimate
+
+
+# -- Largest triangle three buckets as written in the thesis, one point at a time --
+def reference_lttb(x, y, threshold):
+    n = len(x)
+    edges = [int(edge) for edge in np.linspace(1, n - 1, threshold - 1)]
+    kept, previous = [0], 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = sum(x[end:next_end]) / (next_end - end) if next_end > end else x[-1]
+        next_y = sum(y[end:next_end]) / (next_end - end) if next_end > end else y[-1]
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            area = abs((x[previous] - next_x) * (y[index] - y[previous])
+                       - (x[previous] - x[index]) * (next_y - y[previous]))
+            if area > best_area:
+                best, best_area = index, area
+        kept.append(best)
+        previous = best
+    return kept + [n - 1]
+
+
+@pytest.mark.parametrize('n, threshold', [(100, 10), (1000, 37), (57, 56), (33, 3)])
+def test_lttb_matches_the_reference(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.uniform(0, 100, n))
+    y = np.cumsum(rng.normal(0, 1, n))
+    np.testing.assert_array_equal(lttb(x, y, threshold), reference_lttb(list(x), list(y), threshold))
+
+
+def test_lttb_keeps_short_series():
+    np.testing.assert_array_equal(lttb(np.arange(5), np.arange(5), 10), np.arange(5))
+
+
+def test_minmax_keeps_the_extremes_of_every_bucket():
+    rng = np.random.default_rng(1)
+    y = rng.normal(0, 1, 200)
+    indices = minmax_decimate(np.arange(200), y, 20)
+    for start, end in zip(range(0, 200, 20), range(20, 220, 20)):
+        bucket = indices[(indices >= start) & (indices < end)]
+        assert set(bucket) == {start + int(np.argmin(y[start:end])), start + int(np.argmax(y[start:end]))}
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_downsample_frame_keeps_the_budget_and_the_ends_of_every_trace(method):
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({'Country': np.repeat(['A', 'B', 'C'], 400), 'Year': np.tile(np.arange(400), 3),
+                       'Value': rng.normal(0, 1, 1200)})
+    result = downsample_frame(df, 'Year', 'Value', 'Country', 300, method)
+    assert len(result) <= 300
+    for _, trace in result.groupby('Country'):
+        assert trace['Year'].is_monotonic_increasing
+        if method == 'lttb':
+            assert trace['Year'].iloc[[0, -1]].tolist() == [0, 399]
+        # -- The kept rows are rows of the trace, unchanged --
+        pd.testing.assert_frame_equal(trace, df.loc[trace.index])
+
+
+# -- 200 countries of 33 years against a budget of 2000 points, more traces than budget // 20 --
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+@pytest.mark.parametrize('countries, budget', [(200, 2000), (200, 450), (300, 200)])
+def test_downsample_frame_keeps_the_budget_with_many_traces(method, countries, budget):
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'Country': np.repeat(np.arange(countries), 33),
+                       'Year': np.tile(np.arange(1990, 2023), countries), 'Value': rng.normal(0, 1, countries * 33)})
+    result = downsample_frame(df, 'Year', 'Value', 'Country', budget, method)
+    assert len(result) <= budget
+    assert result['Country'].nunique() == min(countries, budget)
+    pd.testing.assert_frame_equal(result, df.loc[result.index])
+
+
+def test_short_traces_leave_their_share_to_the_long_ones():
+    df = pd.DataFrame({'Country': ['A'] * 5 + ['B'] * 500, 'Year': list(range(5)) + list(range(500)),
+                       'Value': np.arange(505.0)})
+    result = downsample_frame(df, 'Year', 'Value', 'Country', 100)
+    assert result['Country'].value_counts().to_dict() == {'A': 5, 'B': 95}
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.facts import (ALL_GENERATIONS, ALL_SEXES, ECONOMIC_COLUMNS, build_country_facts, lookup_country_facts,
+                         merge_country_facts)
+from utils.rollups import map_partitions, partition_frame
+
+
+# -- The rows of a (sex, generation) filter, 'Both' and 'All generations' keep every row --
+def filtered(df, sex, generation):
+    mask = np.ones(len(df), dtype=bool)
+    if sex != ALL_SEXES:
+        mask &= df['Sex'] == sex
+    if generation != ALL_GENERATIONS:
+        mask &= df['Generation'] == generation
+    return df[mask]
+
+
+@pytest.mark.parametrize('sex', [ALL_SEXES, 'Female', 'Male'])
+@pytest.mark.parametrize('generation', [ALL_GENERATIONS, 'Generation Z', 'Boomers'])
+def test_counts_match_a_groupby_of_the_filtered_rows(df_suicides, sex, generation):
+    counts = build_country_facts(df_suicides)['counts'].xs((sex, generation), level=['Sex', 'Generation'])
+    expected = (filtered(df_suicides, sex, generation).groupby(['CountryId', 'Year'])
+                .agg({'SuicideCount': 'sum', 'Population': 'max', 'DeathRatePer100K': 'max'}))
+    pd.testing.assert_frame_equal(counts[expected.columns], expected, check_index_type=False)
+
+
+def test_economics_are_one_row_per_country_year(df_suicides):
+    economics = build_country_facts(df_suicides)['economics']
+    expected = df_suicides.groupby(['CountryId', 'Year'])[ECONOMIC_COLUMNS].first()
+    pd.testing.assert_frame_equal(economics, expected, check_index_type=False)
+
+
+@pytest.mark.parametrize('partition_by', ['Year', 'CountryId'])
+def test_facts_built_per_partition_merge_to_the_whole(df_suicides, partition_by):
+    whole = build_country_facts(df_suicides)
+    assert len(partition_frame(df_suicides, partition_by, 5)) > 1
+    merged = merge_country_facts(map_partitions(build_country_facts, df_suicides, partition_by, workers=1,
+                                                partitions=5))
+    for name in whole:
+        pd.testing.assert_frame_equal(merged[name], whole[name])
+
+
+def test_lookup_selects_the_countries(df_suicides):
+    facts = build_country_facts(df_suicides)
+    names = np.array(['A', 'B', 'C', 'D'])
+    result = lookup_country_facts(facts, 'Male', ALL_GENERATIONS, [1, 3], names)
+    assert set(result['CountryName']) == {'B', 'D'}
+    expected = filtered(df_suicides[df_suicides['CountryId'].isin([1, 3])], 'Male', ALL_GENERATIONS)
+    assert result['SuicideCount'].sum() == expected['SuicideCount'].sum()
+    assert len(result) == expected.groupby(['CountryId', 'Year']).ngroups
+
+
+# -- Rows without a sex or generation are in the totals of the filters that don't select on it --
+@pytest.mark.parametrize('dtype', ['object', 'category'])
+def test_rows_without_a_sex_or_generation_count_in_the_totals(df_suicides, dtype):
+    df = df_suicides.copy()
+    df.loc[[0, 40, 41], 'Sex'] = np.nan
+    df.loc[[7, 41, 90], 'Generation'] = np.nan
+    df[['Sex', 'Generation']] = df[['Sex', 'Generation']].astype(dtype)
+    counts = build_country_facts(df)['counts']
+    assert counts.index.get_level_values('Sex').notna().all()
+    assert counts.index.get_level_values('Generation').notna().all()
+    for sex, generation in [(ALL_SEXES, ALL_GENERATIONS), ('Male', ALL_GENERATIONS), (ALL_SEXES, 'Boomers'),
+                            ('Female', 'Millennials')]:
+        expected = filtered(df, sex, generation).groupby(['CountryId', 'Year'])['SuicideCount'].sum()
+        result = counts.xs((sex, generation), level=['Sex', 'Generation'])['SuicideCount']
+        pd.testing.assert_series_equal(result, expected, check_index_type=False)
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.forecast import (HOLT_ALPHAS, HOLT_BETAS, exponential_forecast, forecast_frame, holt_filter, holt_forecast,
+                            interval_z, linear_forecast)
+
+TIMES = np.array([1990, 1991, 1992, 1994, 1995, 1998, 1999, 2000, 2001, 2003], dtype=float)
+HORIZON = np.arange(2004, 2009, dtype=float)
+
+
+# -- Series with gaps, noise, a straight line and one with too few observations --
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(11)
+    values = 100 + 5 * (TIMES - TIMES[0])[None, :] + rng.normal(0, 8, (6, len(TIMES)))
+    values[1, [2, 5]] = np.nan
+    values[2] = 50 + 2.5 * (TIMES - TIMES[0])
+    values[3, 2:] = np.nan
+    values[4] = 200 * 1.03 ** (TIMES - TIMES[0])
+    return values
+
+
+def observed(row):
+    valid = np.isfinite(row)
+    return TIMES[valid], row[valid]
+
+
+# -- Least squares line and the prediction interval of a new observation, one series at a time --
+def reference_linear(row, z):
+    t, y = observed(row)
+    if len(t) < 3:
+        return np.full((3, len(HORIZON)), np.nan)
+    slope, intercept = np.polyfit(t, y, 1)
+    sigma = np.sqrt(((y - (intercept + slope * t)) ** 2).sum() / (len(t) - 2))
+    mean = intercept + slope * HORIZON
+    spread = z * sigma * np.sqrt(1 + 1 / len(t) + (HORIZON - t.mean()) ** 2 / ((t - t.mean()) ** 2).sum())
+    return np.array([mean, mean - spread, mean + spread])
+
+
+# -- Holt's linear trend on the observations of one series, a step of several years advances the trend that often --
+def reference_holt(row, alpha, beta):
+    t, y = observed(row)
+    level, trend, sse, errors = y[0], 0.0, 0.0, 0
+    if len(t) > 1:
+        trend, level = (y[1] - y[0]) / (t[1] - t[0]), y[1]
+    for index in range(2, len(t)):
+        step = t[index] - t[index - 1]
+        error = y[index] - (level + step * trend)
+        sse, errors = sse + error * error / step, errors + 1
+        level = level + step * trend + alpha * error
+        trend = trend + alpha * beta * error / step
+    return level, trend, sse, errors
+
+
+def test_linear_forecast_matches_polyfit(series):
+    z = interval_z(95)
+    mean, lower, upper = linear_forecast(series, TIMES, np.tile(HORIZON, (len(series), 1)), z)
+    for row, values in enumerate(series):
+        np.testing.assert_allclose(np.array([mean[row], lower[row], upper[row]]), reference_linear(values, z))
+
+
+def test_exponential_forecast_continues_a_constant_growth(series):
+    mean, _, _ = exponential_forecast(series[[4]], TIMES, HORIZON[None, :], interval_z(95))
+    np.testing.assert_allclose(mean[0], 200 * 1.03 ** (HORIZON - TIMES[0]))
+
+
+def test_holt_filter_matches_a_loop(series):
+    alpha, beta = np.array([[0.3], [0.8]]), np.array([[0.1], [0.5]])
+    level, trend, sse, errors = holt_filter(series, TIMES, alpha, beta)
+    for pair in range(2):
+        for row, values in enumerate(series):
+            expected = reference_holt(values, alpha[pair, 0], beta[pair, 0])
+            np.testing.assert_allclose([level[pair, row], trend[pair, row], sse[pair, row], errors[row]], expected)
+
+
+def test_holt_forecast_uses_the_pair_with_the_smallest_error(series):
+    mean, lower, upper = holt_forecast(series, TIMES, np.tile(HORIZON, (len(series), 1)), interval_z(95))
+    for row, values in enumerate(series):
+        if row == 3:
+            assert np.isnan(mean[row]).all()
+            continue
+        fits = [reference_holt(values, alpha, beta) for beta in HOLT_BETAS for alpha in HOLT_ALPHAS]
+        level, trend, _, _ = min(fits, key=lambda fit: fit[2])
+        np.testing.assert_allclose(mean[row], level + (HORIZON - observed(values)[0][-1]) * trend)
+        assert (lower[row] <= mean[row]).all() and (mean[row] <= upper[row]).all()
+
+
+def test_straight_lines_are_continued_exactly(series):
+    for forecast in (linear_forecast, holt_forecast):
+        mean, lower, upper = forecast(series[[2]], TIMES, HORIZON[None, :], interval_z(95))
+        np.testing.assert_allclose(mean[0], 50 + 2.5 * (HORIZON - TIMES[0]))
+        np.testing.assert_allclose(upper[0] - lower[0], 0, atol=1e-6)
+
+
+def test_forecast_frame_starts_at_the_last_observation(series):
+    keys = pd.DataFrame({'CountryId': np.arange(len(series))})
+    frame = forecast_frame(keys, series, TIMES, horizon=5, confidence=90)
+    assert set(frame['Model']) == {'linear', 'exponential', 'holt'}
+    # -- The series with too few observations has no forecast --
+    assert 3 not in set(frame['CountryId'])
+    first = frame.groupby(['Model', 'CountryId']).first()
+    for (_, country_id), row in first.iterrows():
+        last_time, last_value = observed(series[country_id])[0][-1], observed(series[country_id])[1][-1]
+        assert row['Year'] == last_time and row['Forecast'] == row['Lower'] == row['Upper'] == last_value
+    assert (frame['Lower'] >= 0).all()
+    assert frame.groupby(['Model', 'CountryId']).size().eq(6).all()
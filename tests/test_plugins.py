@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from indicators.homicides import HOMICIDES
+from utils import config, disk_cache
+from utils.ingest import ingest_plugin
+from utils.plugins import build_plugin_arrays, build_plugin_cubes, plugin_figure, register_plugin
+from utils.rates import window_series
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COUNTRIES = {'Albania': ('ALB', 'Europe'), 'Germany': ('DEU', 'Europe'), 'Japan': ('JPN', 'Asia'),
+             'Atlantis': ('ATL', 'Europe')}
+
+
+# -- A small homicide file shaped like indicators/homicides.py declares it: a row per country, year and sex with the
+# -- population of the country, one country without a match in the population data and a negative count --
+@pytest.fixture
+def homicides_file(tmp_path, monkeypatch):
+    rng = np.random.default_rng(11)
+    rows = []
+    for country, (code, region) in COUNTRIES.items():
+        for year in range(2005, 2015):
+            population = float(rng.integers(1_000_000, 100_000_000))
+            for sex in ('Female', 'Male'):
+                rows.append({'RegionName': region, 'CountryName': country, 'CountryCode': code, 'Year': year,
+                             'Sex': sex, 'HomicideCount': float(rng.integers(0, 2000)), 'Population': population})
+    df = pd.DataFrame(rows)
+    df.loc[3, 'HomicideCount'] = -5
+    path = tmp_path / 'homicides.csv'
+    df.to_csv(path, index=False)
+
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setitem(HOMICIDES, 'file', str(path))
+    monkeypatch.setattr(config, 'DISK_CACHE_DIR', str(tmp_path / 'cache'))
+    disk_cache._reset()
+    yield df
+    disk_cache._reset()
+
+
+def test_homicides_are_ingested_with_their_quality_report(homicides_file):
+    _, df, df_countries, df_unmatched, df_quality = ingest_plugin.__wrapped__('homicides', 'test')
+    assert len(df) == len(homicides_file)
+    assert np.isnan(df.loc[3, 'HomicideCount'])
+    assert set(df_quality['Check']) >= {'Negative homicide count', 'Unmatched country names'}
+    assert list(df_unmatched['Name']) == ['Atlantis']
+
+
+def test_homicide_rates_match_pandas(homicides_file):
+    df = ingest_plugin.__wrapped__('homicides', 'test')[1]
+    cubes = build_plugin_cubes(HOMICIDES, build_plugin_arrays(HOMICIDES, df))
+    result = window_series(cubes['world'], 2005, 2014)
+
+    usable = homicides_file[homicides_file['HomicideCount'] >= 0]
+    population = usable.groupby(['CountryName', 'Year'])['Population'].max().groupby('Year').sum()
+    expected = usable.groupby('Year')['HomicideCount'].sum() / population * 1e5
+    np.testing.assert_allclose(result['HomicideRatePer100K'], expected.to_numpy())
+
+
+def test_homicide_charts_are_built(homicides_file):
+    df = ingest_plugin.__wrapped__('homicides', 'test')[1]
+    cubes = build_plugin_cubes(HOMICIDES, build_plugin_arrays(HOMICIDES, df))
+    for name, chart in HOMICIDES['charts'].items():
+        fig = plugin_figure(HOMICIDES, name, window_series(cubes[chart['rollup']], 2005, 2014), (2005, 2014))
+        assert fig.data and all(len(trace.y) for trace in fig.data)
+
+
+def test_indicators_page_shows_the_homicide_charts(homicides_file, monkeypatch):
+    monkeypatch.setattr(config, 'PLUGINS', 'indicators.homicides')
+    # -- The navbar links need the pages of the app, the test starts at its entry point --
+    at = AppTest.from_file(os.path.join(ROOT, 'App.py'), default_timeout=60).run()
+    at.switch_page('pages/Indicators.py').run()
+    assert not at.exception
+    assert len(at.get('plotly_chart')) == len(HOMICIDES['charts'])
+
+
+# -- A mean measure (e.g. life expectancy) averages the values of the rows, weighted by the weight column --
+def test_mean_measure_is_the_weighted_mean_of_the_rows():
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame({'RegionName': rng.choice(['Asia', 'Europe'], 200), 'Year': rng.integers(2000, 2005, 200),
+                       'LifeExpectancy': rng.uniform(50, 85, 200), 'Population': rng.uniform(1e5, 1e8, 200)})
+    df.loc[[4, 9], 'LifeExpectancy'] = np.nan
+    plugin = {'measure': dict(value='LifeExpectancy', weight='Population', rate='LifeExpectancy',
+                              title='Life expectancy'),
+              'rollups': {'region': dict(by=['RegionName', 'Year'])}}
+    result = window_series(build_plugin_cubes(plugin, build_plugin_arrays(plugin, df))['region'], 2000, 2004)
+
+    valid = df.dropna()
+    expected = valid.groupby(['RegionName', 'Year']).apply(
+        lambda group: np.average(group['LifeExpectancy'], weights=group['Population']))
+    np.testing.assert_allclose(result['LifeExpectancy'], expected.to_numpy())
+
+
+def test_measure_keys_are_checked():
+    with pytest.raises(ValueError, match='does not declare denominator'):
+        register_plugin('broken', **{**HOMICIDES, 'measure': dict(numerator='HomicideCount', rate='Rate', scale=1,
+                                                                   title='Rate')})
+    with pytest.raises(ValueError, match='can not declare per'):
+        register_plugin('broken', **{**HOMICIDES, 'measure': dict(value='HomicideCount', rate='Rate', title='Rate',
+                                                                   per=('CountryId', 'Year'))})
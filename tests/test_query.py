@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import config
+from utils.query import PandasBackend, create_backend
+from utils.rollups import build_rollups
+from utils.suicides import SUICIDES
+
+WHERE = [
+    None,
+    [('Sex', '!=', 'Female')],
+    [('RegionName', 'in', ['Europe', 'Africa']), ('AgeGroup', 'not in', ['15-24 years'])],
+    [('CountryId', '==', np.int16(2))],
+    [('RegionName', 'in', [])],
+]
+
+
+def test_pandas_aggregate_matches_a_groupby(df_suicides):
+    backend = PandasBackend({'suicides': df_suicides})
+    result = backend.aggregate('suicides', ['RegionName', 'Year'], 'SuicideCount', [('Sex', '==', 'Male')])
+    expected = (df_suicides[df_suicides['Sex'] == 'Male'].groupby(['RegionName', 'Year'])['SuicideCount'].sum()
+                .reset_index())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_unsupported_operators_are_rejected(df_suicides):
+    with pytest.raises(ValueError, match='Unsupported operator'):
+        PandasBackend({'suicides': df_suicides}).aggregate('suicides', ['Year'], 'SuicideCount', [('Year', '>', 1)])
+
+
+# -- DuckDB results must match the pandas reference exactly: values, order and dtypes, over the frames and over the
+# -- Parquet files --
+@pytest.fixture(params=['frames', 'parquet'])
+def backends(request, df_suicides, tmp_path, monkeypatch):
+    pytest.importorskip('duckdb')
+    monkeypatch.setattr(config, 'DUCKDB_PARQUET_DIR', str(tmp_path) if request.param == 'parquet' else '')
+    tables = {'suicides': df_suicides}
+    return create_backend(tables, 'test', 'pandas'), create_backend(tables, 'test', 'duckdb')
+
+
+@pytest.mark.parametrize('where', WHERE)
+@pytest.mark.parametrize('by, values', [
+    (['Year'], 'DeathRatePer100K'),
+    (['RegionName', 'Year', 'Sex'], 'SuicideCount'),
+    (['CountryId', 'AgeGroup'], ['SuicideCount', 'Population']),
+])
+def test_duckdb_aggregate_matches_pandas(backends, by, values, where):
+    pandas_backend, duckdb_backend = backends
+    pd.testing.assert_frame_equal(duckdb_backend.aggregate('suicides', by, values, where),
+                                  pandas_backend.aggregate('suicides', by, values, where), check_exact=True)
+
+
+@pytest.mark.parametrize('where', WHERE)
+def test_duckdb_select_matches_pandas(backends, where):
+    pandas_backend, duckdb_backend = backends
+    columns = ['CountryId', 'Year', 'Sex', 'SuicideCount']
+    pd.testing.assert_frame_equal(duckdb_backend.select('suicides', columns, where),
+                                  pandas_backend.select('suicides', columns, where), check_exact=True)
+
+
+def test_duckdb_rollups_match_pandas(backends):
+    pandas_backend, duckdb_backend = backends
+    expected = build_rollups(pandas_backend, 'suicides', SUICIDES['rollups'], workers=1)
+    result = build_rollups(duckdb_backend, 'suicides', SUICIDES['rollups'])
+    for name in SUICIDES['rollups']:
+        pd.testing.assert_frame_equal(result[name], expected[name], check_exact=True)
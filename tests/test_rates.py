@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.quality import clean_suicides
+from utils.rates import (build_rate_arrays, build_year_cube, weighted_rates, window_breakdown, window_series,
+                         window_totals)
+
+
+# -- Suicides per 100K of a groupby: the usable rows, the population counted once per country-year of a group --
+def expected_rates(df, by, where=None):
+    df = df[df['SuicideCount'].notna() & (df['Population'] > 0)]
+    if where is not None:
+        df = df[where(df)]
+    per_country_year = (df.groupby(list(dict.fromkeys([*by, 'CountryId', 'Year'])))
+                        .agg(SuicideCount=('SuicideCount', 'sum'), Population=('Population', 'max')))
+    result = per_country_year.groupby(level=list(range(len(by)))).sum().reset_index()
+    result['DeathRatePer100K'] = result['SuicideCount'] / result['Population'] * 1e5
+    return result
+
+
+@pytest.mark.parametrize('by', [['Year'], ['Year', 'Sex'], ['RegionName', 'Year', 'AgeGroup'], ['CountryId', 'Year'],
+                                ['Sex', 'Generation']])
+def test_weighted_rates_match_a_groupby(df_suicides, by):
+    result = weighted_rates(build_rate_arrays(df_suicides), by)
+    pd.testing.assert_frame_equal(result, expected_rates(df_suicides, by), check_dtype=False)
+
+
+def test_weighted_rates_with_filters(df_suicides):
+    result = weighted_rates(build_rate_arrays(df_suicides), ['RegionName', 'Year'],
+                            where=[('Sex', '==', 'Male'), ('AgeGroup', 'not in', ['55-74 years'])])
+    expected = expected_rates(df_suicides, ['RegionName', 'Year'],
+                              lambda df: (df['Sex'] == 'Male') & (df['AgeGroup'] != '55-74 years'))
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+# -- The rates of the sexes add up to the rate of the country, the population is the same for both --
+def test_rates_of_the_sexes_add_up(df_suicides):
+    arrays = build_rate_arrays(df_suicides)
+    by_sex = weighted_rates(arrays, ['CountryId', 'Year', 'Sex']).groupby(['CountryId', 'Year'])['DeathRatePer100K']
+    total = weighted_rates(arrays, ['CountryId', 'Year']).set_index(['CountryId', 'Year'])['DeathRatePer100K']
+    np.testing.assert_allclose(by_sex.sum().to_numpy(), total.to_numpy())
+
+
+# -- Without `per` every row has a denominator of its own (a dataset with the population of every group) --
+def test_row_denominators_are_summed(df_suicides):
+    result = weighted_rates(build_rate_arrays(df_suicides, per=None), ['Year'])
+    usable = df_suicides[df_suicides['SuicideCount'].notna()]
+    expected = usable.groupby('Year')[['SuicideCount', 'Population']].sum()
+    np.testing.assert_allclose(result['Population'], expected['Population'])
+    np.testing.assert_allclose(result['DeathRatePer100K'], expected['SuicideCount'] / expected['Population'] * 1e5)
+
+
+def test_ingestion_fixes_a_population_that_differs_within_a_country_year():
+    df = pd.DataFrame({'RegionName': 'Europe', 'CountryName': ['A', 'A', 'A', 'B'], 'Year': [2000, 2000, 2001, 2000],
+                       'SuicideCount': 10.0, 'DeathRatePer100K': 1.0, 'Population': [1e6, 5e5, 1e6, 1e6]})
+    cleaned, issues = clean_suicides(df)
+    assert cleaned['Population'].tolist() == [1e6, 1e6, 1e6, 1e6]
+    fixed = [issue for issue in issues if issue['Check'] == 'Population differs within a country-year']
+    assert len(fixed) == 1 and fixed[0]['Rows'] == 2 and fixed[0]['Action'] == 'fixed'
+
+
+# -- Totals of a window of years: every row counts in TOTAL, the usable rows in the rate --
+def expected_window(df, by, start, end):
+    df = df[df['Year'].between(start, end)]
+    usable = df[df['SuicideCount'].notna() & (df['Population'] > 0)]
+    total = df.groupby(by)['SuicideCount'].sum().rename('Total').reset_index()
+    return total.merge(expected_rates(usable, by), on=by, how='left')
+
+
+@pytest.mark.parametrize('by', [['Sex'], ['RegionName', 'AgeGroup'], ['CountryId', 'Generation', 'Sex']])
+@pytest.mark.parametrize('years', [(2000, 2011), (2003, 2006), (2005, 2005), (1990, 2002)])
+def test_window_totals_match_a_groupby(df_suicides, by, years):
+    cube = build_year_cube(build_rate_arrays(df_suicides), by)
+    result = window_totals(cube, *years)
+    expected = expected_window(df_suicides, by, *years)
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+
+
+def test_window_series_is_the_yearly_rate(df_suicides):
+    cube = build_year_cube(build_rate_arrays(df_suicides), ['RegionName'], where=[('Sex', '==', 'Female')])
+    result = window_series(cube, 2002, 2008)
+    female = df_suicides[(df_suicides['Sex'] == 'Female') & df_suicides['Year'].between(2002, 2008)]
+    expected = expected_rates(female, ['RegionName', 'Year'])
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+
+
+def test_window_breakdown_sums_the_selected_groups(df_suicides):
+    cube = build_year_cube(build_rate_arrays(df_suicides), ['CountryId', 'Generation', 'Sex'])
+    result = window_breakdown(cube, 2001, 2009, 'Sex', {'CountryId': [0, 3], 'Generation': ['Millennials']})
+    selected = df_suicides[df_suicides['CountryId'].isin([0, 3]) & (df_suicides['Generation'] == 'Millennials')
+                           & df_suicides['Year'].between(2001, 2009)]
+    expected = selected.groupby('Sex')['SuicideCount'].sum()
+    np.testing.assert_allclose(result.reindex(expected.index).to_numpy(), expected.to_numpy())
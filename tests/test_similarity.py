@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.facts import build_country_facts
+from utils.rates import build_rate_arrays, weighted_rates
+from utils.similarity import POPULATION_COLUMNS, build_country_features, build_similarity_index, nearest_countries
+
+
+# -- Population table of the countries of df_suicides and two countries without suicide data --
+@pytest.fixture
+def df_pop():
+    rng = np.random.default_rng(3)
+    countries = 6
+    df = pd.DataFrame(rng.uniform(1e5, 1e8, (countries, len(POPULATION_COLUMNS))), columns=POPULATION_COLUMNS)
+    df['CountryId'] = np.arange(countries)
+    df['Area'] = rng.uniform(1e3, 1e6, countries)
+    df['Density'] = df['2022_Population'] / df['Area']
+    df['Growth_Rate'] = rng.uniform(0.9, 1.1, countries)
+    return df
+
+
+@pytest.fixture
+def index(df_pop, df_suicides):
+    features = build_country_features(df_pop, weighted_rates(build_rate_arrays(df_suicides), ['CountryId', 'Year']),
+                                      build_country_facts(df_suicides)['economics'])
+    return build_similarity_index(features)
+
+
+def test_features_hold_the_weighted_rate_per_year(df_pop, df_suicides):
+    rates = weighted_rates(build_rate_arrays(df_suicides), ['CountryId', 'Year'])
+    features = build_country_features(df_pop, rates, build_country_facts(df_suicides)['economics'])
+    assert list(features.index) == list(df_pop['CountryId'])
+    expected = rates.pivot(index='CountryId', columns='Year', values='DeathRatePer100K')
+    np.testing.assert_allclose(features['suicide_rate'].loc[expected.index].to_numpy(), expected.to_numpy())
+    # -- Countries without suicide data have no rates --
+    assert features.loc[[4, 5], 'suicide_rate'].isna().all().all()
+
+
+def test_vectors_are_finite_with_their_norms(index):
+    assert np.isfinite(index['vectors']).all()
+    np.testing.assert_allclose(index['norms'], (index['vectors'] ** 2).sum(axis=1))
+
+
+@pytest.mark.parametrize('k', [1, 3, 5, 10])
+def test_nearest_countries_match_a_brute_force_search(index, k):
+    vectors = index['vectors']
+    for position, country_id in enumerate(index['ids']):
+        distances = np.linalg.norm(vectors - vectors[position], axis=1)
+        distances[position] = np.inf
+        order = np.argsort(distances, kind='stable')[:min(k, len(vectors) - 1)]
+        result = nearest_countries(index, country_id, k)
+        np.testing.assert_array_equal(result.index.to_numpy(), index['ids'][order])
+        np.testing.assert_allclose(result.to_numpy(), distances[order], atol=1e-9)
+
+
+def test_unknown_country_has_no_neighbours(index):
+    assert nearest_countries(index, 99, 3).empty
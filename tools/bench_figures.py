@@ -0,0 +1,101 @@
+"""Microbenchmark of the figure construction, plotly express (+ update_layout) vs. the figure factory, and of the
+Countries-tab charts of utils/charts.py.
+
+    python tools/bench_figures.py --countries 20 --years 33 --repeat 20
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.charts import suicides_by_gender_figure, suicides_line_figure  # noqa: E402
+from utils.render import animated_bar_figure, line_figure  # noqa: E402
+
+
+def line_data(countries, years):
+    return pd.DataFrame({
+        'CountryName': np.repeat([f'Country {i}' for i in range(countries)], years),
+        'Year': np.tile(np.arange(1990, 1990 + years), countries),
+        'SuicideCount': np.random.default_rng(0).integers(0, 5000, countries * years),
+    })
+
+
+def bar_data(years):
+    regions = ['Africa', 'Asia', 'Europe', 'North America', 'Oceania', 'South America']
+    return pd.DataFrame({
+        'RegionName': np.tile(np.repeat(regions, 2), years),
+        'Sex': np.tile(['Female', 'Male'], len(regions) * years),
+        'Year': np.repeat(np.arange(1990, 1990 + years), len(regions) * 2),
+        'DeathRatePer100K': np.random.default_rng(0).random(len(regions) * 2 * years) * 100,
+    })
+
+
+def express_line(df):
+    fig = px.line(df, x='Year', y='SuicideCount', color='CountryName',
+                  labels={'SuicideCount': 'Number of Suicides', 'CountryName': 'Country'}, title='Suicides')
+    fig.update_traces(line=dict(width=2))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+        legend=dict(title='Country', title_font=dict(size=24)),
+        xaxis=dict(showgrid=True, title_font=dict(size=24), tickmode='linear', tick0=1970, dtick=1),
+        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
+    return fig
+
+
+def factory_line(df):
+    return line_figure(df, x='Year', y='SuicideCount', color='CountryName',
+                       labels={'SuicideCount': 'Number of Suicides', 'CountryName': 'Country'}, title='Suicides',
+                       xaxis=dict(showgrid=True, tickmode='linear', tick0=1970, dtick=1))
+
+
+def express_bar(df):
+    fig = px.bar(df, x='RegionName', y='DeathRatePer100K', color='Sex', barmode='group',
+                 color_discrete_map={'Male': 'dodgerblue', 'Female': 'lightcoral'},
+                 animation_frame='Year', animation_group='RegionName', title='Suicides per 100K')
+    fig.update_layout(
+        width=1200, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(title_font=dict(size=24)),
+        yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=dict(size=24)))
+    return fig
+
+
+def factory_bar(df):
+    return animated_bar_figure(df, x='RegionName', y='DeathRatePer100K', color='Sex', frame='Year',
+                               color_map={'Male': 'dodgerblue', 'Female': 'lightcoral'}, width=1200,
+                               title='Suicides per 100K')
+
+
+def countries_line(df):
+    return suicides_line_figure(df, 'Both', 'All generations', full_resolution=False)
+
+
+def countries_pie(by_sex):
+    return suicides_by_gender_figure(by_sex, 'All generations')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the construction of the page figures.')
+    parser.add_argument('--countries', type=int, default=20)
+    parser.add_argument('--years', type=int, default=33)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    lines, bars = line_data(args.countries, args.years), bar_data(args.years)
+    by_sex = pd.Series([5200.0, 14800.0, 0.0], ['Female', 'Male', 'Unknown'])
+    cases = [('line, plotly express', express_line, lines), ('line, figure factory', factory_line, lines),
+             ('animated bar, plotly express', express_bar, bars), ('animated bar, figure factory', factory_bar, bars),
+             ('countries tab, suicides line', countries_line, lines),
+             ('countries tab, gender pie', countries_pie, by_sex)]
+    for name, build, df in cases:
+        seconds = min(timeit.repeat(lambda: build(df), number=1, repeat=args.repeat))
+        print(f'{name:<32}{seconds * 1000:>10.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Offline load test for pages/Suicide.py.
+
+Every worker process stands in for one Streamlit server process and drives several concurrent sessions through
+Streamlit's AppTest. The sessions click through the page like a viewer would (tab switches, continent/country
+multiselects, gender/generation and treemap metric changes) and every rerun is timed.
+
+Run it from anywhere, the script changes into the repository root:
+
+    python tools/load_test.py --workers 2 --sessions 8 --interactions 25
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from streamlit import config
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# -- Every AppTest compiles the page on its first run, compiling in several threads at once trips up the Python
+# -- parser, so sessions open the page one after another and only interact concurrently --
+OPEN_LOCK = threading.Lock()
+
+TABS = ['Worldwide', 'Continents', 'Countries']
+TREEMAP_METRICS = ['Area', 'Population Density', 'Growth Rate', 'Population']
+SEXES = ['Both', 'Male', 'Female', 'Unknown']
+
+
+# -- Widgets are looked up by their label, the way a viewer finds them --
+def widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    return None
+
+
+# -- One random interaction of a viewer, returns a short name of what was done --
+def interact(at, rng):
+    tab = at.session_state['tab_selection'] if 'tab_selection' in at.session_state else TABS[0]
+
+    if rng.random() < 0.25:
+        at.session_state['tab_selection'] = rng.choice(TABS)
+        return 'tab'
+
+    treemap_metric = widget(at.selectbox, 'Select data')
+    if tab == 'Worldwide' and treemap_metric is not None:
+        treemap_metric.set_value(rng.choice(TREEMAP_METRICS))
+        return 'treemap metric'
+
+    continents = widget(at.multiselect, 'Select continent')
+    countries = widget(at.multiselect, 'Select country')
+    if tab == 'Countries' and continents is not None and countries is not None:
+        choice = rng.random()
+        if not continents.value or choice < 0.2:
+            continents.set_value(rng.sample(continents.options, rng.randint(1, len(continents.options))))
+            return 'continents'
+        if choice < 0.6 and countries.options:
+            countries.set_value(rng.sample(countries.options, rng.randint(1, min(12, len(countries.options)))))
+            return 'countries'
+        if choice < 0.8:
+            widget(at.selectbox, 'Select the gender').set_value(rng.choice(SEXES))
+            return 'gender'
+        generation = widget(at.selectbox, 'Select generation')
+        generation.set_value(rng.choice(generation.options))
+        return 'generation'
+
+    # -- The continents tab has no widgets (or the page failed), viewers move on --
+    at.session_state['tab_selection'] = rng.choice(TABS)
+    return 'tab'
+
+
+# -- A single viewer session, returns (interaction, seconds) per rerun and the number of errors --
+def run_session(seed, interactions, timeout):
+    rng = random.Random(seed)
+    at = AppTest.from_file(os.path.join(ROOT, 'App.py'), default_timeout=timeout)
+    at.switch_page('pages/Suicide.py')
+
+    timings = []
+    with OPEN_LOCK:
+        start = time.perf_counter()
+        at.run()
+        timings.append(('open page', time.perf_counter() - start))
+    errors = len(at.exception)
+
+    for _ in range(interactions):
+        action = interact(at, rng)
+        start = time.perf_counter()
+        at.run()
+        timings.append((action, time.perf_counter() - start))
+        errors += len(at.exception)
+    return timings, errors
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return float('nan')
+
+
+# -- One worker process (= one Streamlit server process) running its sessions concurrently --
+def run_worker(worker, sessions, interactions, timeout, seed):
+    os.chdir(ROOT)
+
+    # -- AppTest switches the testing mode on only while one of its runs is in progress, the first concurrent run
+    # -- to finish would switch it off for all others, so the whole worker stays in testing mode --
+    config.set_option('global.appTest', True)
+    samples = []
+    peak = [rss_mb()]
+    done = threading.Event()
+
+    def sample_memory():
+        while not done.wait(0.2):
+            peak[0] = max(peak[0], rss_mb())
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, seed + worker * sessions + session, interactions, timeout)
+                   for session in range(sessions)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+    done.set()
+
+    for timings, _ in results:
+        samples.extend(timings)
+    return {
+        'worker': worker,
+        'elapsed': elapsed,
+        'timings': samples,
+        'errors': sum(errors for _, errors in results),
+        'rss_mb': rss_mb(),
+        'peak_rss_mb': max(peak[0], resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+    }
+
+
+def percentile(values, q):
+    if len(values) < 2:
+        return values[0] if values else float('nan')
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+def summarize(results, wall_time):
+    latencies = [seconds for result in results for _, seconds in result['timings']]
+    by_action = {}
+    for result in results:
+        for action, seconds in result['timings']:
+            by_action.setdefault(action, []).append(seconds)
+
+    return {
+        'reruns': len(latencies),
+        'errors': sum(result['errors'] for result in results),
+        'wall_time_s': wall_time,
+        'throughput_reruns_per_s': len(latencies) / wall_time,
+        'latency_ms': {f'p{q}': percentile(latencies, q) * 1000 for q in (50, 95, 99)},
+        'latency_ms_by_interaction': {
+            action: {f'p{q}': percentile(values, q) * 1000 for q in (50, 95, 99)} | {'count': len(values)}
+            for action, values in sorted(by_action.items())
+        },
+        'workers': [{'worker': result['worker'], 'rss_mb': result['rss_mb'], 'peak_rss_mb': result['peak_rss_mb'],
+                     'reruns': len(result['timings'])} for result in results],
+    }
+
+
+def print_summary(summary):
+    print(f"Reruns: {summary['reruns']} in {summary['wall_time_s']:.1f}s "
+          f"({summary['throughput_reruns_per_s']:.2f} reruns/s), errors: {summary['errors']}")
+    latency = summary['latency_ms']
+    print(f"Rerun latency: p50 {latency['p50']:.0f} ms, p95 {latency['p95']:.0f} ms, p99 {latency['p99']:.0f} ms")
+    print()
+    print(f"{'interaction':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for action, stats in summary['latency_ms_by_interaction'].items():
+        print(f"{action:<16}{stats['count']:>8}{stats['p50']:>10.0f}{stats['p95']:>10.0f}{stats['p99']:>10.0f}")
+    print()
+    for worker in summary['workers']:
+        print(f"Worker {worker['worker']}: {worker['reruns']} reruns, RSS {worker['rss_mb']:.0f} MB "
+              f"(peak {worker['peak_rss_mb']:.0f} MB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate concurrent viewers of the suicide page.')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes, one per Streamlit server process')
+    parser.add_argument('--sessions', type=int, default=4, help='concurrent sessions per worker')
+    parser.add_argument('--interactions', type=int, default=20, help='interactions per session')
+    parser.add_argument('--timeout', type=float, default=120, help='timeout of a single rerun in seconds')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the simulated viewers')
+    parser.add_argument('--json', metavar='PATH', help='also write the summary as JSON to PATH')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_worker, worker, args.sessions, args.interactions, args.timeout, args.seed)
+                   for worker in range(args.workers)]
+        results = [future.result() for future in futures]
+    summary = summarize(results, time.perf_counter() - start)
+
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+# -- Shared data and chart helpers used by the Streamlit pages --
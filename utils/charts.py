@@ -0,0 +1,141 @@
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils import config
+from utils.downsample import downsample_frame, year_tick_step
+from utils.render import forecast_traces, line_figure
+
+# -- Figures of the Countries tab. A chart gets its data and options as arguments and reads nothing else, so equal
+# -- arguments give an equal figure: the page keeps them per chart_key and tools/bench_figures.py times them alone --
+
+# -- View parameters each chart depends on, its key only changes with these --
+CHART_PARAMS = {
+    'population': ('years', 'continents', 'countries', 'forecast'),
+    'suicides': ('years', 'continents', 'countries', 'sex', 'generation', 'forecast', 'full_resolution'),
+    'gdp_per_capita': ('years', 'continents', 'countries', 'sex', 'generation', 'full_resolution'),
+    'gross_national_income': ('years', 'continents', 'countries', 'sex', 'generation', 'full_resolution'),
+    'population_percentage': ('continents', 'countries'),
+    'suicides_by_gender': ('years', 'continents', 'countries', 'generation'),
+}
+
+POPULATION_YEARS = ['1970', '1980', '1990', '2000', '2010', '2015', '2020', '2022']
+
+SUICIDE_TITLES = {
+    'Both': 'Suicides for both genders',
+    'Male': 'Suicides for males',
+    'Female': 'Suicides for females',
+    'Unknown': 'Suicides for unknown gender',
+}
+
+SEX_COLORS = {'Female': 'lightcoral', 'Male': 'dodgerblue', 'Unknown': 'darkgray'}
+
+
+# -- Hashable key of a chart for a data version and a view ({parameter: hashable value}) --
+def chart_key(name, fingerprint, view):
+    return (name, fingerprint) + tuple((param, view[param]) for param in CHART_PARAMS[name])
+
+
+# -- Forecast band and line of the selected model (see utils/forecast.py), nothing when there is no forecast --
+def add_forecast(fig, forecast, forecast_title):
+    if forecast is not None:
+        fig.add_traces(forecast_traces(forecast, 'Year', 'Country', f'Forecast ({forecast_title})',
+                                       f'{config.FORECAST_CONFIDENCE}% interval'))
+    return fig
+
+
+# -- Yearly line per country, downsampled to the point budget of the chart unless full resolution is requested --
+def country_line_figure(facts, y, budget, full_resolution, labels, title):
+    chart_data = facts
+    if not full_resolution:
+        chart_data = downsample_frame(chart_data, 'Year', y, 'CountryName', budget)
+
+    return line_figure(chart_data, x='Year', y=y, color='CountryName',
+                       labels={**labels, 'Year': 'Year', 'CountryName': 'Country'}, title=title,
+                       xaxis=dict(showgrid=True, tickmode='linear', tick0=1970,
+                                  dtick=year_tick_step(chart_data['Year'])))
+
+
+# -- Population line chart of the selected countries, from the population columns within the years --
+def population_line_figure(selection, years, forecast=None, forecast_title=None):
+    year_order = [year for year in POPULATION_YEARS if years[0] <= int(year) <= years[1]]
+    df_melted = pd.melt(selection, id_vars=['Country', 'Continent'],
+                        value_vars=[f'{year}_Population' for year in reversed(year_order)],
+                        var_name='Year', value_name='Population')
+
+    # -- A numeric year axis, so the years of the forecast are spaced correctly --
+    df_melted['Year'] = df_melted['Year'].str.split('_').str[0].astype(int)
+
+    fig = line_figure(df_melted, x='Year', y='Population', color='Country',
+                      labels={'Population': 'Population Count', 'Year': 'Year'},
+                      title='👨‍👩‍👧‍👦 Population over the years',
+                      xaxis=dict(showgrid=True))
+    return add_forecast(fig, forecast, forecast_title)
+
+
+# -- Suicide line chart of the country facts (see utils/facts.py) of a gender and generation --
+def suicides_line_figure(facts, sex, generation, full_resolution, forecast=None, forecast_title=None):
+    fig = country_line_figure(facts, 'SuicideCount', config.POINT_BUDGETS['suicides'], full_resolution,
+                              {'SuicideCount': 'Number of Suicides'}, f'💀 {SUICIDE_TITLES[sex]}, for {generation}')
+    return add_forecast(fig, forecast, forecast_title)
+
+
+def gdp_line_figure(facts, full_resolution):
+    return country_line_figure(facts, 'GDPPerCapita', config.POINT_BUDGETS['gdp'], full_resolution,
+                               {'GDPPerCapita': 'GDP per Capita'}, '💵 GDP per Capita')
+
+
+def gni_line_figure(facts, full_resolution):
+    return country_line_figure(facts, 'GrossNationalIncome', config.POINT_BUDGETS['gni'], full_resolution,
+                               {'GrossNationalIncome': 'Gross National income'}, '💰 Gross National Income')
+
+
+# -- Share of the selected countries in today's world population --
+def population_percentage_figure(selection, world_population):
+    population_percentage = selection['2022_Population'].sum() / world_population * 100
+    rest_of_world_percentage = 100 - population_percentage
+
+    colors = ['#E41E3F', '#0040C9']
+
+    fig = go.Figure(data=[go.Pie(labels=['Selected Countries', 'Rest of the World'],
+                                 values=[population_percentage, rest_of_world_percentage],
+                                 pull=[0.01, 0.1],
+                                 marker=dict(colors=colors))])
+    fig.update_layout(title='📈 Population Percentage Compared to the Rest of the World')
+
+    return fig
+
+
+# -- Suicides per gender pie chart of the totals by gender (see utils/rates.py window_breakdown) --
+def suicides_by_gender_figure(by_sex, generation):
+    # -- Labels, values and colors are matched by the gender, 'Unknown' only shows up when it has suicides --
+    by_sex = by_sex[(by_sex > 0) | by_sex.index.isin(['Female', 'Male'])]
+
+    fig = go.Figure(data=[go.Pie(labels=list(by_sex.index), values=by_sex.to_numpy(),
+                                 textinfo='label+percent', sort=False,
+                                 marker=dict(colors=[SEX_COLORS.get(sex, 'gray') for sex in by_sex.index]))])
+
+    # -- Customizing chart appearance --
+    fig.update_layout(title=f'👦👧 Total suicides by gender ({generation})', showlegend=True)
+
+    return fig
+
+
+# -- Countries of the trivia: the selected ones when there are one or two, else the 3 most populous --
+def trivia_countries(selection, countries):
+    if len(countries) in (1, 2):
+        return list(countries)
+    return list(selection.nlargest(3, '2022_Population')['Country'])
+
+
+# -- Trivia lines about a country --
+def trivia_lines(selection, country):
+    country_data = selection[selection['Country'] == country]
+    if country_data.empty:
+        return []
+    row = country_data.iloc[0]
+    population_density = row['2022_Population'] / row['Area']
+    growth_rate = (row['2022_Population'] - row['1970_Population']) / row['1970_Population'] * 100
+    return [f'{country}\'s population Density is: {population_density:,.2f} people per km$^2$',
+            f'The countries total area is: {row["Area"]:,.0f} km$^2$',
+            f'Growth rate over the years: {growth_rate:,.2f}%',
+            f'Capital of {country} is: {row["Capital"]}']
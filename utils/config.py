@@ -0,0 +1,83 @@
+import os
+
+
+# -- Settings of the pages, every one of them can be overridden with an environment variable --
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def env_str(name, default):
+    return os.environ.get(name) or default
+
+
+# -- Maximum number of points a line chart sends to the browser (summed over all its traces) --
+POINT_BUDGETS = {
+    'suicides': env_int('DVIZ_POINT_BUDGET_SUICIDES', 2000),
+    'gdp': env_int('DVIZ_POINT_BUDGET_GDP', 2000),
+    'gni': env_int('DVIZ_POINT_BUDGET_GNI', 2000),
+}
+
+# -- 'lttb' (largest triangle three buckets) or 'minmax' (min/max per bucket) --
+DOWNSAMPLING_METHOD = env_str('DVIZ_DOWNSAMPLING_METHOD', 'lttb')
+
+# -- Maximum number of ticks on a year axis --
+MAX_YEAR_TICKS = env_int('DVIZ_MAX_YEAR_TICKS', 40)
+
+# -- Line charts with more traces than this are drawn with WebGL (Scattergl) instead of SVG --
+WEBGL_TRACE_THRESHOLD = env_int('DVIZ_WEBGL_TRACE_THRESHOLD', 15)
+
+# -- Line charts with more traces than this are merged into a single WebGL trace --
+CONSOLIDATE_TRACE_THRESHOLD = env_int('DVIZ_CONSOLIDATE_TRACE_THRESHOLD', 60)
+
+# -- Persistent cache of derived tables and figures, survives restarts of the app --
+DISK_CACHE_DIR = env_str('DVIZ_DISK_CACHE_DIR', os.path.join('.cache', 'dviz'))
+DISK_CACHE_MAX_MB = env_int('DVIZ_DISK_CACHE_MAX_MB', 256)
+
+# -- Query engine of the aggregations: 'pandas' (default) or 'duckdb' (needs `pip install duckdb`) --
+QUERY_BACKEND = env_str('DVIZ_QUERY_BACKEND', 'pandas')
+
+# -- DuckDB only: read the tables from <dir>/<data version>/<table>.parquet instead of the in-memory frames. The
+# -- files are written from the frames, the data is still loaded in memory once --
+DUCKDB_PARQUET_DIR = env_str('DVIZ_DUCKDB_PARQUET_DIR', '')
+
+# -- DuckDB only: number of threads, 0 lets DuckDB use all cores --
+DUCKDB_THREADS = env_int('DVIZ_DUCKDB_THREADS', 0)
+
+# -- Rollup builds: worker processes (0 = one per core), fixed number of partitions and their key (Year or
+# -- CountryId). Frames with fewer rows are aggregated in-process, a process pool would only add overhead --
+ROLLUP_WORKERS = env_int('DVIZ_ROLLUP_WORKERS', 0)
+ROLLUP_PARTITIONS = env_int('DVIZ_ROLLUP_PARTITIONS', 32)
+ROLLUP_PARTITION_BY = env_str('DVIZ_ROLLUP_PARTITION_BY', 'Year')
+ROLLUP_PARALLEL_MIN_ROWS = env_int('DVIZ_ROLLUP_PARALLEL_MIN_ROWS', 500000)
+
+# -- Threads building the figures of a tab together (0 = one per core, 1 builds them one after the other) --
+FIGURE_WORKERS = env_int('DVIZ_FIGURE_WORKERS', 0)
+
+# -- Minimum time between two checks for new data files, a new version is built in the background --
+DATA_REFRESH_SECONDS = env_int('DVIZ_DATA_REFRESH_SECONDS', 10)
+
+# -- 1 shows the Data Quality page (the ingestion report of the data files), it is hidden from the public app --
+DATA_QUALITY_PAGE = env_int('DVIZ_DATA_QUALITY_PAGE', 0)
+
+# -- Exports: rows written per slice of a CSV/Parquet file and browser tabs of the image renderer (kaleido) --
+EXPORT_CHUNK_ROWS = env_int('DVIZ_EXPORT_CHUNK_ROWS', 50000)
+EXPORT_RENDERERS = env_int('DVIZ_EXPORT_RENDERERS', 2)
+
+# -- Derived frames and figures a session keeps for reuse, the least recently used ones are evicted beyond this --
+SESSION_MEMORY_BUDGET_MB = env_int('DVIZ_SESSION_MEMORY_BUDGET_MB', 64)
+
+# -- Correlation panel: years of the rolling window and largest lag (years the indicator leads the suicide rate) --
+CORRELATION_WINDOW = env_int('DVIZ_CORRELATION_WINDOW', 10)
+CORRELATION_MAX_LAG = env_int('DVIZ_CORRELATION_MAX_LAG', 5)
+
+# -- Suicides per 100K of the world and continent charts: 'weighted' (total suicides over total population) or
+# -- 'summed' (sum of the per-row rates of the dataset, grows with the number of rows reported) --
+RATE_METHOD = env_str('DVIZ_RATE_METHOD', 'weighted')
+
+# -- Forecasts of the Countries tab: years ahead and confidence of the band (percent) --
+FORECAST_YEARS = env_int('DVIZ_FORECAST_YEARS', 10)
+FORECAST_CONFIDENCE = env_int('DVIZ_FORECAST_CONFIDENCE', 95)
+
+# -- Comma separated modules declaring additional indicator datasets for the Indicators page (see utils/plugins.py) --
+PLUGINS = env_str('DVIZ_PLUGINS', '')
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from utils import config
+from utils.rates import DENOMINATOR_PER, RATE, build_rate_arrays, weighted_rates
+
+# -- Economic indicators of df_suicides that are correlated with the suicide rate --
+INDICATORS = {
+    'GDP': 'GDP',
+    'GDPPerCapita': 'GDP per capita',
+    'GrossNationalIncome': 'Gross national income',
+    'GNIPerCapita': 'GNI per capita',
+    'InflationRate': 'Inflation rate',
+    'EmploymentPopulationRatio': 'Employment to population ratio',
+}
+METHODS = {'pearson': 'Pearson', 'spearman': 'Spearman'}
+WORLD = 'World'
+
+# -- Fewer pairs than this give no correlation --
+MIN_PAIRS = 3
+
+
+# -- Dense country x year grid of the suicide rate per 100K (total suicides over the population of the country, see
+# -- utils/rates.py) and of the indicators (constant per country and year), missing country-years are NaN --
+def build_panel(df_suicides):
+    totals = weighted_rates(build_rate_arrays(df_suicides, keys=DENOMINATOR_PER), list(DENOMINATOR_PER))
+    indicators = df_suicides.groupby(['CountryId', 'Year'], observed=True)[list(INDICATORS)].max()
+
+    country_ids = np.unique(indicators.index.get_level_values('CountryId'))
+    years = np.arange(df_suicides['Year'].min(), df_suicides['Year'].max() + 1)
+
+    y = np.full((len(country_ids), len(years)), np.nan)
+    y[np.searchsorted(country_ids, totals['CountryId'].to_numpy()), totals['Year'].to_numpy() - years[0]] = (
+        totals[RATE].to_numpy(dtype=float))
+    x = np.full((len(INDICATORS), len(country_ids), len(years)), np.nan)
+    rows = np.searchsorted(country_ids, indicators.index.get_level_values('CountryId'))
+    x[:, rows, indicators.index.get_level_values('Year').to_numpy() - years[0]] = indicators.to_numpy(dtype=float).T
+
+    regions = df_suicides.groupby('CountryId', observed=True)['RegionName'].first().reindex(country_ids)
+    return {'x': x, 'y': y, 'country_ids': country_ids, 'years': years,
+            'regions': regions.astype(str).to_numpy()}
+
+
+# -- Pearson r of every row of x (K, N) with y (N,) within each group, from per-group sums (one bincount per
+# -- moment over all rows at once). Pairs with a NaN are skipped. Returns r and the number of pairs, both (K, G) --
+def grouped_pearson(x, y, groups, group_count):
+    rows = x.shape[0]
+    y = np.broadcast_to(y, x.shape)
+    ids = (np.arange(rows)[:, None] * group_count + groups[None, :])
+    valid = ~(np.isnan(x) | np.isnan(y))
+    ids, x, y = ids[valid], x[valid], y[valid]
+    size = rows * group_count
+
+    n = np.bincount(ids, minlength=size).astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # -- Centered second pass, GDP values are large enough to lose the raw sums to cancellation --
+        dx = x - (np.bincount(ids, x, size) / n)[ids]
+        dy = y - (np.bincount(ids, y, size) / n)[ids]
+        r = np.bincount(ids, dx * dy, size) / np.sqrt(np.bincount(ids, dx * dx, size)
+                                                      * np.bincount(ids, dy * dy, size))
+    r[n < MIN_PAIRS] = np.nan
+    return r.reshape(rows, group_count), n.reshape(rows, group_count).astype(int)
+
+
+# -- Spearman is Pearson on the ranks, ranked within each row and group among the valid pairs only --
+def grouped_spearman(x, y, groups, group_count):
+    y = np.broadcast_to(y, x.shape)
+    invalid = np.isnan(x) | np.isnan(y)
+    ids = (np.arange(x.shape[0])[:, None] * group_count + groups[None, :]).ravel()
+    x_ranks = pd.Series(np.where(invalid, np.nan, x).ravel()).groupby(ids).rank().to_numpy().reshape(x.shape)
+    y_ranks = pd.Series(np.where(invalid, np.nan, y).ravel()).groupby(ids).rank().to_numpy().reshape(x.shape)
+    return grouped_pearson(x_ranks, y_ranks, groups, group_count)
+
+
+CORRELATIONS = {'pearson': grouped_pearson, 'spearman': grouped_spearman}
+
+
+# -- Groups of the countries of the panel for every scope, as (scope, names, group of each country) --
+def scopes(panel, country_names):
+    region_names, region_groups = np.unique(panel['regions'], return_inverse=True)
+    countries = len(panel['country_ids'])
+    return [
+        ('World', np.array([WORLD]), np.zeros(countries, dtype=int)),
+        ('Region', region_names, region_groups),
+        ('Country', np.asarray(country_names)[panel['country_ids']], np.arange(countries)),
+    ]
+
+
+# -- Correlation of the suicide rate with every indicator for every scope and method, with the indicator leading by
+# -- 0..max_lag years (lag 0 is the plain correlation) --
+def lagged_correlations(panel, country_names, max_lag=None):
+    max_lag = config.CORRELATION_MAX_LAG if max_lag is None else max_lag
+    x, y = panel['x'], panel['y']
+    years = len(panel['years'])
+    frames = []
+    for lag in range(min(max_lag, years - 1) + 1):
+        # -- Rate of year t against the indicator of year t - lag, of the same country --
+        x_lagged, y_lagged = x[:, :, :years - lag], y[:, lag:]
+        for scope, names, country_groups in scopes(panel, country_names):
+            groups = np.repeat(country_groups, years - lag)
+            for method, correlate in CORRELATIONS.items():
+                r, n = correlate(x_lagged.reshape(len(INDICATORS), -1), y_lagged.ravel(), groups, len(names))
+                frames.append(pd.DataFrame({
+                    'Scope': scope, 'Name': np.tile(names, len(INDICATORS)),
+                    'Indicator': np.repeat(list(INDICATORS), len(names)), 'Method': method, 'Lag': lag,
+                    'r': r.ravel(), 'n': n.ravel()}))
+    return pd.concat(frames, ignore_index=True)
+
+
+# -- Values minus their group mean over their group standard deviation, per row (indicator). NaN pairs become 0 --
+def standardize(values, valid, ids, size):
+    n = np.bincount(ids, valid.ravel(), size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(ids, np.where(valid, values, 0.0).ravel(), size) / n
+        centered = np.where(valid, values - mean[ids].reshape(values.shape), 0.0)
+        std = np.sqrt(np.bincount(ids, (centered * centered).ravel(), size) / n)
+        return np.where(valid, centered / std[ids].reshape(values.shape), 0.0)
+
+
+# -- Pearson correlation over a moving window of years, from cumulative per (group, year) sums so every window is
+# -- O(1). Values are standardized per group first, which keeps the raw moment sums accurate --
+def rolling_correlations(panel, country_names, window=None):
+    years = panel['years']
+    window = min(window or config.CORRELATION_WINDOW, len(years))
+    x, y = panel['x'], np.broadcast_to(panel['y'], panel['x'].shape)
+    valid = ~(np.isnan(x) | np.isnan(y))
+
+    frames = []
+    for scope, names, country_groups in scopes(panel, country_names):
+        shape = (len(INDICATORS), len(names), len(years))
+        groups = np.arange(len(INDICATORS))[:, None, None] * len(names) + country_groups[None, :, None]
+        group_ids = np.broadcast_to(groups, x.shape).ravel()
+        x_scaled = standardize(x, valid, group_ids, shape[0] * shape[1])
+        y_scaled = standardize(y, valid, group_ids, shape[0] * shape[1])
+
+        ids = np.broadcast_to(groups * len(years) + np.arange(len(years))[None, None, :], x.shape).ravel()
+        moments = [np.bincount(ids, weights.ravel(), np.prod(shape)).reshape(shape)
+                   for weights in (valid.astype(float), x_scaled, y_scaled, x_scaled * y_scaled,
+                                   x_scaled * x_scaled, y_scaled * y_scaled)]
+
+        # -- Window sums are differences of the cumulative sums along the years --
+        sums = []
+        for moment in moments:
+            cumulative = np.concatenate([np.zeros(shape[:2] + (1,)), np.cumsum(moment, axis=2)], axis=2)
+            sums.append(cumulative[:, :, window:] - cumulative[:, :, :-window])
+        n, sx, sy, sxy, sxx, syy = sums
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+        r[n < MIN_PAIRS] = np.nan
+        end_years = years[window - 1:]
+        frames.append(pd.DataFrame({
+            'Scope': scope,
+            'Name': np.tile(np.repeat(names, len(end_years)), len(INDICATORS)),
+            'Indicator': np.repeat(list(INDICATORS), len(names) * len(end_years)),
+            'Year': np.tile(end_years, len(INDICATORS) * len(names)),
+            'r': r.ravel(), 'n': n.ravel().round().astype(int)}))
+    return pd.concat(frames, ignore_index=True)
+
+
+# -- Every correlation of the panel, as {'correlations': ..., 'rolling': ...} frames --
+def build_correlations(df_suicides, country_names):
+    panel = build_panel(df_suicides)
+    return {'correlations': lagged_correlations(panel, country_names),
+            'rolling': rolling_correlations(panel, country_names)}
@@ -0,0 +1,128 @@
+import logging
+import re
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# -- Where every dataset keeps its country name and (optional) country code --
+COUNTRY_COLUMNS = {
+    'pop': ('Country', 'CCA3'),
+    'suicides': ('CountryName', 'CountryCode'),
+    'continent': ('Entity', 'Code'),
+}
+
+# -- Known spellings (mostly WHO / UN style) which differ from the names in the population dataset --
+COUNTRY_ALIASES = {
+    'Bolivia (Plurinational State of)': 'BOL',
+    'Brunei Darussalam': 'BRN',
+    'Cabo Verde': 'CPV',
+    'China, Hong Kong SAR': 'HKG',
+    'China, Macao SAR': 'MAC',
+    'Congo': 'COG',
+    "Côte d'Ivoire": 'CIV',
+    'Curacao': 'CUW',
+    'Czechia': 'CZE',
+    "Democratic People's Republic of Korea": 'PRK',
+    'Democratic Republic of the Congo': 'COD',
+    'Eswatini': 'SWZ',
+    'Hong Kong SAR': 'HKG',
+    'Iran (Islamic Republic of)': 'IRN',
+    "Lao People's Democratic Republic": 'LAO',
+    'Macao': 'MAC',
+    'Micronesia (Federated States of)': 'FSM',
+    'Republic of Korea': 'KOR',
+    'Republic of Moldova': 'MDA',
+    'Republic of North Macedonia': 'MKD',
+    'Reunion': 'REU',
+    'Russian Federation': 'RUS',
+    'Saint Vincent and Grenadines': 'VCT',
+    'State of Palestine': 'PSE',
+    'Syrian Arab Republic': 'SYR',
+    'TFYR Macedonia': 'MKD',
+    'Türkiye': 'TUR',
+    'United Kingdom of Great Britain and Northern Ireland': 'GBR',
+    'United Republic of Tanzania': 'TZA',
+    'United States of America': 'USA',
+    'Venezuela (Bolivarian Republic of)': 'VEN',
+    'Viet Nam': 'VNM',
+}
+
+
+# -- Case, punctuation and '&' vs 'and' differences should not break a match --
+def normalize_name(name):
+    name = str(name).casefold().replace('&', 'and')
+    return re.sub(r'[\W_]+', '', name)
+
+
+def is_iso3(code):
+    return isinstance(code, str) and len(code) == 3 and code.isalpha() and code.isupper()
+
+
+# -- Maps a name (or ISO3 code) of any source to the canonical display name of the population dataset --
+def build_alias_table(df_pop):
+    iso3_to_name = dict(zip(df_pop['CCA3'], df_pop['Country']))
+    name_to_canonical = {normalize_name(name): name for name in df_pop['Country']}
+    for alias, iso3 in COUNTRY_ALIASES.items():
+        if iso3 in iso3_to_name:
+            name_to_canonical[normalize_name(alias)] = iso3_to_name[iso3]
+    return iso3_to_name, name_to_canonical
+
+
+# -- Resolve the country names of all datasets to the canonical names, returns renamed datasets and a report --
+def canonicalize_countries(datasets):
+    iso3_to_name, name_to_canonical = build_alias_table(datasets['pop'])
+    resolved = {}
+    unmatched = []
+
+    for source, df in datasets.items():
+        name_column, code_column = COUNTRY_COLUMNS[source]
+        if name_column not in df.columns:
+            resolved[source] = df
+            continue
+
+        # -- Resolve every distinct (name, code) pair once instead of every row --
+        codes = df[code_column] if code_column in df.columns else pd.Series(None, index=df.index, dtype=object)
+        pairs = pd.DataFrame({'name': df[name_column], 'code': codes}).drop_duplicates()
+        mapping = {}
+        for name, code in zip(pairs['name'], pairs['code']):
+            canonical = iso3_to_name.get(code) if is_iso3(code) else None
+            if canonical is None:
+                canonical = name_to_canonical.get(normalize_name(name))
+            if canonical is None:
+                unmatched.append({'Source': source, 'Name': name, 'Code': code,
+                                  'Rows': int((df[name_column] == name).sum())})
+                canonical = name
+            mapping[name] = canonical
+
+        df = df.copy()
+        df[name_column] = df[name_column].map(mapping)
+        resolved[source] = df
+
+    report = pd.DataFrame(unmatched, columns=['Source', 'Name', 'Code', 'Rows'])
+    for source, names in report.groupby('Source')['Name']:
+        logger.info('%d country names of the %s dataset have no match in the population dataset', len(names), source)
+    return resolved, report
+
+
+# -- Canonical country dimension, the CountryId is the code of the shared country vocabulary --
+def build_country_dimension(encoded, country_vocabulary):
+    names = country_vocabulary.categories
+    df_countries = pd.DataFrame({'CountryId': range(len(names)), 'Country': names})
+
+    iso3 = pd.Series(None, index=names, dtype=object)
+    for source, df in encoded.items():
+        name_column, code_column = COUNTRY_COLUMNS[source]
+        if name_column in df.columns and code_column in df.columns:
+            codes = df[[name_column, code_column]].drop_duplicates(name_column)
+            codes = codes[codes[code_column].map(is_iso3)]
+            iso3 = iso3.fillna(pd.Series(codes[code_column].to_numpy(), index=codes[name_column].astype(str)))
+    df_countries['ISO3'] = iso3.reindex(names).to_numpy()
+
+    # -- Every dataset gets the integer join key --
+    for source, df in encoded.items():
+        name_column, _ = COUNTRY_COLUMNS[source]
+        if name_column in df.columns:
+            df['CountryId'] = df[name_column].cat.codes.astype('int16')
+
+    return df_countries
@@ -0,0 +1,58 @@
+from utils import config
+from utils.correlation import build_correlations
+from utils.disk_cache import disk_cache
+from utils.facts import build_country_facts, merge_country_facts
+from utils.forecast import build_forecasts
+from utils.ingest import DATA_FILES, ingest_datasets
+from utils.query import create_backend
+from utils.refresh import shared_refresher
+from utils.rollups import build_rollups, map_partitions
+from utils.suicides import SUICIDES
+
+# -- Tables derived from a data version of the suicide data. Plain functions over the disk cache, without streamlit:
+# -- the pages put st.cache_data in front of them and the background refresh (see utils/refresh.py) builds them off
+# -- the script threads --
+
+
+# -- World and continent rollups of the static charts (see utils/suicides.py), built together (in parallel on large
+# -- data). Only the 'summed' rate method reads them, the weighted rates come from the year cubes (utils/rates.py) --
+@disk_cache('frames')
+def version_rollups(fingerprint):
+    _, suicides, continent, _, _, _ = ingest_datasets(fingerprint)
+    backend = create_backend({'suicides': suicides, 'continent': continent}, fingerprint)
+    return build_rollups(backend, 'suicides', SUICIDES['rollups'])
+
+
+# -- Per country-year facts of the Countries tab (see utils/facts.py) --
+@disk_cache('frames')
+def version_country_facts(fingerprint):
+    return merge_country_facts(map_partitions(build_country_facts, ingest_datasets(fingerprint)[1]))
+
+
+# -- Forecasts of every series of the Countries tab and every model (see utils/forecast.py) --
+@disk_cache('frames')
+def version_forecasts(fingerprint):
+    return build_forecasts(ingest_datasets(fingerprint)[0], version_country_facts(fingerprint)['counts'])
+
+
+# -- Correlations of the suicide rate with the economic indicators (see utils/correlation.py) --
+@disk_cache('frames')
+def version_correlations(fingerprint):
+    _, suicides, _, countries, _, _ = ingest_datasets(fingerprint)
+    return build_correlations(suicides, countries['Country'])
+
+
+# -- Everything a data version needs on disk before it goes live. The ingestion report is kept by the refresher --
+def build_data_version(fingerprint):
+    *_, df_unmatched, df_quality = ingest_datasets(fingerprint)
+    if config.RATE_METHOD == 'summed':
+        version_rollups(fingerprint)
+    version_country_facts(fingerprint)
+    version_forecasts(fingerprint)
+    version_correlations(fingerprint)
+    return {'quality': df_quality, 'unmatched': df_unmatched}
+
+
+# -- The refresher of the suicide data, one per server process --
+def data_refresher():
+    return shared_refresher(list(DATA_FILES.values()), build_data_version)
@@ -0,0 +1,288 @@
+import functools
+import glob
+import hashlib
+import inspect
+import io
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+
+import plotly.io as pio
+import pyarrow as pa
+
+from utils import config
+
+logger = logging.getLogger(__name__)
+
+# -- Each thread has its own connection, so a thread waiting on the file never blocks the others. A reset of the cache
+# -- bumps the generation and every thread reopens the file on its next use --
+_lock = threading.RLock()
+_local = threading.local()
+_generation = 0
+_checked = False
+
+# -- Seconds a read or a write waits for a lock held by another connection (e.g. a write of another process). Longer
+# -- waits count as a miss or skip the write, the cache only saves work and is never worth waiting for --
+BUSY_TIMEOUT = 0.25
+
+# -- Seconds between two updates of the access time of an entry (for the eviction), so most hits only read --
+ACCESS_INTERVAL = 60
+
+# -- Part of every key, bumped when the stored values change in a way the code version does not show --
+CACHE_VERSION = 1
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# -- Fingerprint of the raw data files, changes whenever one of them is replaced --
+def dataset_fingerprint(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()[:16]
+
+
+# -- Codecs: frames as Arrow IPC, figures as compressed JSON --
+def encode_frame(df):
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def decode_frame(payload):
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+# -- A tuple or dict of frames is stored as a small JSON header followed by the Arrow streams --
+def encode_frames(frames):
+    names = list(frames) if isinstance(frames, dict) else None
+    parts = [encode_frame(df) for df in (frames.values() if names is not None else frames)]
+    header = json.dumps({'names': names, 'sizes': [len(part) for part in parts]}).encode()
+    return struct.pack('>I', len(header)) + header + b''.join(parts)
+
+
+def decode_frames(payload):
+    (header_size,) = struct.unpack('>I', payload[:4])
+    header = json.loads(payload[4:4 + header_size])
+    offset = 4 + header_size
+    frames = []
+    for size in header['sizes']:
+        frames.append(decode_frame(payload[offset:offset + size]))
+        offset += size
+    return dict(zip(header['names'], frames)) if header['names'] is not None else tuple(frames)
+
+
+def encode_figure(fig):
+    return zlib.compress(pio.to_json(fig, validate=False).encode(), 6)
+
+
+def decode_figure(payload):
+    return pio.from_json(zlib.decompress(payload).decode(), skip_invalid=True)
+
+
+CODECS = {
+    'frame': (encode_frame, decode_frame),
+    'frames': (encode_frames, decode_frames),
+    'figure': (encode_figure, decode_figure),
+}
+
+
+def cache_path():
+    return os.path.join(config.DISK_CACHE_DIR, 'cache.sqlite3')
+
+
+def _open(check):
+    os.makedirs(config.DISK_CACHE_DIR, exist_ok=True)
+    db = sqlite3.connect(cache_path(), timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+    try:
+        # -- WAL keeps readers working while a write is in progress and a crash never leaves half a row behind --
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, kind TEXT NOT NULL, '
+                   'payload BLOB NOT NULL, checksum INTEGER NOT NULL, size INTEGER NOT NULL, '
+                   'created REAL NOT NULL, accessed REAL NOT NULL)')
+        db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        if check:
+            (status,) = db.execute('PRAGMA quick_check').fetchone()
+            if status != 'ok':
+                raise sqlite3.DatabaseError(status)
+    except sqlite3.Error:
+        db.close()
+        raise
+    return db
+
+
+# -- Throws the cache file away, only on corruption: the cache is only a copy of data we can rebuild --
+def _reset():
+    global _generation
+    with _lock:
+        db = getattr(_local, 'connection', None)
+        if db is not None:
+            db.close()
+        _local.connection = None
+        _generation += 1
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(cache_path() + suffix)
+            except FileNotFoundError:
+                pass
+
+
+# -- Connection of the calling thread. The file is checked once per process. A lock timeout while opening raises
+# -- sqlite3.OperationalError like any other access --
+def connection():
+    global _checked
+    if getattr(_local, 'generation', None) != _generation or _local.connection is None:
+        with _lock:
+            stale = getattr(_local, 'connection', None)
+            if stale is not None:
+                stale.close()
+            _local.connection = None
+            try:
+                db = _open(check=not _checked)
+            except sqlite3.OperationalError:
+                raise
+            except sqlite3.DatabaseError:
+                logger.warning('Disk cache %s is corrupt and is rebuilt', cache_path())
+                _reset()
+                db = _open(check=False)
+            _checked = True
+            _local.connection, _local.generation = db, _generation
+    return _local.connection
+
+
+def get(key, kind):
+    try:
+        db = connection()
+        row = db.execute('SELECT payload, checksum, accessed FROM entries WHERE key = ? AND kind = ?',
+                         (key, kind)).fetchone()
+        if row is None:
+            return None
+        payload, checksum, accessed = row
+        if zlib.crc32(payload) != checksum:
+            db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            return None
+        now = time.time()
+        if now - accessed > ACCESS_INTERVAL:
+            try:
+                db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+            except sqlite3.OperationalError:
+                pass
+    except sqlite3.OperationalError:
+        # -- Locked by another connection for longer than BUSY_TIMEOUT, a miss --
+        logger.info('Disk cache is busy, %s is a miss', key)
+        return None
+    except sqlite3.DatabaseError:
+        logger.warning('Disk cache read failed, resetting the cache', exc_info=True)
+        _reset()
+        return None
+    return CODECS[kind][1](payload)
+
+
+def put(key, kind, value):
+    try:
+        payload = CODECS[kind][0](value)
+    except Exception:
+        logger.warning('Value of %s can not be stored in the disk cache', key, exc_info=True)
+        return
+    now = time.time()
+    try:
+        db = connection()
+        # -- The row and the eviction are written in one transaction --
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       (key, kind, payload, zlib.crc32(payload), len(payload), now, now))
+            evict(db, config.DISK_CACHE_MAX_MB * 2 ** 20)
+            db.execute('COMMIT')
+        except Exception:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+    except sqlite3.OperationalError:
+        logger.info('Disk cache is busy, %s is not stored', key)
+    except sqlite3.DatabaseError:
+        logger.warning('Disk cache write failed, resetting the cache', exc_info=True)
+        _reset()
+
+
+# -- Drops the least recently used entries until the cache is back under its size limit --
+def evict(db, max_bytes):
+    (total,) = db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()
+    if total <= max_bytes:
+        return
+    for key, size in db.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall():
+        db.execute('DELETE FROM entries WHERE key = ?', (key,))
+        total -= size
+        if total <= max_bytes:
+            break
+
+
+# -- Changing the body of a cached function invalidates its entries --
+def function_source(func):
+    try:
+        return inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        return func.__code__.co_code
+
+
+@functools.lru_cache(maxsize=256)
+def file_digest(path, mtime_ns, size):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+# -- Version of the code a value is built with: every module of utils/ and the module of the cached function. The
+# -- source of a cached function does not show a change in the helpers it calls (e.g. clean_suicides) --
+def code_version(func):
+    paths = sorted(glob.glob(os.path.join(UTILS_DIR, '*.py')))
+    try:
+        paths.append(inspect.getsourcefile(func))
+    except TypeError:
+        pass
+    digest = hashlib.sha256()
+    for path in filter(lambda path: path and os.path.isfile(path), paths):
+        stat = os.stat(path)
+        digest.update(file_digest(path, stat.st_mtime_ns, stat.st_size))
+    return digest.digest()
+
+
+# -- Key of a call: cache and code version, module, function, source and arguments (underscore arguments are skipped
+# -- like st.cache_data) --
+def cache_key(func, args, kwargs):
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = {name: value for name, value in bound.arguments.items() if not name.startswith('_')}
+    digest = hashlib.sha256()
+    digest.update(f'{CACHE_VERSION}:{func.__module__}.{func.__qualname__}'.encode())
+    digest.update(code_version(func))
+    digest.update(function_source(func))
+    digest.update(repr(sorted(arguments.items())).encode())
+    return f'{func.__qualname__}:{digest.hexdigest()[:32]}'
+
+
+# -- Decorator for a second (disk) tier below st.cache_data, pass the dataset fingerprint as an argument --
+def disk_cache(kind):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_key(func, args, kwargs)
+            try:
+                value = get(key, kind)
+            except Exception:
+                logger.warning('Disk cache entry %s could not be decoded', key, exc_info=True)
+                value = None
+            if value is None:
+                value = func(*args, **kwargs)
+                put(key, kind, value)
+            return value
+        return wrapper
+    return decorator
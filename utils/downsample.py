@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils import config
+
+
+# -- Largest triangle three buckets, returns the indices of the points to keep --
+# -- https://skemman.is/bitstream/1946/15343/3/SS_MSc_thesis.pdf --
+def lttb(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # -- The first and last point are always kept, the rest is split into threshold - 2 buckets --
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # -- Average point of the next bucket (or the last point) is the third corner of the triangle --
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = np.nanmean(x[next_start:next_end]) if next_end > next_start else x[-1]
+        next_y = np.nanmean(y[next_start:next_end]) if next_end > next_start else y[-1]
+
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous]) -
+                       (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.nanargmax(areas)) if not np.all(np.isnan(areas)) else start
+        indices[bucket + 1] = previous
+
+    return indices
+
+
+# -- Keeps the minimum and maximum of every bucket, returns the indices of the points to keep --
+def minmax_decimate(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    buckets = threshold // 2
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        window = y[start:end]
+        if np.all(np.isnan(window)):
+            indices.append(start)
+            continue
+        indices.extend(sorted({start + int(np.nanargmin(window)), start + int(np.nanargmax(window))}))
+    return np.asarray(indices, dtype=int)
+
+
+DOWNSAMPLERS = {'lttb': lttb, 'minmax': minmax_decimate}
+
+
+# -- Points of every trace out of the budget, the shortest traces first: a trace shorter than its share keeps all its
+# -- points and leaves the rest to the longer ones. The shares never add up to more than the budget, with more traces
+# -- than points the shortest traces get none --
+def trace_budgets(lengths, point_budget):
+    budgets = np.zeros(len(lengths), dtype=int)
+    remaining = point_budget
+    for position, index in enumerate(np.argsort(lengths, kind='stable')):
+        budgets[index] = min(lengths[index], remaining // (len(lengths) - position))
+        remaining -= budgets[index]
+    return budgets
+
+
+# -- Indices of `budget` points of a trace. Shares too small for the downsampler keep evenly spaced points --
+def trace_indices(downsampler, x, y, budget):
+    indices = downsampler(x, y, budget)
+    if len(indices) > budget:
+        indices = np.unique(np.linspace(0, len(x) - 1, budget).round().astype(int))
+    return indices
+
+
+# -- Downsample every trace (group) of a long frame so the whole chart stays within the point budget, summed over
+# -- all its traces whatever the number of traces --
+def downsample_frame(df, x, y, group, point_budget, method=None):
+    downsampler = DOWNSAMPLERS[method or config.DOWNSAMPLING_METHOD]
+    if len(df) <= point_budget:
+        return df
+
+    traces = [trace for _, trace in df.sort_values([group, x]).groupby(group, sort=False, observed=True)]
+    budgets = trace_budgets(np.array([len(trace) for trace in traces]), point_budget)
+
+    parts = []
+    for trace, budget in zip(traces, budgets):
+        if budget == 0:
+            continue
+        if len(trace) > budget:
+            trace = trace.iloc[trace_indices(downsampler, trace[x].to_numpy(), trace[y].to_numpy(), budget)]
+        parts.append(trace)
+    return pd.concat(parts) if parts else df.iloc[:0]
+
+
+# -- Yearly ticks as long as they fit, otherwise every n-th year --
+def year_tick_step(years):
+    if len(years) == 0:
+        return 1
+    span = float(np.nanmax(years) - np.nanmin(years))
+    return max(1, math.ceil(span / config.MAX_YEAR_TICKS))
@@ -0,0 +1,42 @@
+import pandas as pd
+
+# -- Label columns which are stored as integer codes + a shared vocabulary (pandas categoricals) --
+# -- The key is the vocabulary name, the value lists the (dataset, column) pairs sharing it --
+SHARED_VOCABULARIES = {
+    'country': [('pop', 'Country'), ('suicides', 'CountryName'), ('continent', 'Entity')],
+    'continent': [('pop', 'Continent'), ('suicides', 'RegionName'), ('continent', 'Continent')],
+    'sex': [('suicides', 'Sex')],
+    'age_group': [('suicides', 'AgeGroup')],
+    'generation': [('suicides', 'Generation')],
+}
+
+
+# -- Sorted union of all labels, so every dataset maps the same label to the same code --
+def build_vocabulary(*columns):
+    labels = set()
+    for column in columns:
+        labels.update(column.dropna().unique())
+    return pd.CategoricalDtype(sorted(labels))
+
+
+# -- Encode the label columns of the given datasets with shared vocabularies --
+def encode_datasets(datasets):
+    encoded = {name: df.copy() for name, df in datasets.items()}
+    vocabularies = {}
+
+    for vocabulary_name, columns in SHARED_VOCABULARIES.items():
+        columns = [(name, column) for name, column in columns if name in encoded and column in encoded[name].columns]
+        vocabulary = build_vocabulary(*[encoded[name][column] for name, column in columns])
+        for name, column in columns:
+            encoded[name][column] = encoded[name][column].astype(vocabulary)
+        vocabularies[vocabulary_name] = vocabulary
+
+    return encoded, vocabularies
+
+
+# -- Turn the codes back into plain labels, only done on the (small) frames handed to plotly --
+def decode(df):
+    categorical_columns = df.select_dtypes(include='category').columns
+    if len(categorical_columns) == 0:
+        return df
+    return df.astype({column: df[column].cat.categories.dtype for column in categorical_columns})
@@ -0,0 +1,88 @@
+import importlib.util
+import io
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils import config
+
+TABLE_FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+IMAGE_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# -- Exported files kept by cached_export, shared by all sessions of the server process --
+EXPORT_CACHE_ENTRIES = 64
+
+_renderer_lock = threading.Lock()
+_renderer_started = False
+_exports = OrderedDict()
+_exports_lock = threading.Lock()
+
+
+# -- Tables are written in slices of rows, neither the frame nor the whole CSV text is copied at once --
+def write_csv(df, sink, chunk_rows=None):
+    chunk_rows = chunk_rows or config.EXPORT_CHUNK_ROWS
+    for start in range(0, max(len(df), 1), chunk_rows):
+        sink.write(df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode())
+
+
+# -- One Parquet row group per slice --
+def write_parquet(df, sink, chunk_rows=None):
+    chunk_rows = chunk_rows or config.EXPORT_CHUNK_ROWS
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(sink, schema) as writer:
+        for start in range(0, len(df), chunk_rows):
+            writer.write_table(pa.Table.from_pandas(df.iloc[start:start + chunk_rows], schema=schema,
+                                                    preserve_index=False))
+
+
+def table_bytes(df, file_format):
+    sink = io.BytesIO()
+    {'csv': write_csv, 'parquet': write_parquet}[file_format](df, sink)
+    return sink.getvalue()
+
+
+# -- Bytes of an exported file by its key (name, format, data version and view), the least recently used files are
+# -- dropped. Download buttons build their files on the server thread of streamlit, outside of any script run, where
+# -- st.cache_data has no context: this is a plain cache. Two first clicks at once may both build the file --
+def cached_export(key, build):
+    with _exports_lock:
+        if key in _exports:
+            _exports.move_to_end(key)
+            return _exports[key]
+    data = build()
+    with _exports_lock:
+        _exports[key] = data
+        _exports.move_to_end(key)
+        while len(_exports) > EXPORT_CACHE_ENTRIES:
+            _exports.popitem(last=False)
+    return data
+
+
+# -- Static images need kaleido (optional, `pip install kaleido`) --
+def image_export_available():
+    return importlib.util.find_spec('kaleido') is not None
+
+
+# -- Kaleido's browser is started once with DVIZ_EXPORT_RENDERERS tabs and reused by every export --
+def start_renderer():
+    global _renderer_started
+    with _renderer_lock:
+        if _renderer_started:
+            return
+        import kaleido
+
+        # -- Older kaleido versions have no persistent server and start a browser per image --
+        if hasattr(kaleido, 'start_sync_server'):
+            kaleido.start_sync_server(n=config.EXPORT_RENDERERS, silence_warnings=True)
+        _renderer_started = True
+
+
+# -- The streamlit template only has placeholder colors (filled in by the browser), images use plotly's own --
+def render_image(fig, file_format):
+    start_renderer()
+    fig = go.Figure(fig).update_layout(template=pio.templates.merge_templates('plotly', 'dviz'))
+    return pio.to_image(fig, format=file_format, validate=False)
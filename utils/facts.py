@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+ALL_SEXES = 'Both'
+ALL_GENERATIONS = 'All generations'
+
+# -- Constant per country and year, stored once --
+ECONOMIC_COLUMNS = ['GDP', 'GDPPerCapita', 'GrossNationalIncome', 'GNIPerCapita', 'InflationRate',
+                    'EmploymentPopulationRatio']
+
+# -- Depend on the sex / generation filter, stored per (Sex, Generation, CountryId, Year). Population is the
+# -- population of the country, the same on every row of a country-year (see utils/rates.py DENOMINATOR_PER) --
+FILTERED_AGGREGATIONS = {
+    'SuicideCount': 'sum',
+    'CauseSpecificDeathPercentage': 'max',
+    'DeathRatePer100K': 'max',
+    'Population': 'max',
+}
+
+FACT_KEYS = ['CountryId', 'Year']
+
+
+# -- Per country-year facts for every (Sex, Generation) filter, including 'Both' and 'All generations'. Rows without
+# -- a sex or generation count in the 'Both' / 'All generations' rows like in a groupby of the unfiltered rows, no
+# -- filter selects them on their own --
+def build_country_facts(df_suicides):
+    economics = df_suicides.groupby(FACT_KEYS)[ECONOMIC_COLUMNS].max().sort_index()
+
+    base = df_suicides.groupby(['Sex', 'Generation', *FACT_KEYS], observed=True, dropna=False).agg(
+        FILTERED_AGGREGATIONS)
+    base = base.reset_index()
+    base['Sex'] = base['Sex'].astype(str).where(base['Sex'].notna())
+    base['Generation'] = base['Generation'].astype(str).where(base['Generation'].notna())
+
+    # -- The 'all' rows are rolled up from the base cube, not from the raw rows --
+    all_generations = base.groupby(['Sex', *FACT_KEYS], dropna=False).agg(FILTERED_AGGREGATIONS).reset_index()
+    all_generations['Generation'] = ALL_GENERATIONS
+    all_sexes = base.groupby(['Generation', *FACT_KEYS], dropna=False).agg(FILTERED_AGGREGATIONS).reset_index()
+    all_sexes['Sex'] = ALL_SEXES
+    everything = base.groupby(FACT_KEYS).agg(FILTERED_AGGREGATIONS).reset_index()
+    everything['Sex'] = ALL_SEXES
+    everything['Generation'] = ALL_GENERATIONS
+
+    counts = pd.concat([base, all_generations, all_sexes, everything], ignore_index=True)
+    counts = counts[counts['Sex'].notna() & counts['Generation'].notna()]
+    counts = counts.set_index(['Sex', 'Generation', *FACT_KEYS]).sort_index()
+    return {'economics': economics, 'counts': counts}
+
+
+# -- Facts built per partition of years or countries (see utils/rollups.py) never share a row, merging is a sort --
+def merge_country_facts(parts):
+    return {name: pd.concat([part[name] for part in parts]).sort_index() for name in ('economics', 'counts')}
+
+
+# -- Same frame the Countries tab used to groupby, answered by a lookup in the fact table --
+def lookup_country_facts(facts, sex, generation, country_ids, country_names):
+    counts = facts['counts']
+    try:
+        selected = counts.xs((sex, generation), level=['Sex', 'Generation'])
+    except KeyError:
+        selected = counts.iloc[:0].droplevel(['Sex', 'Generation'])
+    selected = selected[selected.index.get_level_values('CountryId').isin(country_ids)]
+
+    economics = facts['economics'].reindex(selected.index)
+    result = pd.concat([selected, economics], axis=1).reset_index()
+    result.insert(0, 'CountryName', np.asarray(country_names)[result['CountryId'].to_numpy()])
+    return result
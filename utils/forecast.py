@@ -0,0 +1,160 @@
+import re
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from utils import config
+
+MODELS = {'linear': 'Linear trend', 'exponential': 'Exponential trend', 'holt': 'Holt'}
+
+# -- Smoothing parameters tried for every series, the pair with the smallest one-step-ahead error is kept --
+HOLT_ALPHAS = np.linspace(0.1, 0.9, 9)
+HOLT_BETAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5])
+
+# -- Fewer observations than this give no forecast --
+MIN_OBSERVATIONS = 3
+
+POPULATION_COLUMN = re.compile(r'^(\d{4})_Population$')
+
+
+# -- Quantile of the normal distribution for a two-sided interval, e.g. 1.96 for 95 --
+def interval_z(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 200)
+
+
+# -- Position of the last observation of every row, -1 for rows without any --
+def last_observed(valid):
+    last = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    return np.where(valid.any(axis=1), last, -1)
+
+
+# -- Least squares line of every row (N series x T times) at once, NaNs are skipped. The interval is the prediction
+# -- interval of a new observation at the horizon times (N x H) --
+def linear_forecast(values, times, horizon, z):
+    valid = np.isfinite(values)
+    n = valid.sum(axis=1)
+    t = np.where(valid, times, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_mean = t.sum(axis=1) / n
+        y_mean = np.where(valid, values, 0.0).sum(axis=1) / n
+        dt = np.where(valid, times - t_mean[:, None], 0.0)
+        dy = np.where(valid, values - y_mean[:, None], 0.0)
+        sxx = (dt * dt).sum(axis=1)
+        slope = (dt * dy).sum(axis=1) / sxx
+        residuals = np.where(valid, dy - slope[:, None] * dt, 0.0)
+        sigma = np.sqrt((residuals * residuals).sum(axis=1) / (n - 2))
+        offset = horizon - t_mean[:, None]
+        mean = y_mean[:, None] + slope[:, None] * offset
+        spread = z * sigma[:, None] * np.sqrt(1 + 1 / n[:, None] + offset * offset / sxx[:, None])
+    unusable = (n < MIN_OBSERVATIONS) | ~(sxx > 0)
+    mean[unusable] = np.nan
+    return mean, mean - spread, mean + spread
+
+
+# -- Line through the logarithm of the values (positive values only), so the forecast grows by a fixed rate --
+def exponential_forecast(values, times, horizon, z):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        logs = np.where(values > 0, np.log(values), np.nan)
+    mean, lower, upper = linear_forecast(logs, times, horizon, z)
+    return np.exp(mean), np.exp(lower), np.exp(upper)
+
+
+# -- Holt's linear trend (error correction form) for every row and every smoothing pair at once, one step per time.
+# -- Steps between two observations can be of any number of years (missing years, the population columns), the
+# -- trend is per year and the squared one-step errors are per year too (divided by the step). Returns the final
+# -- level and trend, the sum of the squared errors and their count --
+def holt_filter(values, times, alpha, beta):
+    shape = (len(alpha), values.shape[0])
+    level, trend = np.full(shape, np.nan), np.zeros(shape)
+    sse, errors = np.zeros(shape), np.zeros(values.shape[0])
+    last_time, seen = np.full(values.shape[0], np.nan), np.zeros(values.shape[0], dtype=int)
+
+    with np.errstate(invalid='ignore'):
+        for column, time in enumerate(times):
+            y = values[:, column]
+            valid = np.isfinite(y)
+            step = time - last_time
+            first, second, later = valid & (seen == 0), valid & (seen == 1), valid & (seen >= 2)
+
+            trend = np.where(second, (y - level) / step, trend)
+            expected = level + step * trend
+            error = y - expected
+            sse += np.where(later, error * error / step, 0.0)
+            errors += later
+            level = np.where(first | second, y, np.where(later, expected + alpha * error, level))
+            trend = np.where(later, trend + alpha * beta * error / step, trend)
+
+            last_time = np.where(valid, time, last_time)
+            seen += valid
+    return level, trend, sse, errors
+
+
+def holt_forecast(values, times, horizon, z):
+    alpha, beta = (grid.ravel()[:, None] for grid in np.meshgrid(HOLT_ALPHAS, HOLT_BETAS))
+    level, trend, sse, errors = holt_filter(values, times, alpha, beta)
+    best = np.argmin(np.where(np.isfinite(sse), sse, np.inf), axis=0)[None, :]
+    level, trend, sse = (np.take_along_axis(array, best, axis=0)[0] for array in (level, trend, sse))
+    alpha, beta = alpha[best[0], 0], beta[best[0], 0]
+
+    last = np.nanmax(np.where(np.isfinite(values), times, np.nan), axis=1)
+    steps = horizon - last[:, None]
+    mean = level[:, None] + steps * trend[:, None]
+
+    # -- Variance of the h-years-ahead error: sigma^2 * (1 + sum over j < h of (alpha * (1 + j * beta))^2) --
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma = np.sqrt(sse / errors)
+        years = np.arange(horizon.shape[1])[None, :]
+        weights = (alpha[:, None] * (1 + years * beta[:, None])) ** 2
+        variance = 1 + np.cumsum(weights, axis=1) - weights[:, :1]
+        spread = z * sigma[:, None] * np.sqrt(variance)
+    mean[errors < 2] = np.nan
+    return mean, mean - spread, mean + spread
+
+
+FORECASTS = {'linear': linear_forecast, 'exponential': exponential_forecast, 'holt': holt_forecast}
+
+
+# -- Forecasts of every model for every series (rows of values, one column per time), as one long frame with the
+# -- key columns, Model, Year, Forecast, Lower and Upper. Each series starts at its last observation (the band is
+# -- zero there), so the forecast line continues the history. Counts are never negative --
+def forecast_frame(keys, values, times, horizon=None, confidence=None):
+    horizon = horizon or config.FORECAST_YEARS
+    z = interval_z(confidence or config.FORECAST_CONFIDENCE)
+    values, times = np.asarray(values, dtype=float), np.asarray(times, dtype=float)
+
+    last = last_observed(np.isfinite(values))
+    has_data = last >= 0
+    keys, values, last = keys[has_data].reset_index(drop=True), values[has_data], last[has_data]
+    last_time, last_value = times[last], values[np.arange(len(values)), last]
+    future = last_time[:, None] + np.arange(1, horizon + 1)[None, :]
+
+    frames = []
+    for model, forecast in FORECASTS.items():
+        mean, lower, upper = forecast(values, times, future, z)
+        fitted = np.isfinite(mean).all(axis=1)
+        years = np.concatenate([last_time[:, None], future], axis=1)[fitted]
+        anchor = last_value[fitted, None]
+        frame = keys.iloc[np.repeat(np.flatnonzero(fitted), horizon + 1)].reset_index(drop=True)
+        frame['Model'] = model
+        frame['Year'] = years.ravel().astype(int)
+        frame['Forecast'] = np.concatenate([anchor, mean[fitted]], axis=1).ravel()
+        frame['Lower'] = np.maximum(np.concatenate([anchor, lower[fitted]], axis=1).ravel(), 0)
+        frame['Upper'] = np.concatenate([anchor, upper[fitted]], axis=1).ravel()
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+# -- Population of every country of df_pop (1970-2022) and the suicides of every (Sex, Generation, country) series
+# -- of the country facts (see utils/facts.py), indexed for the lookups of the Countries tab --
+def build_forecasts(df_pop, counts):
+    population_columns = {column: int(match.group(1)) for column in df_pop.columns
+                          if (match := POPULATION_COLUMN.match(column))}
+    population_columns = dict(sorted(population_columns.items(), key=lambda item: item[1]))
+    population = forecast_frame(df_pop[['CountryId']], df_pop[list(population_columns)],
+                                list(population_columns.values()))
+
+    suicides = counts['SuicideCount'].unstack('Year')
+    suicides = forecast_frame(suicides.index.to_frame(index=False), suicides, suicides.columns)
+    return {'population': population.set_index(['Model', 'CountryId']).sort_index(),
+            'suicides': suicides.set_index(['Model', 'Sex', 'Generation', 'CountryId']).sort_index()}
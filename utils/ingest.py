@@ -0,0 +1,58 @@
+import pandas as pd
+
+from utils.countries import build_country_dimension, canonicalize_countries
+from utils.disk_cache import disk_cache
+from utils.encoding import encode_datasets
+from utils.plugins import PLUGINS, check_schema
+from utils.quality import clean_population, null_issues, quality_report, unmatched_issues
+from utils.suicides import SUICIDES
+
+# -- Raw data files, their fingerprint is part of every cache key (memory and disk, see utils/disk_cache.py) --
+DATA_FILES = {
+    'pop': './csv_files/world_population_revisited.csv',
+    'suicides': SUICIDES['file'],
+    'continent': './csv_files/continents.csv',
+}
+
+
+# -- Data files of an indicator dataset, the population dataset gives the country names --
+def plugin_files(name):
+    return [DATA_FILES['pop'], PLUGINS[name]['file']]
+
+
+# -- Reads a dataset plugin's file, checks it against the declared schema and applies its normalization --
+def read_plugin(name):
+    plugin = PLUGINS[name]
+    df, issues = check_schema(name, pd.read_csv(plugin['file']), plugin['schema'])
+    df, normalize_issues = plugin['normalize'](df)
+    return df, issues + normalize_issues
+
+
+# -- Reads, checks and cleans the datasets once per data version (see utils/quality.py), then joins the country
+# -- names and encodes the label columns. Returns the frames, the unmatched country names and the quality report --
+@disk_cache('frames')
+def ingest_datasets(fingerprint):
+    df_pop, issues = clean_population(pd.read_csv(DATA_FILES['pop']))
+    df_suicides, suicide_issues = read_plugin('suicides')
+    df_continent = pd.read_csv(DATA_FILES['continent'])
+    issues += suicide_issues + null_issues('continent', df_continent)
+
+    # -- All datasets use the country names of the population dataset, see utils/countries.py --
+    datasets, df_unmatched = canonicalize_countries({'pop': df_pop, 'suicides': df_suicides,
+                                                     'continent': df_continent})
+    encoded, vocabularies = encode_datasets(datasets)
+    df_countries = build_country_dimension(encoded, vocabularies['country'])
+    df_quality = quality_report(issues + unmatched_issues(df_unmatched))
+    return encoded['pop'], encoded['suicides'], encoded['continent'], df_countries, df_unmatched, df_quality
+
+
+# -- The same ingestion for any other indicator dataset, see utils/plugins.py --
+@disk_cache('frames')
+def ingest_plugin(name, fingerprint):
+    df_pop, issues = clean_population(pd.read_csv(DATA_FILES['pop']))
+    df, plugin_issues = read_plugin(name)
+    datasets, df_unmatched = canonicalize_countries({'pop': df_pop, name: df})
+    encoded, vocabularies = encode_datasets(datasets)
+    df_countries = build_country_dimension(encoded, vocabularies['country'])
+    df_quality = quality_report(issues + plugin_issues + unmatched_issues(df_unmatched))
+    return encoded['pop'], encoded[name], df_countries, df_unmatched, df_quality
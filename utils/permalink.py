@@ -0,0 +1,44 @@
+# -- View state in the query string, always in this order: ?tab=..&years=..&continents=..&countries=..&sex=..&... --
+VIEW_PARAMS = ('tab', 'years', 'continents', 'countries', 'sex', 'generation', 'forecast', 'metric')
+LIST_PARAMS = {'continents', 'countries'}
+
+
+# -- Reads the view from the query parameters (a dict of lists), values that aren't valid options are dropped --
+def parse_view(params, options, defaults):
+    view = {}
+    for name in VIEW_PARAMS:
+        values = [value for value in params.get(name, []) if value in options[name]]
+        if name in LIST_PARAMS:
+            view[name] = values
+        else:
+            view[name] = values[0] if values else defaults[name]
+    return view
+
+
+# -- The same view always gives the same parameters: fixed order, sorted unique lists, no default values --
+def canonical_params(view, defaults):
+    params = {}
+    for name in VIEW_PARAMS:
+        value = view.get(name, defaults.get(name))
+        if name in LIST_PARAMS:
+            value = sorted(set(value or []))
+            if value:
+                params[name] = value
+        elif value is not None and value != defaults.get(name):
+            params[name] = str(value)
+    return params
+
+
+# -- Hashable form of the canonical parameters, used as the cache key of a view --
+def view_key(params):
+    return tuple((name, tuple(value) if isinstance(value, list) else value) for name, value in params.items())
+
+
+# -- A range of years is a single parameter, ?years=1995-2010 --
+def years_param(years):
+    return f'{years[0]}-{years[1]}'
+
+
+def parse_years(value):
+    start, end = value.split('-')
+    return int(start), int(end)
@@ -0,0 +1,154 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+from utils import config
+from utils.countries import COUNTRY_COLUMNS
+from utils.encoding import SHARED_VOCABULARIES, decode
+from utils.quality import issue
+from utils.rates import build_rate_arrays, build_year_cube
+from utils.render import WIDE_CHART_WIDTH, animated_bar_figure, line_figure
+
+# -- Indicator datasets, by name. A dataset is declared once (see utils/suicides.py) and the shared engine does the
+# -- rest: ingestion with schema and quality checks (utils/ingest.py), rate arrays and year cubes of its rollups
+# -- (utils/rates.py) and its default charts --
+PLUGINS = {}
+
+# -- What a dataset declares:
+# --   title      display name
+# --   file       CSV file, part of the data fingerprint
+# --   schema     required columns and their type ('str', 'int' or 'float')
+# --   normalize  df -> (df, quality issues), fixes applied once at ingestion (see utils/quality.py)
+# --   country    (name column, code column) joined to the countries of the population dataset
+# --   labels     {vocabulary: column}, label columns encoded with the shared vocabularies (see utils/encoding.py)
+# --   measure    the value of the charts, either a rate or a mean:
+# --              dict(numerator, denominator, rate, scale, title): the sum of the numerator over the sum of the
+# --              denominator times scale (e.g. suicides per 100K), with `per` the columns a denominator repeated on
+# --              several rows is counted once for (see utils/rates.py)
+# --              dict(value, rate, title) and optionally weight: the mean of the value column of the rows (e.g. life
+# --              expectancy), weighted by the weight column (e.g. the population of the row), named `rate`
+# --   rollups    {name: dict(by, where)} aggregations of the measure, by columns including Year
+# --   charts     {name: dict(rollup, kind ('line' or 'bar'), title, x, color, color_map, wide)} default charts, bars
+# --              are drawn per x (default RegionName), colored by color and animated over the years
+# -- and optionally:
+# --   keys       columns of the rate arrays, by default the columns of the rollups
+# --   page       page of its own, datasets without one are shown on the Indicators page --
+PLUGIN_KEYS = ('title', 'file', 'schema', 'normalize', 'country', 'labels', 'measure', 'rollups', 'charts')
+MEASURE_KEYS = {'rate': ('numerator', 'denominator', 'rate', 'scale', 'title'), 'mean': ('value', 'rate', 'title')}
+CHART_KINDS = ('line', 'bar')
+SCHEMA_TYPES = ('str', 'int', 'float')
+
+_loaded_modules = set()
+
+
+def register_plugin(name, **plugin):
+    missing = [key for key in PLUGIN_KEYS if key not in plugin]
+    if missing:
+        raise ValueError(f'Dataset plugin {name!r} does not declare {", ".join(missing)}')
+    kind = measure_kind(plugin['measure'])
+    missing = [key for key in MEASURE_KEYS[kind] if key not in plugin['measure']]
+    if missing:
+        raise ValueError(f'The {kind} measure of dataset plugin {name!r} does not declare {", ".join(missing)}')
+    if kind == 'mean' and plugin['measure'].get('per'):
+        raise ValueError(f'The mean measure of dataset plugin {name!r} can not declare per, every row has its own '
+                         'weight')
+    unknown_types = {column: kind for column, kind in plugin['schema'].items() if kind not in SCHEMA_TYPES}
+    if unknown_types:
+        raise ValueError(f'Dataset plugin {name!r} has unknown column types {unknown_types}')
+    for chart_name, chart in plugin['charts'].items():
+        if chart['rollup'] not in plugin['rollups'] or chart['kind'] not in CHART_KINDS:
+            raise ValueError(f'Chart {chart_name!r} of dataset plugin {name!r} needs a declared rollup and a kind of '
+                             f'{", ".join(CHART_KINDS)}')
+        if chart['kind'] == 'bar' and 'color' not in chart:
+            raise ValueError(f'Bar chart {chart_name!r} of dataset plugin {name!r} needs a color column')
+
+    # -- The country join and the label encoding look the dataset up by its name --
+    COUNTRY_COLUMNS[name] = plugin['country']
+    for vocabulary, column in plugin['labels'].items():
+        columns = SHARED_VOCABULARIES.setdefault(vocabulary, [])
+        if (name, column) not in columns:
+            columns.append((name, column))
+    PLUGINS[name] = plugin
+    return plugin
+
+
+# -- Plugin modules of DVIZ_PLUGINS, imported on first use --
+def load_plugins():
+    for module in filter(None, (module.strip() for module in config.PLUGINS.split(','))):
+        if module not in _loaded_modules:
+            importlib.import_module(module)
+            _loaded_modules.add(module)
+    return PLUGINS
+
+
+# -- Declared columns must exist. Values that don't convert to the declared type are set to missing and reported --
+def check_schema(name, df, schema):
+    missing = [column for column in schema if column not in df.columns]
+    if missing:
+        raise ValueError(f'The {name} dataset has no column {", ".join(missing)}')
+    df = df.copy()
+    issues = []
+    for column, kind in schema.items():
+        if kind == 'str':
+            continue
+        values = pd.to_numeric(df[column], errors='coerce')
+        invalid = values.isna() & df[column].notna()
+        if kind == 'int':
+            invalid |= values.notna() & (values != np.round(values))
+            values = values.where(~invalid).astype('Int64' if values.isna().any() else 'int64')
+        if invalid.any():
+            issues.append(issue(name, f'Not {kind}', column, invalid.sum(), 'fixed', 'Set to missing'))
+        df[column] = values
+    return df, issues
+
+
+# -- Columns the rollups of a dataset group or filter by --
+def rollup_keys(plugin):
+    keys = {'Year'}
+    for rollup in plugin['rollups'].values():
+        keys.update(rollup['by'])
+        keys.update(column for column, _, _ in rollup.get('where') or [])
+    return sorted(keys)
+
+
+def measure_kind(measure):
+    return 'mean' if 'value' in measure else 'rate'
+
+
+# -- Numerator/denominator arrays of the measure (see utils/rates.py). A mean is a rate too: the sum of the weighted
+# -- values over the sum of the weights (1 per row without a weight column), rows without a value count in neither --
+def build_plugin_arrays(plugin, df):
+    measure = plugin['measure']
+    keys = plugin.get('keys') or rollup_keys(plugin)
+    if measure_kind(measure) == 'rate':
+        return build_rate_arrays(df, measure['numerator'], measure['denominator'], measure['rate'], measure['scale'],
+                                 keys, measure.get('per'))
+
+    weight = measure.get('weight')
+    weights = df[weight].to_numpy(dtype=float) if weight else np.ones(len(df))
+    total, weight = f'{measure["value"]}Total', weight or 'Rows'
+    df = df[keys].assign(**{total: df[measure['value']].to_numpy(dtype=float) * weights, weight: weights})
+    return build_rate_arrays(df, total, weight, measure['rate'], 1, keys, None)
+
+
+# -- Per group prefix sums over the years of every rollup of a dataset, a window of years is two lookups per group --
+def build_plugin_cubes(plugin, arrays):
+    return {name: build_year_cube(arrays, [column for column in rollup['by'] if column != 'Year'],
+                                  rollup.get('where'))
+            for name, rollup in plugin['rollups'].items()}
+
+
+# -- Default chart of a dataset from the yearly data of its rollup (see utils/rates.py window_series) --
+def plugin_figure(plugin, chart_name, data, years):
+    chart, measure = plugin['charts'][chart_name], plugin['measure']
+    labels = {measure['rate']: measure['title'], 'RegionName': 'Continent', 'Year': 'Year'}
+    title = f'{chart["title"]} ({years[0]} - {years[1]})'
+    width = WIDE_CHART_WIDTH if chart.get('wide', True) else None
+    data = decode(data)
+    if chart['kind'] == 'bar':
+        return animated_bar_figure(data, x=chart.get('x', 'RegionName'), y=measure['rate'], color=chart['color'],
+                                   frame='Year', color_map=chart.get('color_map'), width=width, labels=labels,
+                                   title=title)
+    return line_figure(data, x='Year', y=measure['rate'], color=chart.get('color'), color_map=chart.get('color_map'),
+                       width=width, labels=labels, title=title)
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+# -- Region names of the suicide dataset, shortened to the continent names of the choropleth map --
+REGION_RENAMES = {
+    'Central and South America': 'South America',
+    'North America and the Caribbean': 'North America',
+}
+
+# -- Relative difference between DeathRatePer100K and SuicideCount / Population * 100K that is reported --
+RATE_TOLERANCE = 0.01
+
+# -- Names listed in the details of a report row --
+DETAIL_EXAMPLES = 5
+
+REPORT_COLUMNS = ['Dataset', 'Check', 'Column', 'Rows', 'Action', 'Details']
+
+
+def issue(dataset, check, column, rows, action, details=''):
+    return {'Dataset': dataset, 'Check': check, 'Column': column, 'Rows': int(rows), 'Action': action,
+            'Details': details}
+
+
+def examples(names):
+    names = [str(name) for name in names]
+    return ', '.join(names[:DETAIL_EXAMPLES]) + (f' and {len(names) - DETAIL_EXAMPLES} more'
+                                                 if len(names) > DETAIL_EXAMPLES else '')
+
+
+# -- Missing values of every column, counted for all columns at once --
+def null_issues(dataset, df):
+    nulls = df.isna().sum()
+    return [issue(dataset, 'Missing values', column, count, 'flagged') for column, count in nulls[nulls > 0].items()]
+
+
+# -- Countries with missing years between their first and last year --
+def year_gap_issues(dataset, df, country_column):
+    years = df.groupby(country_column, observed=True)['Year'].agg(['min', 'max', 'nunique'])
+    gaps = (years['max'] - years['min'] + 1 - years['nunique']).sort_values(ascending=False)
+    gaps = gaps[gaps > 0]
+    if gaps.empty:
+        return []
+    return [issue(dataset, 'Year gaps', 'Year', len(gaps), 'flagged',
+                  f'{int(gaps.sum())} missing country-years: '
+                  + examples(f'{name} ({count})' for name, count in gaps.items()))]
+
+
+# -- Population dataset: rows without a continent can't be placed on any chart and are dropped --
+def clean_population(df_pop):
+    issues = null_issues('pop', df_pop)
+    no_continent = df_pop['Continent'].isna()
+    if no_continent.any():
+        issues.append(issue('pop', 'No continent', 'Continent', no_continent.sum(), 'dropped',
+                            examples(df_pop.loc[no_continent, 'Country'])))
+    return df_pop[~no_continent], issues
+
+
+# -- Suicide dataset: counts, rates and region names are fixed once here, the charts use the data as it is --
+def clean_suicides(df_suicides):
+    issues = null_issues('suicides', df_suicides)
+    df_suicides = df_suicides.copy()
+    count, population = df_suicides['SuicideCount'], df_suicides['Population']
+
+    # -- Rates that don't match the counts, checked on the counts as reported --
+    with np.errstate(invalid='ignore', divide='ignore'):
+        computed = count / population.where(population > 0) * 1e5
+        difference = (df_suicides['DeathRatePer100K'] - computed).abs() / computed.abs().clip(lower=1e-9)
+    inconsistent = difference > RATE_TOLERANCE
+    if inconsistent.any():
+        issues.append(issue('suicides', 'Rate does not match count / population', 'DeathRatePer100K',
+                            inconsistent.sum(), 'flagged',
+                            f'Up to {difference[inconsistent].max():.0%} off; the charts compute their rates from '
+                            'SuicideCount and Population'))
+
+    # -- Population is the population of the country in the year, the same on every sex and age group row (see
+    # -- utils/rates.py DENOMINATOR_PER). Country-years with several values get the largest, as the facts keep it --
+    country_years = df_suicides.groupby(['CountryName', 'Year'], observed=True)['Population']
+    largest = country_years.transform('max')
+    varying = country_years.transform('nunique') > 1
+    if varying.any():
+        names = df_suicides.loc[varying, ['CountryName', 'Year']].drop_duplicates()
+        df_suicides.loc[varying, 'Population'] = largest[varying]
+        issues.append(issue('suicides', 'Population differs within a country-year', 'Population', varying.sum(),
+                            'fixed', f'{len(names)} country-years set to their largest population: '
+                            + examples(f'{name} {year}' for name, year in names.itertuples(index=False))))
+        population = df_suicides['Population']
+
+    not_positive = population <= 0
+    if not_positive.any():
+        issues.append(issue('suicides', 'Zero or negative population', 'Population', not_positive.sum(), 'flagged',
+                            'Left out of the rates per 100K'))
+
+    negative = count < 0
+    if negative.any():
+        df_suicides.loc[negative, 'SuicideCount'] = np.nan
+        issues.append(issue('suicides', 'Negative suicide count', 'SuicideCount', negative.sum(), 'fixed',
+                            'Set to missing'))
+
+    # -- A reported row with a count of 0 is a single case, as it should have been --
+    zero = count == 0
+    if zero.any():
+        df_suicides.loc[zero, 'SuicideCount'] = 1
+        issues.append(issue('suicides', 'Zero suicide count', 'SuicideCount', zero.sum(), 'fixed', 'Set to 1'))
+
+    renamed = df_suicides['RegionName'].isin(list(REGION_RENAMES))
+    if renamed.any():
+        df_suicides['RegionName'] = df_suicides['RegionName'].replace(REGION_RENAMES)
+        issues.append(issue('suicides', 'Region renamed', 'RegionName', renamed.sum(), 'fixed',
+                            examples(f'{old} → {new}' for old, new in REGION_RENAMES.items())))
+
+    issues += year_gap_issues('suicides', df_suicides, 'CountryName')
+    return df_suicides, issues
+
+
+# -- Country names of the suicide and continent datasets without a match in the population dataset (see
+# -- utils/countries.py), they are kept under their own name --
+def unmatched_issues(df_unmatched):
+    return [issue(source, 'Unmatched country names', 'Country', names['Rows'].sum(), 'flagged',
+                  examples(names['Name']))
+            for source, names in df_unmatched.groupby('Source')]
+
+
+def quality_report(issues):
+    return pd.DataFrame(issues, columns=REPORT_COLUMNS)
@@ -0,0 +1,180 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import config
+
+# -- Filters are (column, operator, value) triples --
+OPERATORS = {'==', '!=', 'in', 'not in'}
+
+
+def check_where(where):
+    for column, operator, value in where or []:
+        if operator not in OPERATORS:
+            raise ValueError(f'Unsupported operator {operator!r} on {column!r}, use one of {sorted(OPERATORS)}')
+
+
+# -- Logical queries on the pandas frames, the reference every other backend has to match --
+class PandasBackend:
+    name = 'pandas'
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def mask(self, df, where):
+        mask = np.ones(len(df), dtype=bool)
+        for column, operator, value in where or []:
+            if operator == '==':
+                mask &= (df[column] == value).to_numpy()
+            elif operator == '!=':
+                mask &= (df[column] != value).to_numpy()
+            elif operator == 'in':
+                mask &= df[column].isin(value).to_numpy()
+            else:
+                mask &= ~df[column].isin(value).to_numpy()
+        return mask
+
+    # -- SELECT by, SUM(values) FROM table WHERE ... GROUP BY by ORDER BY by --
+    def aggregate(self, table, by, values, where=None):
+        check_where(where)
+        values = [values] if isinstance(values, str) else list(values)
+        df = self.tables[table]
+        columns = list(dict.fromkeys([*by, *values, *(column for column, _, _ in where or [])]))
+        df = df[columns]
+        if where:
+            df = df[self.mask(df, where)]
+        return df.groupby(by, observed=True, sort=True)[values].sum().reset_index()
+
+    # -- SELECT columns FROM table WHERE ... --
+    def select(self, table, columns, where=None):
+        check_where(where)
+        df = self.tables[table]
+        if where:
+            df = df[self.mask(df, where)]
+        return df[list(columns)].reset_index(drop=True)
+
+
+# -- The same logical queries on an embedded DuckDB database, over the frames or over Parquet files --
+class DuckDBBackend:
+    name = 'duckdb'
+
+    def __init__(self, tables, parquet_dir='', threads=0):
+        import duckdb
+
+        self.tables = tables
+        self.parquet_dir = parquet_dir
+        self.connection = duckdb.connect(database=':memory:')
+        if threads:
+            self.connection.execute(f'SET threads = {int(threads)}')
+
+    def source(self, table):
+        if self.parquet_dir:
+            path = os.path.join(self.parquet_dir, f'{table}.parquet').replace("'", "''")
+            return f"read_parquet('{path}')"
+        return quote(table)
+
+    def where_clause(self, where):
+        if not where:
+            return '', []
+        conditions, parameters = [], []
+        for column, operator, value in where:
+            if operator in ('==', '!='):
+                conditions.append(f"{quote(column)} {'=' if operator == '==' else '<>'} ?")
+                parameters.append(value)
+            else:
+                value = list(value)
+                if not value:
+                    conditions.append('FALSE' if operator == 'in' else 'TRUE')
+                    continue
+                placeholders = ', '.join('?' * len(value))
+                conditions.append(f"{quote(column)} {'IN' if operator == 'in' else 'NOT IN'} ({placeholders})")
+                parameters.extend(value)
+        return ' WHERE ' + ' AND '.join(conditions), parameters
+
+    def run(self, sql, parameters):
+        # -- A cursor per query, DuckDB connections must not be shared between threads. Registered frames are
+        # -- local to a cursor, registering is zero-copy --
+        cursor = self.connection.cursor()
+        if not self.parquet_dir:
+            for name, df in self.tables.items():
+                cursor.register(name, df)
+        return cursor.execute(sql, [to_python(value) for value in parameters]).df()
+
+    def aggregate(self, table, by, values, where=None):
+        check_where(where)
+        values = [values] if isinstance(values, str) else list(values)
+        source = self.tables.get(table)
+        keys = ', '.join(quote(column) for column in by)
+        # -- fsum is a compensated sum like pandas' groupby sum, integer sums stay integers --
+        sums = ', '.join(sum_expression(column, source) for column in values)
+        where_sql, parameters = self.where_clause(where)
+        sql = (f'SELECT {keys}, {sums} FROM {self.source(table)}{where_sql} '
+               f'GROUP BY {keys} ORDER BY {keys}')
+        return match_dtypes(self.run(sql, parameters), source)
+
+    def select(self, table, columns, where=None):
+        check_where(where)
+        where_sql, parameters = self.where_clause(where)
+        sql = f"SELECT {', '.join(quote(column) for column in columns)} FROM {self.source(table)}{where_sql}"
+        return match_dtypes(self.run(sql, parameters), self.tables.get(table))
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def to_python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def sum_expression(column, source):
+    if source is not None and pd.api.types.is_integer_dtype(source[column].dtype):
+        return f'CAST(COALESCE(SUM({quote(column)}), 0) AS BIGINT) AS {quote(column)}'
+    return f'COALESCE(fsum({quote(column)}), 0) AS {quote(column)}'
+
+
+# -- Results use the dtypes of the pandas frames (categoricals, integer widths), so both paths are identical --
+def match_dtypes(result, source):
+    if source is None:
+        return result
+    for column in result.columns:
+        if column in source.columns and result[column].dtype != source[column].dtype:
+            result[column] = result[column].astype(source[column].dtype)
+    return result
+
+
+# -- Writes the tables as Parquet files, DuckDB then scans the files instead of the frames. Every data version gets
+# -- a directory of its own, a file is written under a temporary name and renamed, so a reader (another server
+# -- process) never sees a half written or an older version's file. Files already there are kept --
+def export_parquet(tables, directory):
+    os.makedirs(directory, exist_ok=True)
+    for name, df in tables.items():
+        path = os.path.join(directory, f'{name}.parquet')
+        if os.path.exists(path):
+            continue
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            df.to_parquet(temporary, index=False)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+
+# -- Backend chosen by DVIZ_QUERY_BACKEND, over the tables of the data version `fingerprint` --
+def create_backend(tables, fingerprint, backend=None):
+    backend = backend or config.QUERY_BACKEND
+    if backend == 'pandas':
+        return PandasBackend(tables)
+    if backend == 'duckdb':
+        parquet_dir = os.path.join(config.DUCKDB_PARQUET_DIR, fingerprint) if config.DUCKDB_PARQUET_DIR else ''
+        try:
+            backend = DuckDBBackend(tables, parquet_dir=parquet_dir, threads=config.DUCKDB_THREADS)
+        except ImportError as error:
+            raise ImportError('DVIZ_QUERY_BACKEND=duckdb needs the duckdb package: pip install duckdb') from error
+        if parquet_dir:
+            export_parquet(tables, parquet_dir)
+        return backend
+    raise ValueError(f'Unknown query backend {backend!r}, use pandas or duckdb')
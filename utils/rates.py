@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+from utils.query import check_where
+
+NUMERATOR = 'SuicideCount'
+DENOMINATOR = 'Population'
+RATE = 'DeathRatePer100K'
+RATE_SCALE = 1e5
+TOTAL = 'Total'
+
+# -- Columns a rate can be grouped or filtered by --
+RATE_KEYS = ('RegionName', 'CountryId', 'Year', 'Sex', 'AgeGroup', 'Generation')
+
+# -- Population is the population of the country in the year, repeated on every sex and age group row (checked at
+# -- ingestion, see utils/quality.py). It counts once per group and country-year, a rate by sex or age group is per
+# -- 100K people of the country, and the rates of the sexes add up to the rate of the country --
+DENOMINATOR_PER = ('CountryId', 'Year')
+
+
+# -- Integer codes of a key column and the column values of every code --
+def key_codes(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.dtype
+    codes, uniques = pd.factorize(column, sort=True)
+    return codes, uniques
+
+
+def key_values(codes, values):
+    if isinstance(values, pd.CategoricalDtype):
+        return pd.Categorical.from_codes(codes, dtype=values)
+    return values.take(codes)
+
+
+def key_size(values):
+    return len(values.categories) if isinstance(values, pd.CategoricalDtype) else len(values)
+
+
+# -- Numerator and denominator of a rate (the suicide rate per 100K by default) as float arrays and the keys as
+# -- integer codes, built once per data version. Rows without a usable denominator count in neither sum, only in the
+# -- total of the numerator. A denominator repeated on the rows of the `per` columns is summed once per group and
+# -- value of them, without `per` every row has its own. The column names and the scale travel with the arrays --
+def build_rate_arrays(df, numerator=NUMERATOR, denominator=DENOMINATOR, rate=RATE, scale=RATE_SCALE, keys=RATE_KEYS,
+                      per=DENOMINATOR_PER):
+    numerator_values = df[numerator].to_numpy(dtype=float)
+    denominator_values = df[denominator].to_numpy(dtype=float)
+    usable = np.isfinite(numerator_values) & np.isfinite(denominator_values) & (denominator_values > 0)
+    units = df.groupby(list(per), observed=True, sort=False, dropna=False).ngroup().to_numpy() if per else None
+    return {
+        'numerator': np.where(usable, numerator_values, 0.0),
+        'denominator': np.where(usable, denominator_values, 0.0),
+        'total': np.where(np.isfinite(numerator_values), numerator_values, 0.0),
+        'usable': usable,
+        'units': units,
+        'keys': {column: key_codes(df[column]) for column in keys},
+        'columns': (numerator, denominator, rate),
+        'scale': scale,
+    }
+
+
+# -- Rows of the arrays that pass (column, operator, value) filters, see utils/query.py --
+def rate_mask(arrays, where=None, usable_only=True):
+    check_where(where)
+    mask = arrays['usable'].copy() if usable_only else np.ones(len(arrays['usable']), dtype=bool)
+    for column, operator, value in where or []:
+        codes, values = arrays['keys'][column]
+        labels = values.categories if isinstance(values, pd.CategoricalDtype) else values
+        selected = np.flatnonzero(pd.Index(labels).isin([value] if operator in ('==', '!=') else list(value)))
+        matches = np.isin(codes, selected)
+        mask &= matches if operator in ('==', 'in') else ~matches
+    return mask
+
+
+# -- Denominator of the masked rows in the groups `ids`, zero on the rows that repeat the denominator of a row before
+# -- them in the same group and unit --
+def denominator_weights(arrays, ids, mask):
+    values = arrays['denominator'][mask]
+    if arrays['units'] is None:
+        return values
+    units = arrays['units'][mask]
+    usable = np.flatnonzero(arrays['usable'][mask])
+    pairs = ids[usable].astype(np.int64) * (units.max(initial=0) + 1) + units[usable]
+    first = np.zeros(len(values), dtype=bool)
+    first[usable[np.unique(pairs, return_index=True)[1]]] = True
+    return np.where(first, values, 0.0)
+
+
+# -- Weighted rate for any grouping (e.g. suicides per 100K: total suicides over total population), as two
+# -- bincounts and a divide. Groups are sorted like a groupby (observed=True, sort=True) --
+def weighted_rates(arrays, by, where=None):
+    mask = rate_mask(arrays, where)
+    keys = [arrays['keys'][column] for column in by]
+    sizes = [key_size(values) for _, values in keys]
+    for codes, _ in keys:
+        mask &= codes >= 0
+
+    ids = np.ravel_multi_index([codes[mask] for codes, _ in keys], sizes) if by else np.zeros(mask.sum(), dtype=int)
+    size = int(np.prod(sizes)) if by else 1
+    rows = np.bincount(ids, minlength=size)
+    numerator = np.bincount(ids, arrays['numerator'][mask], size)
+    denominator = np.bincount(ids, denominator_weights(arrays, ids, mask), size)
+
+    present = np.flatnonzero(rows)
+    group_codes = np.unravel_index(present, sizes) if by else []
+    result = pd.DataFrame({column: key_values(codes, values)
+                           for column, codes, (_, values) in zip(by, group_codes, keys)})
+    numerator_column, denominator_column, rate_column = arrays['columns']
+    result[numerator_column] = numerator[present]
+    result[denominator_column] = denominator[present]
+    result[rate_column] = numerator[present] / denominator[present] * arrays['scale']
+    return result
+
+
+# -- Per group prefix sums over the years, so the totals of any [start, end] window are O(1) per group. Groups are
+# -- the combinations of `by` (without Year) present in the rows that pass the filters. TOTAL also counts the
+# -- numerator of rows without a usable denominator --
+def build_year_cube(arrays, by, where=None):
+    mask = rate_mask(arrays, where, usable_only=False)
+    keys = [arrays['keys'][column] for column in by]
+    year_codes, years = arrays['keys']['Year']
+    for codes, _ in keys:
+        mask &= codes >= 0
+    mask &= year_codes >= 0
+
+    sizes = [key_size(values) for _, values in keys]
+    group_ids = (np.ravel_multi_index([codes[mask] for codes, _ in keys], sizes) if by
+                 else np.zeros(mask.sum(), dtype=int))
+    groups, group_index = np.unique(group_ids, return_inverse=True)
+    ids = group_index * len(years) + year_codes[mask]
+    shape = (len(groups), len(years))
+
+    def prefix(weights=None):
+        sums = np.bincount(ids, weights, shape[0] * shape[1]).reshape(shape)
+        return np.concatenate([np.zeros((shape[0], 1)), np.cumsum(sums, axis=1)], axis=1)
+
+    group_codes = np.unravel_index(groups, sizes) if by else []
+    labels = pd.DataFrame({column: key_values(codes, values)
+                           for column, codes, (_, values) in zip(by, group_codes, keys)}, index=range(len(groups)))
+    return {'labels': labels, 'years': np.asarray(years), 'rows': prefix(),
+            'numerator': prefix(arrays['numerator'][mask]),
+            'denominator': prefix(denominator_weights(arrays, ids, mask)),
+            'total': prefix(arrays['total'][mask]), 'columns': arrays['columns'], 'scale': arrays['scale']}
+
+
+# -- Prefix positions of a [start, end] window of years (inclusive) --
+def window_bounds(cube, start, end):
+    return np.searchsorted(cube['years'], start, 'left'), np.searchsorted(cube['years'], end, 'right')
+
+
+def window_frame(cube, labels, sums):
+    numerator_column, denominator_column, rate_column = cube['columns']
+    result = labels.reset_index(drop=True)
+    result[TOTAL] = sums['total']
+    result[numerator_column] = sums['numerator']
+    result[denominator_column] = sums['denominator']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result[rate_column] = np.where(sums['denominator'] > 0,
+                                       sums['numerator'] / sums['denominator'] * cube['scale'], np.nan)
+    return result
+
+
+# -- Totals and rate of every group over the years start..end, from two prefix lookups per group --
+def window_totals(cube, start, end):
+    first, last = window_bounds(cube, start, end)
+    sums = {name: cube[name][:, last] - cube[name][:, first] for name in ('rows', 'total', 'numerator', 'denominator')}
+    present = sums.pop('rows') > 0
+    return window_frame(cube, cube['labels'][present], {name: values[present] for name, values in sums.items()})
+
+
+# -- Yearly totals and rate of every group for the years start..end, sorted by group and year --
+def window_series(cube, start, end):
+    first, last = window_bounds(cube, start, end)
+    sums = {name: np.diff(cube[name][:, first:last + 1], axis=1)
+            for name in ('rows', 'total', 'numerator', 'denominator')}
+    groups, years = np.nonzero(sums.pop('rows'))
+    result = window_frame(cube, cube['labels'].iloc[groups],
+                          {name: values[groups, years] for name, values in sums.items()})
+    result.insert(len(cube['labels'].columns), 'Year', cube['years'][first:last][years])
+    return result
+
+
+# -- Total of the numerator over the years start..end by the values of one key column, summed over the groups of the
+# -- cube whose columns are in the selected values ({column: values}). Indexed by every value of the key, in the order
+# -- of its vocabulary, so the totals are aligned by label (values without suicides are 0) --
+def window_breakdown(cube, start, end, key, selection):
+    first, last = window_bounds(cube, start, end)
+    labels = cube['labels']
+    selected = np.ones(len(labels), dtype=bool)
+    for column, values in selection.items():
+        selected &= labels[column].isin(values).to_numpy()
+
+    codes, values = key_codes(labels[key])
+    totals = cube['total'][selected, last] - cube['total'][selected, first]
+    names = values.categories if isinstance(values, pd.CategoricalDtype) else values
+    return pd.Series(np.bincount(codes[selected], totals, len(names)), index=pd.Index(names, name=key), name=TOTAL)
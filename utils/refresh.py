@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from utils import config
+from utils.disk_cache import dataset_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# -- Sessions that did not rerun for this long no longer count in the status --
+ACTIVE_SESSION_SECONDS = 30 * 60
+
+_refreshers = {}
+_refreshers_lock = threading.Lock()
+
+
+# -- Stale-while-revalidate: sessions are served the last complete data version while a newer one (new data files)
+# -- is built on a background thread, the version is swapped in once everything it needs is cached. `build` runs
+# -- outside of any script run, it must not call streamlit; what it returns is kept for the live version --
+class DataRefresher:
+    def __init__(self, paths, build):
+        self.paths = paths
+        self.build = build
+        self.lock = threading.Lock()
+        self.building = threading.Lock()
+        self.results = {}
+        self.version = dataset_fingerprint(paths)
+        self.built_at = time.time()
+        self.pending = None
+        self.failed = None
+        self.error = None
+        self.checked_at = time.monotonic()
+        self.sessions = {}
+
+    # -- Version a session renders with, the same for its whole rerun --
+    def current(self, session_id):
+        with self.lock:
+            version = self.version
+            self.sessions[session_id] = (version, time.time())
+        return version
+
+    # -- Looks for new data files (at most every DVIZ_DATA_REFRESH_SECONDS) and builds them in the background --
+    def revalidate(self):
+        now = time.monotonic()
+        with self.lock:
+            if now - self.checked_at < config.DATA_REFRESH_SECONDS:
+                return
+            self.checked_at = now
+        try:
+            fingerprint = dataset_fingerprint(self.paths)
+        except OSError:
+            # -- A data file is being replaced, the next check picks it up --
+            return
+        with self.lock:
+            if fingerprint in (self.version, self.pending, self.failed):
+                return
+            self.pending = fingerprint
+        threading.Thread(target=self.rebuild, args=(fingerprint,), name='dviz-data-refresh', daemon=True).start()
+
+    def rebuild(self, fingerprint):
+        started = time.perf_counter()
+        try:
+            result = self.build(fingerprint)
+            # -- Files replaced while building: the next check builds them, this version is never published --
+            complete = dataset_fingerprint(self.paths) == fingerprint
+        except Exception as error:
+            logger.exception('Building data version %s failed, still serving %s', fingerprint, self.version)
+            with self.lock:
+                self.pending, self.failed, self.error = None, fingerprint, repr(error)
+            return
+
+        with self.lock:
+            self.pending = None
+            if complete:
+                self.version, self.built_at, self.failed, self.error = fingerprint, time.time(), None, None
+                self.results = {fingerprint: result}
+        if complete:
+            logger.info('Data version %s is live, built in %.1fs', fingerprint, time.perf_counter() - started)
+
+    # -- Live version and what the build returned for it. The version the server started with is built on first use,
+    # -- by one session while the others wait for it --
+    def result(self):
+        with self.lock:
+            if self.version in self.results:
+                return self.version, self.results[self.version]
+        with self.building:
+            with self.lock:
+                version = self.version
+                if version in self.results:
+                    return version, self.results[version]
+            result = self.build(version)
+            with self.lock:
+                if version == self.version:
+                    self.results = {version: result}
+            return version, result
+
+    # -- Served version, refresh state and the number of active sessions per version --
+    def status(self):
+        cutoff = time.time() - ACTIVE_SESSION_SECONDS
+        with self.lock:
+            for session_id, (_, seen) in list(self.sessions.items()):
+                if seen < cutoff:
+                    del self.sessions[session_id]
+            return {
+                'version': self.version,
+                'built_at': self.built_at,
+                'pending': self.pending,
+                'error': self.error,
+                'sessions': Counter(version for version, _ in self.sessions.values()),
+            }
+
+
+# -- One refresher per set of data files and server process, shared by all pages and sessions --
+def shared_refresher(paths, build):
+    with _refreshers_lock:
+        key = tuple(paths)
+        if key not in _refreshers:
+            _refreshers[key] = DataRefresher(paths, build)
+        return _refreshers[key]
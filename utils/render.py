@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from utils import config
+
+# -- Shared look of all charts, registered as the 'dviz' plotly template --
+TITLE_FONT = dict(size=24)
+LINE_WIDTH = 2
+WIDE_CHART_WIDTH = 1200
+
+TEMPLATE_LAYOUT = dict(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    legend=dict(title_font=TITLE_FONT),
+    xaxis=dict(title_font=TITLE_FONT),
+    yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#dddddd', title_font=TITLE_FONT),
+)
+
+pio.templates['dviz'] = go.layout.Template(layout=TEMPLATE_LAYOUT)
+
+# -- Layered on top of the current default (streamlit's own template once streamlit is imported) --
+if 'dviz' not in pio.templates.default.split('+'):
+    pio.templates.default = f'{pio.templates.default}+dviz'
+
+# -- Same animation controls plotly express adds to animated charts --
+ANIMATION_FRAME_ARGS = {'frame': {'duration': 500, 'redraw': True}, 'mode': 'immediate', 'fromcurrent': True,
+                        'transition': {'duration': 500, 'easing': 'linear'}}
+ANIMATION_STEP_ARGS = {'frame': {'duration': 0, 'redraw': True}, 'mode': 'immediate', 'fromcurrent': True,
+                       'transition': {'duration': 0, 'easing': 'linear'}}
+
+
+# -- Positions where a sorted array of group codes changes, as (code, start, end) --
+def group_slices(codes):
+    if len(codes) == 0:
+        return []
+    starts = np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1))
+    ends = np.append(starts[1:], len(codes))
+    return [(codes[start], start, end) for start, end in zip(starts, ends)]
+
+
+# -- Splits columns (of a frame or a dict of arrays) into one array slice per group, without a pandas groupby --
+def split_by(data, color, columns, category_orders=None):
+    if color is None:
+        return [(None, {column: np.asarray(data[column]) for column in columns})]
+
+    values = np.asarray(data[color])
+    order = (category_orders or {}).get(color)
+    if order is not None:
+        # -- Groups follow the requested order, groups missing from it go last --
+        values = pd.Categorical(values, categories=[*order, *sorted(set(values) - set(order))])
+    codes, names = pd.factorize(values, sort=True)
+
+    index = np.argsort(codes, kind='stable')
+    arrays = {column: np.asarray(data[column])[index] for column in columns}
+    return [(names[code], {column: array[start:end] for column, array in arrays.items()})
+            for code, start, end in group_slices(codes[index])]
+
+
+def hovertemplate(parts):
+    return '<br>'.join(f'{label}={value}' for label, value in parts) + '<extra></extra>'
+
+
+# -- Builds the figure in one go, so the shared layout is validated only once --
+def figure(traces, title=None, x_title=None, y_title=None, legend_title=None, width=None, xaxis=None, yaxis=None,
+           frames=None, **layout):
+    layout = dict(title=title, width=width, legend=dict(title=legend_title),
+                  xaxis=dict(title=x_title, **(xaxis or {})), yaxis=dict(title=y_title, **(yaxis or {})), **layout)
+    return go.Figure(data=traces, layout=layout, frames=frames)
+
+
+# -- Line chart with one trace per value of `color`, switches to WebGL and merged traces for many traces --
+def line_figure(df, x, y, color=None, labels=None, category_orders=None, title=None, color_map=None, width=None,
+                xaxis=None, yaxis=None):
+    labels = labels or {}
+    x_title, y_title = labels.get(x, x), labels.get(y, y)
+    color_title = labels.get(color, color)
+    groups = split_by(df, color, [x, y], category_orders)
+
+    xaxis = dict(xaxis or {})
+    if category_orders and x in category_orders:
+        xaxis.update(type='category', categoryorder='array', categoryarray=category_orders[x])
+
+    if len(groups) > config.CONSOLIDATE_TRACE_THRESHOLD:
+        traces = [consolidated_line_trace(groups, x, y, x_title, y_title, color_title)]
+    else:
+        scatter = go.Scattergl if len(groups) > config.WEBGL_TRACE_THRESHOLD else go.Scatter
+        traces = []
+        for name, arrays in groups:
+            hover = [(x_title, '%{x}'), (y_title, '%{y}')]
+            if color is not None:
+                hover.insert(0, (color_title, name))
+            line = dict(width=LINE_WIDTH)
+            if color_map and name in color_map:
+                line['color'] = color_map[name]
+            traces.append(scatter(x=arrays[x], y=arrays[y], mode='lines', name=None if name is None else str(name),
+                                  legendgroup=None if name is None else str(name), showlegend=color is not None,
+                                  line=line, hovertemplate=hovertemplate(hover)))
+
+    return figure(traces, title=title, x_title=x_title, y_title=y_title, legend_title=color_title, width=width,
+                  xaxis=xaxis, yaxis=yaxis)
+
+
+# -- A single Scattergl trace for all groups, the lines are separated by gaps and the hover names the group --
+def consolidated_line_trace(groups, x, y, x_title, y_title, color_title):
+    x_parts, y_parts, name_parts = [], [], []
+    for name, arrays in groups:
+        x_parts += [arrays[x].astype(object), [None]]
+        y_parts += [arrays[y].astype(float), [np.nan]]
+        name_parts += [np.full(len(arrays[x]), str(name), dtype=object), ['']]
+
+    return go.Scattergl(
+        x=np.concatenate(x_parts[:-1]), y=np.concatenate(y_parts[:-1]), mode='lines', connectgaps=False,
+        hovertext=np.concatenate(name_parts[:-1]), name=f'{color_title}: {len(groups)} selected',
+        line=dict(width=LINE_WIDTH), showlegend=True,
+        hovertemplate=hovertemplate([(color_title, '%{hovertext}'), (x_title, '%{x}'), (y_title, '%{y}')]))
+
+
+# -- Forecasts of the groups of a line chart (columns Forecast, Lower, Upper): a dashed line and a shaded band, each
+# -- a single trace for all groups. The band of a group is its upper edge followed by its lower edge backwards --
+def forecast_traces(df, x, color, line_title, band_title, labels=None):
+    if len(df) == 0:
+        return []
+    labels = labels or {}
+    x_title, color_title = labels.get(x, x), labels.get(color, color)
+    line_x, line_y, names, band_x, band_y = [], [], [], [], []
+    for name, arrays in split_by(df, color, [x, 'Forecast', 'Lower', 'Upper']):
+        years = arrays[x].astype(float)
+        line_x += [years, [np.nan]]
+        line_y += [arrays['Forecast'], [np.nan]]
+        names += [np.full(len(years), str(name), dtype=object), ['']]
+        band_x += [years, years[::-1], [np.nan]]
+        band_y += [arrays['Upper'], arrays['Lower'][::-1], [np.nan]]
+
+    band = go.Scatter(x=np.concatenate(band_x), y=np.concatenate(band_y), mode='lines', fill='toself',
+                      line=dict(width=0), fillcolor='rgba(128, 128, 128, 0.25)', connectgaps=False,
+                      name=band_title, hoverinfo='skip')
+    line = go.Scatter(x=np.concatenate(line_x), y=np.concatenate(line_y), mode='lines', connectgaps=False,
+                      line=dict(width=LINE_WIDTH, dash='dash', color='gray'), name=line_title,
+                      hovertext=np.concatenate(names),
+                      hovertemplate=hovertemplate([(color_title, '%{hovertext}'), (x_title, '%{x}'),
+                                                   (line_title, '%{y}')]))
+    return [band, line]
+
+
+# -- Grouped bar chart with one animation frame per value of `frame` (e.g. per year) --
+def animated_bar_figure(df, x, y, color, frame, labels=None, title=None, color_map=None, width=None):
+    labels = labels or {}
+    x_title, y_title = labels.get(x, x), labels.get(y, y)
+    color_title, frame_title = labels.get(color, color), labels.get(frame, frame)
+    color_names = pd.factorize(np.asarray(df[color]), sort=True)[1]
+
+    def bar_traces(frame_value, arrays):
+        # -- Every frame has the same traces (one per color), missing groups are empty --
+        by_color = dict(split_by(arrays, color, [x, y]))
+        traces = []
+        for name in color_names:
+            values = by_color.get(name, {x: np.array([], dtype=object), y: np.array([])})
+            traces.append(go.Bar(
+                x=values[x], y=values[y], ids=values[x], name=str(name), legendgroup=str(name), offsetgroup=str(name),
+                alignmentgroup='True', marker=dict(color=(color_map or {}).get(name)), textposition='auto',
+                hovertemplate=hovertemplate([(color_title, name), (frame_title, frame_value), (x_title, '%{x}'),
+                                             (y_title, '%{y}')])))
+        return traces
+
+    frames = [go.Frame(data=bar_traces(frame_value, arrays), name=str(frame_value))
+              for frame_value, arrays in split_by(df, frame, [x, y, color])]
+    steps = [dict(args=[[frame.name], ANIMATION_STEP_ARGS], label=frame.name, method='animate') for frame in frames]
+
+    return figure(
+        frames[0].data if frames else [], title=title, x_title=x_title, y_title=y_title, legend_title=color_title,
+        width=width, frames=frames, barmode='group',
+        updatemenus=[dict(type='buttons', direction='left', showactive=False, pad=dict(r=10, t=70), x=0.1,
+                          xanchor='right', y=0, yanchor='top',
+                          buttons=[dict(label='&#9654;', method='animate', args=[None, ANIMATION_FRAME_ARGS]),
+                                   dict(label='&#9724;', method='animate', args=[[None], ANIMATION_STEP_ARGS])])],
+        sliders=[dict(active=0, currentvalue=dict(prefix=f'{frame_title}='), len=0.9, pad=dict(b=10, t=60), x=0.1,
+                      xanchor='left', y=0, yanchor='top', steps=steps)])
+
+
+# -- Heatmap with the values written in the cells, the color scale is centered on zero (e.g. correlations) --
+def heatmap_figure(z, x, y, title=None, x_title=None, y_title=None, value_title=None, zmin=-1, zmax=1,
+                   colorscale='RdBu_r', height=None):
+    trace = go.Heatmap(z=z, x=x, y=y, zmin=zmin, zmax=zmax, zmid=0, colorscale=colorscale, texttemplate='%{z:.2f}',
+                       colorbar=dict(title=value_title),
+                       hovertemplate=hovertemplate([(y_title, '%{y}'), (x_title, '%{x}'), (value_title, '%{z:.3f}')]))
+    return figure([trace], title=title, x_title=x_title, y_title=y_title, height=height,
+                  yaxis=dict(autorange='reversed', showgrid=False), xaxis=dict(showgrid=False))
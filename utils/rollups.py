@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from utils import config
+from utils.query import PandasBackend
+
+# -- Keys of the country-year facts, partitions on them never split a fact row --
+PARTITION_COLUMNS = ('Year', 'CountryId')
+
+
+def worker_count(workers=None):
+    workers = config.ROLLUP_WORKERS if workers is None else workers
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+# -- Splits the rows into contiguous ranges of the sorted partition keys. The split only depends on the data and
+# -- on DVIZ_ROLLUP_PARTITIONS, never on the number of workers, so every worker count gives the same result --
+def partition_frame(df, partition_by=None, partitions=None):
+    partition_by = partition_by or config.ROLLUP_PARTITION_BY
+    if partition_by not in PARTITION_COLUMNS:
+        raise ValueError(f'Rollups can only be partitioned by {" or ".join(PARTITION_COLUMNS)}, not {partition_by!r}')
+    partitions = partitions or config.ROLLUP_PARTITIONS
+
+    codes = pd.factorize(df[partition_by], sort=True)[0]
+    key_count = codes.max() + 1 if len(codes) else 0
+    partitions = max(1, min(partitions, key_count))
+    # -- Rows with a missing key (code -1) go to the first partition --
+    partition_ids = np.maximum(codes, 0) * partitions // max(key_count, 1)
+    order = np.argsort(partition_ids, kind='stable')
+    bounds = np.searchsorted(partition_ids[order], np.arange(partitions + 1))
+    return [df.iloc[order[start:end]] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+# -- Runs func on every partition in a process pool. Small frames and single workers run it on the same partitions in
+# -- this process, so the partials (and the float sums merged from them) never depend on the number of workers --
+def map_partitions(func, df, partition_by=None, workers=None, partitions=None):
+    parts = partition_frame(df, partition_by, partitions) or [df]
+    workers = min(worker_count(workers), len(parts))
+    if workers <= 1 or len(df) < config.ROLLUP_PARALLEL_MIN_ROWS:
+        return [func(part) for part in parts]
+
+    # -- spawn, forking the threaded streamlit server is not safe. map keeps the partition order --
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(func, parts))
+
+
+def aggregate_partition(part, rollups):
+    backend = PandasBackend({'part': part})
+    return {name: backend.aggregate('part', **rollup) for name, rollup in rollups.items()}
+
+
+# -- Group-by sums of `table`, as {name: frame} for rollups given as {name: dict(by=..., values=..., where=...)}.
+# -- The pandas backend aggregates partitions in parallel and merges them, DuckDB already runs on all cores --
+def build_rollups(backend, table, rollups, partition_by=None, workers=None, partitions=None):
+    if not isinstance(backend, PandasBackend):
+        return {name: backend.aggregate(table, **rollup) for name, rollup in rollups.items()}
+
+    partition_by = partition_by or config.ROLLUP_PARTITION_BY
+    df = backend.tables[table]
+    # -- Only the columns the rollups read are sent to the workers --
+    columns = [partition_by]
+    for rollup in rollups.values():
+        values = [rollup['values']] if isinstance(rollup['values'], str) else rollup['values']
+        columns += [*rollup['by'], *values, *(column for column, _, _ in rollup.get('where') or [])]
+    df = df[list(dict.fromkeys(columns))]
+
+    parts = map_partitions(partial(aggregate_partition, rollups=rollups), df, partition_by, workers, partitions)
+    merged = {}
+    for name, rollup in rollups.items():
+        values = [rollup['values']] if isinstance(rollup['values'], str) else list(rollup['values'])
+        frames = [part[name] for part in parts]
+        if not frames:
+            merged[name] = backend.aggregate(table, **rollup)
+            continue
+        # -- Partials of one group are summed in partition order, which keeps the result deterministic. When the
+        # -- rollup is keyed by the partition column every group has a single partial and the sums are exact --
+        merged[name] = (pd.concat(frames, ignore_index=True)
+                        .groupby(rollup['by'], observed=True, sort=True)[values].sum().reset_index())
+    return merged
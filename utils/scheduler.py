@@ -0,0 +1,41 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from utils import config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def figure_workers():
+    return config.FIGURE_WORKERS if config.FIGURE_WORKERS > 0 else (os.cpu_count() or 1)
+
+
+# -- One thread pool per server process, shared by all sessions so the number of build threads stays bounded --
+def figure_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=figure_workers(), thread_name_prefix='dviz-figures')
+        return _executor
+
+
+# -- Result (or error) of a build run in the calling thread, as a future like the pooled ones --
+def run_now(build):
+    future = Future()
+    try:
+        future.set_result(build())
+    except Exception as error:
+        future.set_exception(error)
+    return future
+
+
+# -- Starts independent figure builds together and returns their futures in the order of the builds, so the page
+# -- can show each figure in its place as soon as it and the ones before it are done. Threads, not processes: the
+# -- builds share the cached frames and mostly run in numpy/pandas, and figures would have to be pickled back --
+def submit_builds(builds):
+    if figure_workers() <= 1 or len(builds) <= 1:
+        return [run_now(build) for build in builds]
+    executor = figure_executor()
+    return [executor.submit(build) for build in builds]
@@ -0,0 +1,90 @@
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils import config
+
+# -- Trace properties that hold the data of a figure, everything else is small layout --
+FIGURE_DATA_PROPERTIES = ('x', 'y', 'z', 'ids', 'text', 'hovertext', 'customdata', 'values', 'labels', 'parents',
+                          'locations', 'lat', 'lon')
+
+# -- Artifact stores of the live sessions, an entry disappears with its session --
+_registry = weakref.WeakValueDictionary()
+_registry_lock = threading.Lock()
+
+
+# -- Estimated bytes held by an object: frames and arrays from their buffers, figures from their data arrays --
+def estimate_size(obj):
+    if obj is None:
+        return 0
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(pd.Series(obj.ravel()).memory_usage(index=False, deep=True)) if obj.dtype == object else obj.nbytes
+    if isinstance(obj, go.Figure):
+        traces = [*obj.data, *(trace for frame in obj.frames for trace in frame.data)]
+        return sum(estimate_size(trace[name]) for trace in traces for name in FIGURE_DATA_PROPERTIES
+                   if name in trace)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_size(value) for value in obj)
+    return sys.getsizeof(obj)
+
+
+# -- Derived frames and figures of one session, the least recently used ones are evicted beyond the budget --
+class SessionArtifacts:
+    def __init__(self, session_id, budget_bytes=None):
+        self.session_id = session_id
+        self.budget_bytes = budget_bytes if budget_bytes is not None else config.SESSION_MEMORY_BUDGET_MB * 2 ** 20
+        self.items = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        with _registry_lock:
+            _registry[session_id] = self
+
+    def get(self, key):
+        if key not in self.items:
+            return None
+        self.items.move_to_end(key)
+        return self.items[key][0]
+
+    def get_or_build(self, key, build):
+        if key in self.items:
+            self.items.move_to_end(key)
+            return self.items[key][0]
+        value = build()
+        size = estimate_size(value)
+        self.items[key] = (value, size)
+        self.size += size
+        self.evict()
+        return value
+
+    # -- The artifact used last always stays, even when it alone is over the budget --
+    def evict(self):
+        while self.size > self.budget_bytes and len(self.items) > 1:
+            _, (_, size) = self.items.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+
+# -- Memory of the derived artifacts over all live sessions of this server process --
+def memory_metrics():
+    with _registry_lock:
+        stores = list(_registry.values())
+    sizes = [store.size for store in stores]
+    return {
+        'sessions': len(stores),
+        'total_bytes': sum(sizes),
+        'mean_bytes': sum(sizes) / len(sizes) if sizes else 0,
+        'max_bytes': max(sizes, default=0),
+        'artifacts': sum(len(store.items) for store in stores),
+        'evictions': sum(store.evictions for store in stores),
+    }
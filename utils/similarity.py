@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# -- Population columns of df_pop, the population trajectory of a country --
+POPULATION_COLUMNS = ['1970_Population', '1980_Population', '1990_Population', '2000_Population',
+                      '2010_Population', '2015_Population', '2020_Population', '2022_Population']
+
+# -- Blocks of the feature vector and their weight. Every block is scaled to the same total variance first, so the
+# -- 30+ years of the rate series count as much as the single area column --
+FEATURE_BLOCKS = {
+    'population': 1.0,
+    'structure': 1.0,
+    'suicide_rate': 1.0,
+    'economy': 1.0,
+}
+
+
+# -- One row per country of df_pop (indexed by CountryId), one column per feature. Sizes are compared on a log
+# -- scale. Countries without suicide or economic data have NaN there --
+def build_country_features(df_pop, rates, economics):
+    countries = df_pop.set_index('CountryId')
+    blocks = {
+        'population': np.log10(countries[POPULATION_COLUMNS].clip(lower=1)),
+        'structure': pd.DataFrame({'Density': np.log10(countries['Density'].clip(lower=1e-3)),
+                                   'Growth_Rate': countries['Growth_Rate'],
+                                   'Area': np.log10(countries['Area'].clip(lower=1))}),
+        'suicide_rate': rates.pivot(index='CountryId', columns='Year', values='DeathRatePer100K')
+                             .reindex(countries.index).add_prefix('Rate_'),
+        'economy': np.log10(economics.groupby(level='CountryId')[['GDPPerCapita', 'GNIPerCapita']].mean()
+                            .clip(lower=1)).reindex(countries.index),
+    }
+    return pd.concat(blocks, axis=1)
+
+
+# -- Exact nearest neighbour index: standardized feature vectors and their squared norms. Missing features are set
+# -- to the mean (0 after standardizing), so they neither attract nor repel --
+def build_similarity_index(features):
+    values = features.to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scaled = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0)
+    scaled = np.where(np.isfinite(scaled), scaled, 0.0)
+
+    block_names = features.columns.get_level_values(0)
+    for block, weight in FEATURE_BLOCKS.items():
+        columns = block_names == block
+        scaled[:, columns] *= weight / np.sqrt(max(columns.sum(), 1))
+
+    vectors = np.ascontiguousarray(scaled)
+    return {'ids': features.index.to_numpy(), 'vectors': vectors, 'norms': np.einsum('ij,ij->i', vectors, vectors)}
+
+
+# -- The k countries closest to a country (euclidean distance), nearest first, without the country itself --
+def nearest_countries(index, country_id, k):
+    position = np.flatnonzero(index['ids'] == country_id)
+    k = min(k, len(index['ids']) - 1)
+    if len(position) == 0 or k <= 0:
+        return pd.Series(dtype=float)
+    position = position[0]
+    distances = index['norms'] - 2 * (index['vectors'] @ index['vectors'][position]) + index['norms'][position]
+    distances[position] = np.inf
+    nearest = np.argpartition(distances, k - 1)[:k]
+    nearest = nearest[np.argsort(distances[nearest])]
+    return pd.Series(np.sqrt(np.maximum(distances[nearest], 0)), index=index['ids'][nearest])
@@ -0,0 +1,55 @@
+from utils.plugins import register_plugin
+from utils.quality import clean_suicides
+from utils.rates import DENOMINATOR_PER, RATE_KEYS
+
+# -- Defining colors for the genders and the age groups --
+# https://matplotlib.org/stable/gallery/color/named_colors.html
+SEX_COLORS = {'Male': 'dodgerblue', 'Female': 'lightcoral'}
+AGE_GROUP_COLORS = {'0-14 years': 'dodgerblue',
+                    '15-24 years': 'orchid',
+                    '25-34 years': 'orange',
+                    '55-74 years': 'chocolate',
+                    '75+ years': 'maroon'}
+
+# -- The suicide dataset, see utils/plugins.py for what a dataset declares --
+SUICIDES = register_plugin(
+    'suicides',
+    title='Suicides',
+    page='pages/Suicide.py',
+    file='./csv_files/suicides.csv',
+    schema={'RegionName': 'str', 'CountryName': 'str', 'CountryCode': 'str', 'Year': 'int', 'Sex': 'str',
+            'AgeGroup': 'str', 'Generation': 'str', 'SuicideCount': 'float', 'DeathRatePer100K': 'float',
+            'Population': 'float'},
+    normalize=clean_suicides,
+    country=('CountryName', 'CountryCode'),
+    labels={'country': 'CountryName', 'continent': 'RegionName', 'sex': 'Sex', 'age_group': 'AgeGroup',
+            'generation': 'Generation'},
+    measure=dict(numerator='SuicideCount', denominator='Population', rate='DeathRatePer100K', scale=1e5,
+                 title='Number of Suicides per 100K', per=DENOMINATOR_PER),
+    # -- The Countries tab, the gender pie and the similarity index group by more columns than the rollups --
+    keys=RATE_KEYS,
+    # -- World and continent rollups of the static charts, `values` is the column summed by the 'summed' rate
+    # -- method (see DVIZ_RATE_METHOD) --
+    rollups={
+        'region_sex': dict(by=['RegionName', 'Year', 'Sex'], values='DeathRatePer100K',
+                           where=[('Sex', '!=', 'Unknown')]),
+        'region_age': dict(by=['RegionName', 'Year', 'AgeGroup'], values='DeathRatePer100K',
+                           where=[('AgeGroup', '!=', 'Unknown')]),
+        'region_count': dict(by=['RegionName', 'Year'], values='SuicideCount'),
+        'world_sex': dict(by=['Year', 'Sex'], values='DeathRatePer100K', where=[('Sex', '!=', 'Unknown')]),
+        'world': dict(by=['Year'], values='DeathRatePer100K'),
+        'world_age': dict(by=['Year', 'AgeGroup'], values='DeathRatePer100K',
+                          where=[('AgeGroup', '!=', 'Unknown')]),
+    },
+    charts={
+        'world': dict(rollup='world', kind='line', title='💀 Suicides worldwide over the years'),
+        'world_age': dict(rollup='world_age', kind='line', color='AgeGroup', color_map=AGE_GROUP_COLORS,
+                          title='👶👱‍♀️👴 Suicides worldwide by age group over the years'),
+        'world_sex': dict(rollup='world_sex', kind='line', color='Sex', color_map=SEX_COLORS,
+                          title='👦👧 Suicides worldwide by Gender over the years'),
+        'region_sex': dict(rollup='region_sex', kind='bar', color='Sex', color_map=SEX_COLORS,
+                           title='👦👧 Suicides by Continent and Gender over the years'),
+        'region_age': dict(rollup='region_age', kind='bar', color='AgeGroup', color_map=AGE_GROUP_COLORS,
+                           title='👶👱‍♀️👴 Suicides by Continent and the age group over the years'),
+    },
+)
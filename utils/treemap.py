@@ -0,0 +1,77 @@
+import numpy as np
+import plotly.graph_objects as go
+
+ROOT_LABEL = 'Continent'
+
+# -- Treemap metrics: selectbox label -> column of the population dataset, title and hover line --
+TREEMAP_METRICS = {
+    'Area': ('Area', '🌳 Area of the entire world', '<b>Area:</b> %{customdata[2]:,.2f} km²'),
+    'Population Density': ('Density', '🌳 Population Density of the entire world',
+                           '<b>Population Density:</b> %{customdata[2]:,.2f} per km²'),
+    'Growth Rate': ('Growth_Rate', '🌳 Growth Rate of the entire world',
+                    '<b>Growth Rate:</b> %{customdata[2]:.2f}%'),
+    'Population': ('2022_Population', '🌳 2022 Population of the entire world',
+                   '<b>Population:</b> %{customdata[2]:,}<br>'
+                   '<b>World Population Percentage:</b> %{customdata[3]:.2f}%'),
+}
+
+
+# -- The continent -> country hierarchy and the values of every metric, built once per dataset --
+def build_treemap_hierarchy(df_pop):
+    continents = df_pop['Continent'].astype(str).to_numpy()
+    countries = df_pop['Country'].astype(str).to_numpy()
+    continent_names, continent_codes = np.unique(continents, return_inverse=True)
+    n_continents = len(continent_names)
+
+    # -- Node order: root, continents, countries --
+    ids = np.concatenate(([ROOT_LABEL], [f'{ROOT_LABEL}/{name}' for name in continent_names],
+                          [f'{ROOT_LABEL}/{continent}/{country}' for continent, country in zip(continents, countries)]))
+    labels = np.concatenate(([ROOT_LABEL], continent_names, countries))
+    continent_ids = ids[1:1 + n_continents]
+    parents = np.concatenate(([''], np.full(n_continents, ROOT_LABEL, dtype=object), continent_ids[continent_codes]))
+    node_continents = np.concatenate(([''], continent_names, continents))
+    node_countries = np.concatenate(([''], np.full(n_continents, '', dtype=object), countries))
+
+    percentage = df_pop['World_Population Percentage'].to_numpy(dtype=float)
+    metrics = {}
+    for metric, (column, _, _) in TREEMAP_METRICS.items():
+        leaf_values = df_pop[column].to_numpy(dtype=float)
+        values, colors = rollup(leaf_values, continent_codes, n_continents)
+        percentages, _ = rollup(percentage, continent_codes, n_continents)
+        customdata = np.column_stack((node_continents, node_countries, values, percentages))
+        metrics[metric] = {'values': values, 'colors': colors, 'customdata': customdata}
+
+    return {'ids': ids, 'labels': labels, 'parents': parents, 'metrics': metrics}
+
+
+# -- Parent values are the sum of their children (branchvalues='total'), parent colors the value weighted mean --
+def rollup(leaf_values, continent_codes, n_continents):
+    leaf_values = np.nan_to_num(leaf_values)
+    continent_values = np.bincount(continent_codes, weights=leaf_values, minlength=n_continents)
+    weighted = np.bincount(continent_codes, weights=leaf_values * leaf_values, minlength=n_continents)
+    total = continent_values.sum()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        continent_colors = np.where(continent_values > 0, weighted / continent_values, 0)
+        root_color = weighted.sum() / total if total > 0 else 0
+
+    values = np.concatenate(([total], continent_values, leaf_values))
+    colors = np.concatenate(([root_color], continent_colors, leaf_values))
+    return values, colors
+
+
+# -- Switching the metric only swaps the precomputed value arrays --
+def treemap_figure(hierarchy, metric):
+    _, title, hover_line = TREEMAP_METRICS[metric]
+    arrays = hierarchy['metrics'][metric]
+    hovertemplate = ('<b>Continent:</b> %{customdata[0]}<br>' +
+                     '<b>Country:</b> %{customdata[1]}<br>' +
+                     hover_line + '<extra></extra>')
+
+    fig = go.Figure(
+        go.Treemap(ids=hierarchy['ids'], labels=hierarchy['labels'], parents=hierarchy['parents'],
+                   values=arrays['values'], branchvalues='total', customdata=arrays['customdata'],
+                   marker=dict(colors=arrays['colors'], coloraxis='coloraxis'), hovertemplate=hovertemplate),
+        layout=dict(title=title, title_font_size=34, height=1000, width=1600,
+                    coloraxis=dict(colorscale='jet', colorbar=dict(title=metric))))
+    return fig